@@ -0,0 +1,244 @@
+"""Headless benchmark of the app driven by streamlit.testing AppTest.
+
+Every simulated session runs the full user journey:
+    login -> unit selection -> toggle each special function -> edit the 20 parameters
+    -> customized results -> export
+
+and the harness reports per step the latency percentiles of a single rerun, the rerun count
+and the memory allocated (tracemalloc peak above the start of the step).
+
+    python benchmarks/bench_app.py                         # 1 session
+    python benchmarks/bench_app.py --sessions 1 50 500     # several load levels
+    python benchmarks/bench_app.py --concurrency 8         # 8 sessions in parallel
+    python benchmarks/bench_app.py --update-baseline       # store the results as the new baseline
+
+Results are compared with benchmarks/baseline.json (when present); the exit code is 1 if the
+p95 rerun latency of any step regressed more than --tolerance. Sessions run in worker processes
+(--concurrency of them at a time). tracemalloc slows the reruns down, so compare latencies
+between runs with the same --no-alloc setting only. The report goes to stdout, Streamlit's own
+log output to stderr.
+
+The sessions log in as SAFELINK_BENCH_USER / SAFELINK_BENCH_PASSWORD (default demo / demo), which
+must be an account in the credentials file (see utils.auth).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+USERNAME = os.environ.get("SAFELINK_BENCH_USER", "demo")
+PASSWORD = os.environ.get("SAFELINK_BENCH_PASSWORD", "demo")
+
+SPECIAL_FUNCTIONS = ("Quick Lifting", "Constant Tension", "Rod Lock", "Active Heave Compensation")
+STEPS = ("login", "unit_selection", "special_functions", "parameters", "results", "export")
+
+
+class Session:
+    """One simulated user, records the duration of every rerun per step"""
+
+    def __init__(self, timeout):
+        self.at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=timeout)
+        self.timings = {step: [] for step in STEPS}
+        self.exceptions = {step: 0 for step in STEPS}
+        self.step = None
+
+    def run(self, element=None):
+        """Rerun the app (through a widget interaction if given) and time it"""
+        start = time.perf_counter()
+        if element is None:
+            self.at.run()
+        else:
+            element.run()
+        self.timings[self.step].append(time.perf_counter() - start)
+        self.exceptions[self.step] += len(self.at.exception)
+
+    def switch_page(self, page):
+        self.at.switch_page(page)
+        self.run()
+
+    def widget(self, kind, key):
+        """Widget by key, or None if the current page does not render it"""
+        try:
+            return getattr(self.at, kind)(key=key)
+        except KeyError:
+            return None
+
+
+def step_login(session):
+    session.run()
+    session.at.text_input[0].input(USERNAME)
+    session.at.text_input[1].input(PASSWORD)
+    session.run(session.at.button[0].click())
+
+
+def step_unit_selection(session):
+    session.switch_page("pages/page_unit.py")
+    unit_type = session.widget("selectbox", "unit_selectbox")
+    for option in unit_type.options:
+        session.run(session.widget("selectbox", "unit_selectbox").select(option))
+        radio = next((r for r in session.at.radio if r.key), None)
+        if radio is not None and len(radio.options) > 1:
+            session.run(radio.set_value(radio.options[-1]))
+    # end on the first unit type, which offers every special function
+    session.run(session.widget("selectbox", "unit_selectbox").select(unit_type.options[0]))
+
+
+def step_special_functions(session):
+    for name in SPECIAL_FUNCTIONS:
+        checkbox = next((c for c in session.at.checkbox if name in c.label), None)
+        if checkbox is None or checkbox.disabled:
+            continue
+        session.run(checkbox.check())
+
+
+def step_parameters(session):
+    for group in (0, 1):
+        for i in range(1, 11):
+            number = session.widget("number_input", f"number_{i}_{group}")
+            if number is not None:
+                session.run(number.set_value(round(1.0 + 0.1 * i, 1)))
+
+
+def step_results(session):
+    session.switch_page("pages/page_results.py")
+    session.run(session.widget("selectbox", "results_selectbox").select("Customized"))
+    select_all = next((b for b in session.at.button if b.label.startswith("✅ Select All")), None)
+    if select_all is not None:
+        session.run(select_all.click())
+    for checkbox in list(session.at.checkbox)[:5]:
+        session.run(checkbox.uncheck())
+
+
+def step_export(session):
+    session.switch_page("pages/page_export.py")
+    generate = next((b for b in session.at.button if "Generate Configuration File" in b.label), None)
+    if generate is not None:
+        session.run(generate.click())
+
+
+JOURNEY = {
+    "login": step_login,
+    "unit_selection": step_unit_selection,
+    "special_functions": step_special_functions,
+    "parameters": step_parameters,
+    "results": step_results,
+    "export": step_export,
+}
+
+
+def _init_worker():
+    # the pages open figures and materials relative to the working directory
+    os.chdir(ROOT)
+
+
+def run_session(timeout, trace):
+    """Run the journey once, returns (timings, exceptions, allocated bytes per step)"""
+    if trace and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    session = Session(timeout)
+    allocated = {}
+    for step, action in JOURNEY.items():
+        session.step = step
+        if trace:
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+        action(session)
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            allocated[step] = max(peak - start, 0)
+        else:
+            allocated[step] = 0
+    return session.timings, session.exceptions, allocated
+
+
+def run_load(n_sessions, concurrency, timeout, trace):
+    """Run n_sessions journeys in `concurrency` worker processes and aggregate per step"""
+    # AppTest is not thread safe, so concurrent sessions get a process each; like server
+    # processes, the workers keep their st.cache_data / st.cache_resource between sessions
+    with ProcessPoolExecutor(max_workers=concurrency, initializer=_init_worker) as pool:
+        sessions = list(pool.map(run_session, [timeout] * n_sessions, [trace] * n_sessions))
+
+    results = {}
+    for step in STEPS:
+        timings = np.array([t for timing, _, _ in sessions for t in timing[step]])
+        reruns = [len(timing[step]) for timing, _, _ in sessions]
+        allocated = [alloc[step] for _, _, alloc in sessions]
+        p50, p95, p99 = np.percentile(timings, [50, 95, 99]) if timings.size else (0.0, 0.0, 0.0)
+        results[step] = {
+            "p50_ms": p50 * 1e3,
+            "p95_ms": p95 * 1e3,
+            "p99_ms": p99 * 1e3,
+            "max_ms": timings.max() * 1e3 if timings.size else 0.0,
+            "reruns": float(np.mean(reruns)),
+            "alloc_kib": float(np.mean(allocated)) / 1024,
+            "exceptions": int(sum(exc[step] for _, exc, _ in sessions)),
+        }
+    return results
+
+
+def print_report(n_sessions, results, baseline):
+    print(f"\n{n_sessions} session(s)")
+    header = f"{'step':<18}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'reruns':>8}{'alloc KiB':>11}{'exc':>5}"
+    print(header + ("   p95 vs baseline" if baseline else ""))
+    for step, row in results.items():
+        line = (f"{step:<18}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+                f"{row['reruns']:>8.1f}{row['alloc_kib']:>11.0f}{row['exceptions']:>5}")
+        if baseline and step in baseline:
+            line += f"   {row['p95_ms'] / max(baseline[step]['p95_ms'], 1e-9):>6.2f}x"
+        print(line)
+
+
+def regressions(results, baseline, tolerance):
+    """Steps whose p95 rerun latency exceeds the baseline by more than the tolerance"""
+    return [
+        step for step, row in results.items()
+        if step in baseline and row["p95_ms"] > baseline[step]["p95_ms"] * (1 + tolerance)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of the Safelink configuration tool")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1], help="load levels, e.g. 1 50 500")
+    parser.add_argument("--concurrency", type=int, default=1, help="sessions run in parallel")
+    parser.add_argument("--timeout", type=float, default=60, help="rerun timeout [s]")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 regression (0.2 = 20%%)")
+    parser.add_argument("--no-alloc", action="store_true", help="skip tracemalloc, which slows every rerun down")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    report, failed = {}, []
+    for n_sessions in args.sessions:
+        results = run_load(n_sessions, args.concurrency, args.timeout, not args.no_alloc)
+        reference = baseline.get(str(n_sessions))
+        print_report(n_sessions, results, reference)
+        report[str(n_sessions)] = results
+        if reference and not args.update_baseline:
+            failed += [f"{n_sessions}:{step}" for step in regressions(results, reference, args.tolerance)]
+
+    if args.update_baseline:
+        baseline.update(report)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+    elif failed:
+        print(f"\nRegressed beyond {args.tolerance:.0%}: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Per-step cost of the external function runtime (utils.external_function).
+
+Drives the compiled configuration with synthetic time steps (regular heave, a tension signal
+around the static load, a lowering at constant speed) and reports the time per step and the
+memory allocated while stepping.
+
+    python benchmarks/bench_runtime.py                      # sample IAHC configuration, all functions on
+    python benchmarks/bench_runtime.py config.ini           # an exported .ini or .slcf file
+    python benchmarks/bench_runtime.py --steps 2000000 --dt 0.01
+
+The inputs are precomputed lists, so the timed loop only contains the step call.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.config_model import build_config  # noqa: E402
+from utils.external_function import ExternalFunction, G, OUTPUT_INDEX  # noqa: E402
+
+SAMPLE_STATE = {
+    "selected_unit_type": "IAHC",
+    "selected_unit": ("IAHC", "SAMPLE"),
+    "check_box_quicklifting": True,
+    "check_box_constant_tension": True,
+    "check_box_active_heave_compensation": True,
+    "check_box_rod_lock": True,
+    "rod_orientation": "Rod Down (Standard)",
+    "rod_lock_depth": 50.0,
+    "rod_lock_operation": "Lifting Down",
+    "rod_lock_mode": "Auto Lock at Depth",
+    "lock_hold_time": 2.0,
+    "lock_speed": 0.5,
+    "quick_start_time": 5.0,
+    "quick_acceleration_limit": 1.0,
+    "tension_start_time": 1.0,
+    "tension_tolerance": 0.5,
+    "heave_start_time": 1.0,
+    "max_stroke_speed": 1.5,
+    "motion_reference": "Onboard",
+    "max_force_limit": 200.0,
+    "customized_results": False,
+    "selected_body_results": [],
+    "selected_rod_results": [],
+    "selected_payload_results": [],
+}
+UNIT_PARAMETERS = [1.5, 60.0, 0.0, 2.0, 0.5, 2.0] + [0.0] * 4   # stroke, force, -, damping, area, gas volume
+PAYLOAD_PARAMETERS = [2.0, 50.0, 2.0] + [0.0] * 7               # lifting height, payload, slings
+for i in range(10):
+    SAMPLE_STATE[f"saved_number_{i + 1}_0"] = UNIT_PARAMETERS[i]
+    SAMPLE_STATE[f"saved_number_{i + 1}_1"] = PAYLOAD_PARAMETERS[i]
+
+
+def inputs(steps, dt, tension_sp):
+    """Synthetic input signals, one list per step argument"""
+    t = [i * dt for i in range(steps)]
+    heave_velocity = [1.2 * math.sin(2 * math.pi * ti / 9.0) for ti in t]
+    stroke = [1.5 + 0.4 * math.sin(2 * math.pi * ti / 9.0 + 0.3) for ti in t]
+    stroke_velocity = [0.4 * 2 * math.pi / 9.0 * math.cos(2 * math.pi * ti / 9.0 + 0.3) for ti in t]
+    tension = [tension_sp * (1 + 0.1 * math.sin(2 * math.pi * ti / 9.0 + 1.0)) for ti in t]
+    depth = [0.5 * ti for ti in t]
+    return t, stroke, stroke_velocity, tension, heave_velocity, depth
+
+
+def run(step, dt, signals):
+    total = 0.0
+    for t, s, vs, tension, heave, depth in zip(*signals):
+        total += step(t, dt, s, vs, tension, heave, depth)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the external function runtime")
+    parser.add_argument("config", nargs="?", help="exported .ini or .slcf file (default: sample configuration)")
+    parser.add_argument("--steps", type=int, default=1000000)
+    parser.add_argument("--dt", type=float, default=0.01, help="time step [s]")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs; the best one is reported")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.config:
+        runtime = ExternalFunction.from_file(args.config)
+    else:
+        runtime = ExternalFunction.from_config(build_config(SAMPLE_STATE))
+    compile_ms = (time.perf_counter() - started) * 1000
+    payload = runtime.record["payload_parameters"]
+    signals = inputs(args.steps, args.dt, (payload[1] + payload[2]) * G or 100.0)
+
+    # empty loop over the same inputs, subtracted from the step timings
+    started = time.perf_counter_ns()
+    run(lambda *_: 0.0, args.dt, signals)
+    overhead = (time.perf_counter_ns() - started) / args.steps
+
+    timings = []
+    for _ in range(args.repeat):
+        runtime.reset()
+        started = time.perf_counter_ns()
+        run(runtime.step, args.dt, signals)
+        timings.append((time.perf_counter_ns() - started) / args.steps)
+
+    runtime.reset()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    run(runtime.step, args.dt, signals)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    functions = ", ".join(name for name, on in runtime.record["functions"].items() if on) or "none"
+    print(f"Configuration: {runtime.record['unit_id']} ({runtime.record['category']}), functions: {functions}")
+    print(f"Compile: {compile_ms:.1f} ms")
+    print(f"Steps: {args.steps} x {args.repeat}, dt {args.dt} s")
+    print(f"Per step: {min(timings) - overhead:.0f} ns (best), {sorted(timings)[len(timings) // 2] - overhead:.0f} ns (median), "
+          f"loop overhead {overhead:.0f} ns excluded")
+    print(f"Memory retained after {args.steps} steps: {retained} bytes")
+    print("Final outputs: " + ", ".join(f"{name}={runtime.out[index]:.3g}" for name, index in OUTPUT_INDEX.items()))
+
+
+if __name__ == "__main__":
+    main()
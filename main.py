@@ -1,6 +1,10 @@
 import streamlit as st
-from PIL import Image
 import os 
+from utils.profiling import span, sample_session_memory, write_metrics_file
+from utils.shared_cache import cached_image
+from utils.session_store import restore_session, persist_session
+from utils.auth import credential_store, logout, TOKEN_COOKIE, TOKEN_HOURS, TOKEN_PARAM
+from utils.capabilities import capability_dict, NO_UNIT_MASK
 
 #%% set up the page configuration
 st.set_page_config(
@@ -24,40 +28,78 @@ box_style = """
 # Initialize session state variables for authentication
 st.session_state.setdefault('logged_in', False)
 st.session_state.setdefault('username', '')
+st.session_state.setdefault('team', None)
 st.session_state.setdefault('show_login_dialog', True)
 # st.session_state.setdefault('last_activity', str(datetime.now()))
 
 # is_demo_user = st.session_state.usesrname == "demo"
 
-def handle_login(username, password):
-    """Handle user authentication"""
-    # Simple authentication - in production, use proper authentication
-    valid_users = {
-        "admin": "password123",
-        "user": "user123",
-        "demo": "demo",
-        "safelink": "safelink2025"
-    }
-    
-    if username in valid_users and valid_users[username] == password:
+def start_session(username, record):
+    """Mark the session as logged in and give the browser a token to come back with"""
+    st.session_state.logged_in = True
+    st.session_state.username = username
+    st.session_state.team = record.get('team')
+    st.session_state.show_login_dialog = False
+    st.session_state.pop('login_error', None)
+    st.session_state.auth_token = credential_store().issue_token(username)
+
+def handle_login():
+    """Check the submitted credentials (login form callback)"""
+    username = st.session_state.login_username.strip()
+    password = st.session_state.login_password
+    st.session_state.login_password = ''
+    if not (username and password):
+        st.session_state.login_error = "⚠️ Please enter both username and password"
+        return
+    record, error = credential_store().authenticate(username, password, client=st.context.ip_address)
+    if record is None:
+        st.session_state.login_error = f"❌ {error}"
+        return
+    start_session(username, record)
+
+def handle_demo_login():
+    """Log in as the account flagged for demo access (login form callback)"""
+    store = credential_store()
+    username = store.demo_user()
+    if username:
+        start_session(username, store.user(username))
+
+def handle_logout():
+    """Handle user logout (button callback)"""
+    logout(st.session_state, st.query_params)
+
+def sync_token_cookie():
+    """Keep the browser's token cookie in step with the session: set after a login, cleared after a logout"""
+    token = st.session_state.get('auth_token', '')
+    if st.session_state.get('_token_cookie', st.context.cookies.get(TOKEN_COOKIE, '')) == token:
+        return
+    max_age = int(TOKEN_HOURS * 3600) if token else 0
+    secure = "; Secure" if str(st.context.url or '').startswith("https") else ""
+    st.html(f"<script>document.cookie = '{TOKEN_COOKIE}={token}; Path=/; Max-Age={max_age}; SameSite=Strict{secure}';</script>",
+            unsafe_allow_javascript=True)
+    st.session_state._token_cookie = token
+
+# A returning browser with a valid token cookie skips the login screen
+if not st.session_state.logged_in and st.context.cookies.get(TOKEN_COOKIE):
+    token_user = credential_store().verify_token(st.context.cookies[TOKEN_COOKIE])
+    if token_user:
         st.session_state.logged_in = True
-        st.session_state.username = username
+        st.session_state.username = token_user
+        st.session_state.team = credential_store().user(token_user).get('team')
         st.session_state.show_login_dialog = False
-        return True
-    return False
+        st.session_state.auth_token = st.context.cookies[TOKEN_COOKIE]
+# a token in the URL would log in whoever the link is shared with
+st.query_params.pop(TOKEN_PARAM, None)
+sync_token_cookie()
 
-def handle_logout():
-    """Handle user logout"""
-    st.session_state.logged_in = False
-    st.session_state.username = ''
-    st.session_state.show_login_dialog = True
-    st.rerun()
+# Pick up the stored configuration of this user's browser session, if a session store is configured
+restore_session(st.session_state, st.query_params, st.session_state.username if st.session_state.logged_in else None)
 
 def show_login_screen():
     """Display the login screen"""
     # Safelink logo
     try:
-        image = Image.open(os.path.join('figures', 'Safelink Logo Medium.png'))
+        image = cached_image(os.path.join('figures', 'Safelink Logo Medium.png'), 800)
         _, col2,_ = st.columns([1, 1, 1])
         with col2:
             st.image(image, width=800)
@@ -72,44 +114,24 @@ def show_login_screen():
         st.markdown("### 🔐 Authentication Required")
         st.markdown("Please login to access the Safelink OrcaFlex External Function Configuration Tool")
         
+        store = credential_store()
+        if not store.configured:
+            st.error(f"❌ No user accounts configured. Add one with `python -m utils.auth add <username>` (credentials file: `{store.path}`).")
+
         with st.form("login_form"):
-            username = st.text_input("👤 Username", placeholder="Enter your username")
-            password = st.text_input("🔒 Password", type="password", placeholder="Enter your password")
+            st.text_input("👤 Username", placeholder="Enter your username", key="login_username")
+            st.text_input("🔒 Password", type="password", placeholder="Enter your password", key="login_password")
             
             col_btn1, col_btn2 = st.columns([1, 1])
             with col_btn1:
-                login_submitted = st.form_submit_button("Login", use_container_width=True, type="primary")
+                st.form_submit_button("Login", use_container_width=True, type="primary", on_click=handle_login)
             with col_btn2:
-                demo_submitted = st.form_submit_button("Demo Login", use_container_width=True)
-            
-            if login_submitted:
-                if username and password:
-                    if handle_login(username, password):
-                        st.success(f"✅ Welcome, {username}!")
-                        st.balloons()
-                        st.rerun()
-                    else:
-                        st.error("❌ Invalid username or password")
-                else:
-                    st.warning("⚠️ Please enter both username and password")
-            
-            if demo_submitted:
-                if handle_login("demo", "demo"):
-                    st.success("✅ Demo login successful!")
-                    st.balloons()
-                    st.rerun()
-        
-        # Demo credentials info
-        with st.expander("🔍 View Demo Credentials"):
-            st.info("""
-            **Demo Account (Quick Access):**
-            - Username: `demo`
-            - Password: `demo`
-            
-            **Other Test Accounts:**
-            - Username: `admin` / Password: `password123`
-            - Username: `user` / Password: `user123`
-            """)
+                # only offered when an account is flagged for demo access in the credentials file
+                if store.demo_user():
+                    st.form_submit_button("Demo Login", use_container_width=True, on_click=handle_demo_login)
+
+        if st.session_state.get('login_error'):
+            st.error(st.session_state.login_error)
     
     # Company information (public)
     st.divider()
@@ -140,8 +162,7 @@ def show_main_app():
     # Add logout button in sidebar
     with st.sidebar:
         st.markdown(f"**👤 Logged in as:** {st.session_state.username}")
-        if st.button("🚪 Logout", use_container_width=True):
-            handle_logout()
+        st.button("🚪 Logout", use_container_width=True, on_click=handle_logout)
         st.divider()
     
     # Define pages only when authenticated
@@ -149,11 +170,20 @@ def show_main_app():
     page_unit = st.Page("pages/page_unit.py", title="Configure a Unit", icon="⚙️")
     page_results = st.Page("pages/page_results.py", title="Select Results", icon="📄")
     page_export = st.Page("pages/page_export.py", title="Export Configuration", icon="📤")
+    page_analysis = st.Page("pages/page_analysis.py", title="Splash Zone Analysis", icon="🌊")
+    page_compare = st.Page("pages/page_compare.py", title="Compare Cases", icon="📊")
+    page_library = st.Page("pages/page_library.py", title="Configuration Library", icon="📚")
+    page_live = st.Page("pages/page_live.py", title="Live Telemetry", icon="📡")
     page_help = st.Page("pages/page_help.py", title="Help documentation", icon="📖")
+    pages = [page_welcome, page_unit, page_results, page_export, page_analysis, page_compare, page_library, page_live, page_help]
+    
+    # Admin-only pages
+    if st.session_state.username == "admin":
+        pages.append(st.Page("pages/page_admin.py", title="Performance", icon="⏱️"))
 
     # Set up navigation
     pg = st.navigation(
-        pages=[page_welcome, page_unit, page_results, page_export, page_help],
+        pages=pages,
         # pages=[page_welcome, page_unit, page_system_parameters, page_results, page_export, page_help],
         expanded= False,
         # position="top"
@@ -211,7 +241,7 @@ def show_main_app():
         if 'quick_acceleration_limit' not in st.session_state:
             st.session_state.quick_acceleration_limit = 0.8
         if 'unit_capabilities' not in st.session_state:
-            st.session_state.unit_capabilities = {"ahc": False, "quick_lifting": False, "constant_tension": False}
+            st.session_state.unit_capabilities = capability_dict(NO_UNIT_MASK)
         
         # Special function parameters - active heave compensation
         if 'heave_start_time' not in st.session_state:
@@ -282,14 +312,24 @@ def show_main_app():
         if 'results_manually_cleared' not in st.session_state:
             st.session_state.results_manually_cleared = True
                 
-    initialize_session_state()
+    with span("initialize_session_state"):
+        initialize_session_state()
     # Run the selected page
-    pg.run()
+    with span(f"page:{pg.title}"):
+        pg.run()
 
 #%% Main application logic
-if not st.session_state.logged_in:
-    # Show login screen if not authenticated
-    show_login_screen()
-else:
-    # Show main application if authenticated
-    show_main_app()
+try:
+    with span("rerun"):
+        if not st.session_state.logged_in:
+            # Show login screen if not authenticated
+            show_login_screen()
+        else:
+            # Show main application if authenticated
+            show_main_app()
+finally:
+    # one batched write of the configuration keys changed in this rerun
+    with span("persist_session"):
+        persist_session(st.session_state)
+    sample_session_memory(st.session_state)
+    write_metrics_file()
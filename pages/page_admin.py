@@ -0,0 +1,54 @@
+import streamlit as st
+import pandas as pd
+from utils.profiling import snapshot, prometheus_text, process_rss_bytes, METRICS_FILE, WINDOW
+
+# page content
+st.markdown("# Performance")
+
+if st.session_state.get('username') != "admin":
+    st.error("❌ This page is only available to administrators.")
+    st.stop()
+
+st.markdown(f"Timing of the instrumented phases of each rerun in this server process (percentiles over the last {WINDOW} samples).")
+st.divider()
+
+spans, memory = snapshot()
+
+col_metric1, col_metric2, col_metric3 = st.columns([1, 1, 1])
+with col_metric1:
+    rerun = spans.get("rerun", {})
+    st.metric("Rerun p99", f"{rerun['p99'] * 1000:.1f} ms" if "p99" in rerun else "-")
+with col_metric2:
+    st.metric("Session state (p90)", f"{memory['p90'] / 1024:.1f} KiB" if "p90" in memory else "-")
+with col_metric3:
+    rss = process_rss_bytes()
+    st.metric("Process memory", f"{rss / 2**20:.0f} MiB" if rss else "-")
+
+st.markdown("### Spans")
+if spans:
+    spans_df = pd.DataFrame(spans).T
+    for column in ("mean", "p50", "p90", "p99", "max"):
+        if column in spans_df:
+            spans_df[column] = spans_df[column] * 1000
+    spans_df = spans_df.rename(columns={c: f"{c} [ms]" for c in ("mean", "p50", "p90", "p99", "max")})
+    spans_df = spans_df.sort_values("p99 [ms]", ascending=False) if "p99 [ms]" in spans_df else spans_df
+    st.dataframe(spans_df, use_container_width=True)
+    st.bar_chart(spans_df["p99 [ms]"] if "p99 [ms]" in spans_df else spans_df)
+else:
+    st.info("No spans recorded yet.")
+
+st.markdown("### Session memory")
+if memory.get("count"):
+    st.dataframe(pd.DataFrame([memory]), use_container_width=True, hide_index=True)
+else:
+    st.info("No session memory samples yet.")
+
+st.markdown("### Prometheus")
+metrics_text = prometheus_text()
+st.markdown(f"The same metrics are written to `{METRICS_FILE}` every few seconds for a local scraper; they are not served publicly.")
+st.download_button("⬇️ Download metrics", metrics_text, file_name="metrics.prom", mime="text/plain")
+with st.expander("Show metrics text"):
+    st.code(metrics_text, language="text")
+
+if st.button("🔄 Refresh", type="secondary"):
+    st.rerun()
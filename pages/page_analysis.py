@@ -0,0 +1,206 @@
+import altair as alt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.config_model import param_value
+from utils.lift_model import lift_system_from_state
+from utils.monte_carlo import DISTRIBUTIONS, OUTPUTS, PARAMETERS, run_study
+from utils.splash_zone import DEFAULT_COEFFICIENTS, DEFAULT_LOWERING_SPEED, allowable_hs, payload_geometry, splash_zone_loads
+
+# page content
+st.markdown("# Splash Zone Analysis")
+st.markdown("Splash zone forces on the configured payload with the DNV-RP-H103 simplified method, over a grid of sea states and crane tip motions.")
+
+st.divider()
+
+FORCE_LABELS = {
+    "F_slam": "Slamming",
+    "F_drag": "Drag",
+    "F_mass": "Mass (inertia)",
+    "F_buoyancy": "Varying buoyancy",
+    "F_hyd": "Hydrodynamic (combined)",
+    "F_static": "Static weight in water",
+    "F_total": "Total (weight in air + hydrodynamic)",
+}
+
+@st.cache_data(max_entries=20)
+def compute_loads(payload, hs, tp, crane_amplitude, lowering_speed, coefficients):
+    """Splash zone loads of one payload over the grid (cached per payload and grid)"""
+    loads = splash_zone_loads(dict(payload), hs, tp, crane_amplitude, lowering_speed, dict(coefficients))
+    return {name: np.array(values) for name, values in loads.items()}
+
+def grid_values(label, key, low, high, step, default):
+    col_min, col_max, col_step = st.columns(3)
+    with col_min:
+        start = st.number_input(f"{label} from", min_value=low, max_value=high, value=default[0], step=step, key=f"{key}_from")
+    with col_max:
+        stop = st.number_input("to", min_value=low, max_value=high, value=default[1], step=step, key=f"{key}_to")
+    with col_step:
+        increment = st.number_input("step", min_value=step, max_value=high, value=default[2], step=step, key=f"{key}_step")
+    if stop < start:
+        start, stop = stop, start
+    return tuple(float(v) for v in np.round(np.arange(start, stop + increment / 2, increment), 3))
+
+def display_heatmap(loads, hs, tp, crane_index):
+    """Slack sling utilization over Hs x Tp for one crane tip amplitude"""
+    utilization = loads["utilization"][:, :, crane_index]
+    valid = loads["valid"][:, :, crane_index]
+    hs_step = hs[1] - hs[0] if len(hs) > 1 else 0.5
+    tp_step = tp[1] - tp[0] if len(tp) > 1 else 1.0
+    heatmap_df = pd.DataFrame({
+        "Tp [s]": np.tile(tp, len(hs)),
+        "Tp end": np.tile(tp, len(hs)) + tp_step,
+        "Hs [m]": np.repeat(hs, len(tp)),
+        "Hs end": np.repeat(hs, len(tp)) + hs_step,
+        "Utilization": utilization.ravel().round(3),
+        "Valid": valid.ravel(),
+    })
+    heatmap = alt.Chart(heatmap_df).mark_rect().encode(
+        x=alt.X("Tp [s]:Q", title="Peak period Tp [s]"),
+        x2="Tp end:Q",
+        y=alt.Y("Hs [m]:Q", title="Significant wave height Hs [m]"),
+        y2="Hs end:Q",
+        color=alt.condition(
+            "datum.Valid",
+            alt.Color("Utilization:Q", scale=alt.Scale(domain=[0, 1.5], scheme="redyellowgreen", reverse=True), title="F_hyd / 0.9 F_static"),
+            alt.value("#3a3a3a"),
+        ),
+        tooltip=["Hs [m]", "Tp [s]", "Utilization", "Valid"],
+    )
+    st.altair_chart(heatmap, use_container_width=True)
+    st.caption("Utilization above 1 means slack slings (F_hyd > 0.9 × static weight in water). Grey cells are sea states steeper than the RP's limit Tz ≥ 8.9·√(Hs/g).")
+
+def display_monte_carlo(hs, tp):
+    """Uncertain parameters, study settings and the statistics of the last study"""
+    system = lift_system_from_state(st.session_state)
+    if system is None:
+        st.info("Select a catalog unit and enter the payload weight on **Configure a Unit** to propagate parameter uncertainty through the lift.")
+        return
+    nominal = {"payload_weight": param_value(st.session_state, "number_2_1"), "sling_weight": param_value(st.session_state, "number_3_1"), "gas_volume": param_value(st.session_state, "number_6_0")}
+    parameters = {}
+    for name, (label, unit) in PARAMETERS.items():
+        col_param1, col_param2, col_param3 = st.columns([2, 1, 1])
+        with col_param1:
+            st.markdown(f"**{label}**: {nominal[name]:g} {unit}")
+        with col_param2:
+            distribution = st.selectbox("Distribution", options=DISTRIBUTIONS, index=1 if name == "payload_weight" else 0,
+                                        key=f"mc_{name}_distribution", label_visibility="collapsed")
+        with col_param3:
+            spread = st.number_input("Spread [%]", min_value=0.0, max_value=100.0, value=5.0, step=1.0, key=f"mc_{name}_spread",
+                                     disabled=distribution == "Fixed", label_visibility="collapsed",
+                                     help="Coefficient of variation (Normal, Lognormal) or half width (Uniform)")
+        parameters[name] = (nominal[name], distribution, spread / 100)
+    st.caption("Spread in % of the nominal value: coefficient of variation for Normal and Lognormal, half width for Uniform.")
+
+    col_mc1, col_mc2, col_mc3 = st.columns(3)
+    with col_mc1:
+        heading = st.slider("Heading [°] (0° = head seas)", min_value=0, max_value=180, value=0, step=15, key="mc_heading")
+    with col_mc2:
+        samples = st.select_slider("Samples", options=[10_000, 100_000, 1_000_000], value=100_000, format_func=lambda n: f"{n:,}", key="mc_samples")
+    with col_mc3:
+        seed = st.number_input("Random seed", min_value=0, value=0, step=1, key="mc_seed")
+
+    inputs = (tuple(system.items()), tuple(parameters.items()), hs, tp, heading, samples, seed)
+    if st.button(f"🎲 Run Monte Carlo in Hs {hs:g} m, Tp {tp:g} s", use_container_width=True, type="primary", key="mc_run"):
+        progress = st.progress(0.0, text="Sampling...")
+        study = run_study(system, param_value(st.session_state, "number_5_0"), parameters, hs, tp, heading, samples, seed=seed,
+                          progress=lambda fraction: progress.progress(fraction, text=f"{fraction * samples:,.0f} / {samples:,} samples"))
+        progress.empty()
+        st.session_state.monte_carlo = {"inputs": inputs, "study": study}
+
+    result = st.session_state.get('monte_carlo')
+    if result is None:
+        return
+    if result["inputs"] != inputs:
+        st.caption("The inputs changed since the last run, run the study again to update the statistics.")
+    study = result["study"]
+    table = pd.DataFrame(study).T
+    table.index = [OUTPUTS[name] for name in table.index]
+    table = table[["nominal", "mean", "std", "P10", "P50", "P90", "min", "max"]].rename(columns={"nominal": "Nominal", "mean": "Mean", "std": "Std", "min": "Min", "max": "Max"})
+    col_result1, col_result2, col_result3 = st.columns(3)
+    col_result1.metric("P90 splash zone total force", f"{study['F_total']['P90']:.0f} kN", f"{study['F_total']['P90'] - study['F_total']['nominal']:+.0f} kN vs nominal", delta_color="inverse")
+    col_result2.metric("P90 wire tension at depth", f"{study['tension_max']['P90']:.0f} kN", f"{study['tension_max']['P90'] - study['tension_max']['nominal']:+.0f} kN vs nominal", delta_color="inverse")
+    col_result3.metric("P90 utilization at depth", f"{study['depth']['P90']:.2f}", f"{study['depth']['P90'] - study['depth']['nominal']:+.2f} vs nominal", delta_color="inverse")
+    st.dataframe(table.round(3), use_container_width=True)
+    st.caption("Mean and standard deviation are exact; P10, P50 and P90 are streaming P² estimates. "
+               "Forces at depth from the linear lift model (wire, unit and payload) in the same sea state.")
+
+payload_weight = param_value(st.session_state, "number_2_1")
+sling_weight = param_value(st.session_state, "number_3_1")
+area = param_value(st.session_state, "number_5_1")
+volume = param_value(st.session_state, "number_6_1")
+
+st.markdown("### 1. Payload")
+col_payload1, col_payload2, col_payload3, col_payload4 = st.columns(4)
+col_payload1.metric("Payload weight in air", f"{payload_weight:g} Te")
+col_payload2.metric("Weight of slings", f"{sling_weight:g} Te")
+col_payload3.metric("Projected area", f"{area:g} m²")
+col_payload4.metric("Volume", f"{volume:g} m³")
+
+if payload_weight <= 0 or area <= 0:
+    st.warning("⚠️ **Payload not configured** - Enter the payload weight, cross-sectional area and volume under **Payload parameters** first.")
+    col_start1, col_start2, col_start3 = st.columns([1, 1, 1])
+    with col_start2:
+        if st.button("Go to Configure a Unit", use_container_width=True, type="primary"):
+            st.switch_page("pages/page_unit.py")
+else:
+    with st.expander("⚙️ Hydrodynamic coefficients", expanded=False):
+        col_coef1, col_coef2, col_coef3, col_coef4 = st.columns(4)
+        with col_coef1:
+            slamming = st.number_input("Slamming C_s", min_value=0.0, max_value=10.0, value=DEFAULT_COEFFICIENTS["slamming"], step=0.1, key="splash_cs")
+        with col_coef2:
+            drag = st.number_input("Drag C_D", min_value=0.0, max_value=10.0, value=DEFAULT_COEFFICIENTS["drag"], step=0.1, key="splash_cd")
+        with col_coef3:
+            added_mass = st.number_input("Added mass C_A", min_value=0.0, max_value=5.0, value=DEFAULT_COEFFICIENTS["added_mass"], step=0.01, key="splash_ca")
+        with col_coef4:
+            lowering_speed = st.number_input("Lowering speed [m/s]", min_value=0.0, max_value=3.0, value=DEFAULT_LOWERING_SPEED, step=0.05, key="splash_lowering")
+
+    st.divider()
+    st.markdown("### 2. Sea states")
+    hs = grid_values("Hs [m]", "splash_hs", 0.25, 10.0, 0.25, (0.5, 4.0, 0.25))
+    tp = grid_values("Tp [s]", "splash_tp", 2.0, 25.0, 0.5, (4.0, 16.0, 0.5))
+    crane_amplitude = tuple(st.multiselect("Crane tip heave amplitude [m]", options=[0.0, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0],
+                                           default=[0.0, 0.5, 1.0], key="splash_crane") or [0.0])
+
+    payload = payload_geometry(payload_weight, sling_weight, area, volume)
+    coefficients = {"slamming": slamming, "drag": drag, "added_mass": added_mass}
+    loads = compute_loads(tuple(payload.items()), hs, tp, crane_amplitude, lowering_speed, tuple(coefficients.items()))
+
+    st.divider()
+    st.markdown("### 3. Slack sling check")
+    crane_index = st.selectbox("Crane tip amplitude", options=range(len(crane_amplitude)), format_func=lambda i: f"{crane_amplitude[i]:g} m", key="splash_crane_view")
+    display_heatmap(loads, np.array(hs), np.array(tp), crane_index)
+
+    allowable = pd.DataFrame(allowable_hs(loads, hs).T, index=[f"{a:g} m" for a in crane_amplitude], columns=[f"{t:g}" for t in tp])
+    allowable.index.name = "Crane tip amplitude"
+    st.markdown("**Allowable Hs [m] per Tp [s]**")
+    st.dataframe(allowable, use_container_width=True)
+
+    st.divider()
+    st.markdown("### 4. Force breakdown")
+    col_state1, col_state2 = st.columns(2)
+    with col_state1:
+        hs_index = st.selectbox("Hs [m]", options=range(len(hs)), index=min(len(hs) - 1, 3), format_func=lambda i: f"{hs[i]:g}", key="splash_hs_view")
+    with col_state2:
+        tp_index = st.selectbox("Tp [s]", options=range(len(tp)), index=min(len(tp) - 1, 8), format_func=lambda i: f"{tp[i]:g}", key="splash_tp_view")
+    cell = (hs_index, tp_index, crane_index)
+    breakdown = pd.DataFrame({
+        "Force [kN]": [float(np.broadcast_to(loads[name], loads["F_hyd"].shape)[cell]) for name in FORCE_LABELS],
+    }, index=list(FORCE_LABELS.values()))
+    col_force1, col_force2 = st.columns([2, 1])
+    with col_force1:
+        st.dataframe(breakdown.round(1), use_container_width=True)
+    with col_force2:
+        st.metric("Relative velocity v_r", f"{loads['v_r'][cell]:.2f} m/s")
+        if loads["slack"][cell]:
+            st.error("❌ Slack slings in this sea state")
+        else:
+            st.success("✅ No slack slings in this sea state")
+
+    st.divider()
+    st.markdown("### 5. Uncertainty (Monte Carlo)")
+    st.markdown("Draw uncertain parameters from distributions and propagate them through the splash zone and lift models in the sea state selected above, for P90 loads instead of nominal ones.")
+    display_monte_carlo(hs[hs_index], tp[tp_index])
+
+st.divider()
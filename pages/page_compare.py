@@ -0,0 +1,128 @@
+import streamlit as st
+import pandas as pd
+from utils.results_store import ResultsStore
+from utils.statistics import load_summary, summary_channels, SCALAR_STATISTICS
+
+# page content
+st.markdown("# Case Comparison")
+st.markdown("Compare stored configurations side by side. Statistics come from the precomputed summary tables, no time series are loaded.")
+
+st.divider()
+
+SECTION_LABELS = {
+    "Unit": "Unit",
+    "Special_Functions": "Special Functions",
+    "Function_Parameters": "Function Parameters",
+    "Safety_Parameters": "Safety Parameters",
+    "Unit_Parameters": "Unit Parameters",
+    "Payload_Parameters": "Payload Parameters",
+}
+
+@st.cache_data(ttl=60)
+def load_cases():
+    """Load the cases table of the results store"""
+    table = ResultsStore().cases()
+    if table.num_rows == 0:
+        return pd.DataFrame()
+    return table.to_pandas().sort_values("ingested_at", ascending=False).reset_index(drop=True)
+
+@st.cache_data(ttl=60)
+def load_case_summary(channels, hashes, statistics):
+    """Load precomputed statistics of the selected cases"""
+    return load_summary(list(channels), hashes=list(hashes), statistics=list(statistics))
+
+def get_parameter_label(column):
+    """Readable label of a cases table column, e.g. 'Payload_Parameters.parameter_2'"""
+    section, _, key = column.partition(".")
+    if key.startswith("parameter_"):
+        index = int(key.split("_")[1])
+        names = st.session_state.get('unit_parameter_names' if section == "Unit_Parameters" else 'payload_parameter_names', [])
+        if index - 1 < len(names):
+            key = names[index - 1]
+    else:
+        key = key.replace("_", " ").capitalize()
+    return f"{SECTION_LABELS.get(section, section)} - {key}"
+
+def format_case(row):
+    return f"{row['Unit.unit_id']} | {row['config_hash']}"
+
+def display_configuration_comparison(selected):
+    """Display unit, special functions and parameters of the selected cases side by side"""
+    columns = [c for c in selected.columns if c.partition(".")[0] in SECTION_LABELS]
+    comparison = selected.set_index("config_hash")[columns].T
+    comparison.index = [get_parameter_label(c) for c in columns]
+
+    only_differences = st.toggle("Show only differing rows", value=len(selected) > 1)
+    if only_differences:
+        differs = comparison.astype(str).nunique(axis=1) > 1
+        comparison = comparison[differs]
+
+    comparison = comparison.dropna(how="all")
+    if comparison.empty:
+        st.info("The selected configurations are identical.")
+    else:
+        st.dataframe(comparison.astype(str), use_container_width=True, height=min(38 * (len(comparison) + 1), 600))
+
+def display_statistics_comparison(selected):
+    """Display the key statistics of the result channels of the selected cases"""
+    channels = summary_channels()
+    if not channels:
+        st.info("No post-processed results yet. Store simulation results on the **Export Configuration** page.")
+        return
+
+    col_stat1, col_stat2 = st.columns([2, 1])
+    with col_stat1:
+        selected_channels = st.multiselect("Result channels", options=channels, default=channels[:3])
+    with col_stat2:
+        selected_statistics = st.multiselect("Statistics", options=SCALAR_STATISTICS, default=["max", "min", "std", "peak_p01"])
+
+    if not selected_channels or not selected_statistics:
+        return
+
+    summary = load_case_summary(tuple(selected_channels), tuple(selected["config_hash"]), tuple(selected_statistics))
+    summary = summary.reindex(selected["config_hash"])
+    summary.index = [format_case(row) for _, row in selected.iterrows()]
+    st.dataframe(summary, use_container_width=True)
+
+    chart_column = st.selectbox("Chart", options=list(summary.columns))
+    if chart_column:
+        st.bar_chart(summary[chart_column])
+
+cases = load_cases()
+
+if cases.empty:
+    st.warning("⚠️ **No Stored Results** - Export a configuration and store its simulation results first.")
+    col_start1, col_start2, col_start3 = st.columns([1, 1, 1])
+    with col_start2:
+        if st.button("Go to Export Configuration", use_container_width=True, type="primary"):
+            st.switch_page("pages/page_export.py")
+else:
+    st.markdown("### 1. Select cases")
+    col_filter1, col_filter2 = st.columns([1, 2])
+    with col_filter1:
+        categories = st.multiselect("Unit category", options=sorted(cases["category"].unique()))
+    filtered = cases[cases["category"].isin(categories)] if categories else cases
+    with col_filter2:
+        units = st.multiselect("Unit", options=sorted(filtered["Unit.unit_id"].unique()))
+    filtered = filtered[filtered["Unit.unit_id"].isin(units)] if units else filtered
+
+    labels = {format_case(row): row["config_hash"] for _, row in filtered.iterrows()}
+    select_all = st.checkbox(f"Compare all {len(labels)} filtered cases", value=False)
+    if select_all:
+        selected = filtered
+    else:
+        chosen = st.multiselect(f"Cases ({len(labels)} available)", options=list(labels), default=list(labels)[:5])
+        selected = filtered[filtered["config_hash"].isin([labels[label] for label in chosen])]
+
+    if selected.empty:
+        st.info("Select at least one case to compare.")
+    else:
+        st.divider()
+        st.markdown("### 2. Configuration")
+        display_configuration_comparison(selected)
+
+        st.divider()
+        st.markdown("### 3. Result statistics")
+        display_statistics_comparison(selected)
+
+st.divider()
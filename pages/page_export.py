@@ -1,7 +1,26 @@
 import streamlit as st
-import configparser
+import altair as alt
 import io
+import os
+import numpy as np
 import pandas as pd
+from datetime import datetime
+from utils.config_model import build_config, config_hash, write_config
+from utils.channels import selected_channels
+from utils.results_store import ResultsStore, hash_filter
+from utils.statistics import compute_statistics, SCALAR_STATISTICS
+from utils.profiling import timed
+from utils.config_library import ConfigLibrary
+from utils.auth import logout
+from utils.jobs import PRIORITIES, ACTIVE, QUEUED, RUNNING, DONE, FAILED
+from utils.job_service import get_job_queue
+from utils.batch_export import sweep_values, case_count, sweep_params, MAX_CASES
+from utils.config_binary import pack, record_from_config, record_from_state
+from utils.capabilities import capability_mask, capability_dict, unsupported_functions
+from utils.operability import DEFAULT_HS, DEFAULT_TP, DEFAULT_HEADINGS, allowable_table, config_system, grid_key, grid_path, load_grid
+from utils.catalog import unit_rating
+from utils.lift_simulation import METRICS, SEA_STATE
+from utils.sensitivity import DIRECTORY as SENSITIVITY_DIR, FACTORS, METHODS, available_factors, load_study, sensitivity_table, study_key, study_path
 
 # page content
 st.markdown("# Configuration Summary & Export")
@@ -34,6 +53,10 @@ def validate_parameters():
     
     return zero_unit_params, zero_payload_params
 
+def validate_special_functions():
+    """Special functions enabled in the configuration that the selected unit does not have"""
+    return unsupported_functions(build_config(st.session_state))
+
 def get_unit_parameter_name(index):
     """Get the display name for unit parameter"""
     default_names = [
@@ -119,7 +142,7 @@ def display_payload_parameters():
 def display_special_functions():
     """Display special functions configuration"""
     with st.expander("**Special Functions**", expanded=False):
-        unit_capabilities = st.session_state['unit_capabilities']
+        unit_capabilities = capability_dict(capability_mask(st.session_state.selected_unit, st.session_state.selected_unit_type))
         
         if any(unit_capabilities.values()):
             special_function_params = []
@@ -231,95 +254,17 @@ def display_selected_results():
         else:
             st.info("🔧 **Using OrcaFlex Default Results**\n\nNo custom results configured")
 
+@timed("generate_config_file")
 def generate_config_file():
     """Generate and provide download for configuration file"""
-    config = configparser.ConfigParser()
     from datetime import datetime
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     version = st.session_state['version']
+    config = build_config(st.session_state)
     
-    # Unit configuration
-    config["Unit"] = {
-        "category": st.session_state.selected_unit_type,
-        "unit_type": st.session_state.selected_unit[0] if isinstance(st.session_state.selected_unit, tuple) else str(st.session_state.selected_unit),
-        "unit_id": st.session_state.selected_unit[1] if isinstance(st.session_state.selected_unit, tuple) else str(st.session_state.selected_unit),
-    }
-    
-    # Special functions configuration
-    config["Special_Functions"] = {
-        "quick_lifting": str(st.session_state.check_box_quicklifting),
-        "constant_tension": str(st.session_state.check_box_constant_tension),
-        "active_heave_compensation": str(st.session_state.check_box_active_heave_compensation),
-        "rod_lock": str(st.session_state.check_box_rod_lock)
-    }
-    
-    # Special function parameters
-    config["Function_Parameters"] = {}
-    
-    # Rod Functions parameters
-    config["Function_Parameters"]["rod_orientation"] = str(st.session_state.rod_orientation)
-    
-    if st.session_state.check_box_rod_lock:
-        config["Function_Parameters"]["rod_lock_depth"] = str(st.session_state.rod_lock_depth)
-        config["Function_Parameters"]["rod_lock_operation"] = str(st.session_state.rod_lock_operation)
-        config["Function_Parameters"]["rod_lock_mode"] = str(st.session_state.rod_lock_mode)
-        config["Function_Parameters"]["lock_hold_time"] = str(st.session_state.lock_hold_time)
-        config["Function_Parameters"]["lock_speed"] = str(st.session_state.lock_speed)
-    
-    # Quick lifting parameters
-    if st.session_state.check_box_quicklifting:
-        config["Function_Parameters"]["quick_start_time"] = str(st.session_state.quick_start_time)
-        config["Function_Parameters"]["quick_acceleration_limit"] = str(st.session_state.quick_acceleration_limit)
-    
-    # Constant tension parameters
-    if st.session_state.check_box_constant_tension:
-        config["Function_Parameters"]["tension_start_time"] = str(st.session_state.tension_start_time)
-        config["Function_Parameters"]["tension_tolerance"] = str(st.session_state.tension_tolerance)
-    
-    # Active heave compensation parameters
-    if st.session_state.check_box_active_heave_compensation:
-        config["Function_Parameters"]["heave_start_time"] = str(st.session_state.heave_start_time)
-        config["Function_Parameters"]["max_stroke_speed"] = str(st.session_state.max_stroke_speed)
-        config["Function_Parameters"]["motion_reference"] = str(st.session_state.motion_reference)
-    
-    # Safety parameters
-    config["Safety_Parameters"] = {
-        "max_force_limit": str(st.session_state.max_force_limit),
-    }
-    
-    # Unit parameters
-    config["Unit_Parameters"] = {}
-    for i in range(1, 11):
-        param_value = st.session_state[f'saved_number_{i}_0']
-        config["Unit_Parameters"][f"parameter_{i}"] = str(param_value)
-    
-    # Payload parameters  
-    config["Payload_Parameters"] = {}
-    for i in range(1, 11):
-        param_value = st.session_state[f'saved_number_{i}_1']
-        config["Payload_Parameters"][f"parameter_{i}"] = str(param_value)
-        
-    # Results configuration
-    config["Results"] = {
-        "customized": str(st.session_state.customized_results),
-        "body_results": ", ".join(st.session_state.selected_body_results) if st.session_state.selected_body_results else "None",
-        "rod_results": ", ".join(st.session_state.selected_rod_results) if st.session_state.selected_rod_results else "None",
-        "payload_results": ", ".join(st.session_state.selected_payload_results) if st.session_state.selected_payload_results else "None",
-    }
-    
-    # Save to in-memory file
+    # Save to in-memory file, with the header comments
     ini_file = io.StringIO()
-    
-    # Write custom header comments first
-    ini_file.write("# External function Configuration File\n")
-    ini_file.write("# Generated by Safelink OrcaFlex Configuration Web Tool\n")
-    ini_file.write(f"# Version: {version}\n")
-    ini_file.write(f"# Datetime: {current_time}\n")
-    ini_file.write("# Contact Safelink post@safelink.no if any questions.\n")
-    ini_file.write("#\n\n")
-    
-    # Write the configuration
-    config.write(ini_file)
+    write_config(config, ini_file, version, current_time)
     ini_bytes = ini_file.getvalue().encode("utf-8")
     
     # Generate filename with unit info
@@ -328,14 +273,25 @@ def generate_config_file():
     
     st.success("**Configuration Complete** - Ready to download!")
     
-    # Download button
-    st.download_button(
-        label="💾 Download Configuration File",
-        data=ini_bytes,
-        file_name=filename,
-        mime="text/plain",
-        use_container_width=True
-    )
+    # Download buttons: INI for people, binary for the external function loader and batch tooling
+    col_download1, col_download2 = st.columns([2, 1])
+    with col_download1:
+        st.download_button(
+            label="💾 Download Configuration File",
+            data=ini_bytes,
+            file_name=filename,
+            mime="text/plain",
+            use_container_width=True
+        )
+    with col_download2:
+        st.download_button(
+            label="Download Binary (.slcf)",
+            data=pack(record_from_state(st.session_state)),
+            file_name=filename.replace(".ini", ".slcf"),
+            mime="application/octet-stream",
+            use_container_width=True,
+            help="Typed binary format with full float precision, for machine consumers. See utils/config_binary.py."
+        )
 
     st.markdown("#### **Next Steps:**")
     st.markdown("""
@@ -344,9 +300,264 @@ def generate_config_file():
     3. **Run** your simulation with the configured parameters. 
     """)
 
-def display_validation_errors(zero_unit_params, zero_payload_params):
+def display_results_ingest():
+    """Store simulation results of the current configuration in the local results store"""
+    with st.expander("📥 **Store Simulation Results**", expanded=False):
+        config = build_config(st.session_state)
+        st.markdown(f"Upload the time series exported from OrcaFlex for this configuration (hash `{config_hash(config)}`). "
+                    "The file needs a `time` column and one column per result channel.")
+        channels = selected_channels(st.session_state.selected_results) if st.session_state.customized_results else []
+        if channels:
+            st.caption(f"Channels stored: {', '.join(channels)}")
+        else:
+            st.caption("Channels stored: all columns in the file (OrcaFlex default results)")
+        
+        uploaded = st.file_uploader("Results file (CSV)", type=["csv"], key="results_upload")
+        if uploaded is not None and st.button("Store Results", use_container_width=True):
+            try:
+                data = pd.read_csv(uploaded)
+                store = ResultsStore()
+                digest = store.ingest(config, data, channels=channels or None)
+                st.success(f"✅ Results stored for configuration `{digest}`")
+            except ValueError as e:
+                st.error(f"❌ Could not store results: {e}")
+            else:
+                # Post-process the stored channels right away, the statistics are cached per (case, channel)
+                summary = {}
+                for channel in store.stored_channels(digest):
+                    statistics = compute_statistics(channel, case_filter=hash_filter(digest), store=store).get(digest)
+                    if statistics:
+                        summary[channel] = {key: statistics[key] for key in SCALAR_STATISTICS}
+                if summary:
+                    st.dataframe(pd.DataFrame(summary).T, use_container_width=True)
+                    # the surrogate models of the unit page learn from the new case in the background
+                    queue, _ = get_job_queue()
+                    queue.submit(st.session_state.username, "train_surrogates", {"store": store.root},
+                                 title="Update result predictions", priority=PRIORITIES["Low"])
+
+@st.cache_resource
+def get_library():
+    """Configuration library shared by all sessions"""
+    return ConfigLibrary()
+
+def display_save_to_library():
+    """Save the current configuration in the user's configuration library"""
+    with st.expander("📚 **Save to Library**", expanded=False):
+        unit_id = st.session_state.selected_unit[1] if isinstance(st.session_state.selected_unit, tuple) else str(st.session_state.selected_unit)
+        name = st.text_input("Name", value=f"{unit_id} {st.session_state.saved_number_2_1:g} Te", key="library_name")
+        notes = st.text_area("Notes", placeholder="Vessel, project, assumptions...", key="library_notes")
+        team = st.session_state.get('team')
+        share = bool(team) and st.checkbox(f"Share with team **{team}**", value=False)
+        if st.button("Save to Library", use_container_width=True, disabled=not name.strip()):
+            config_id = get_library().save(st.session_state.username, name.strip(), build_config(st.session_state),
+                                           notes=notes, team=team if share else None)
+            # the library page refetches its listing
+            st.session_state.library_signature = None
+            st.success(f"✅ Saved as **{name.strip()}** (#{config_id}). Find it on the **Configuration Library** page.")
+
+def read_artifact(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+def sweep_options():
+    """(section, key) of every parameter that can be swept, with its display name"""
+    options = {("Unit_Parameters", f"parameter_{i}"): f"Unit: {get_unit_parameter_name(i)}" for i in range(1, 11)}
+    options.update({("Payload_Parameters", f"parameter_{i}"): f"Payload: {get_payload_parameter_name(i)}" for i in range(1, 11)})
+    return options
+
+def display_batch_export():
+    """Queue an export of a parameter sweep around the current configuration"""
+    with st.expander("🗂️ **Batch Export (Parameter Sweep)**", expanded=False):
+        st.markdown("Export one configuration file per combination of the swept parameters, all other settings as configured. "
+                    "The export runs in the background: you can leave this page and download the zip file here later.")
+        options = sweep_options()
+        current = {("Unit_Parameters", f"parameter_{i}"): st.session_state[f'saved_number_{i}_0'] for i in range(1, 11)}
+        current.update({("Payload_Parameters", f"parameter_{i}"): st.session_state[f'saved_number_{i}_1'] for i in range(1, 11)})
+
+        axis_count = st.number_input("Number of swept parameters", min_value=1, max_value=3, value=1, step=1, key="sweep_axis_count")
+        axes = []
+        for n in range(int(axis_count)):
+            col_sweep1, col_sweep2, col_sweep3, col_sweep4 = st.columns([3, 1, 1, 1])
+            with col_sweep1:
+                target = st.selectbox(f"Parameter {n + 1}", options=list(options), format_func=options.get,
+                                      index=min(11 + n, len(options) - 1), key=f"sweep_parameter_{n}")
+            with col_sweep2:
+                start = st.number_input("From", value=float(current[target]), key=f"sweep_from_{n}")
+            with col_sweep3:
+                stop = st.number_input("To", value=float(current[target]) * 2, key=f"sweep_to_{n}")
+            with col_sweep4:
+                steps = st.number_input("Steps", min_value=1, max_value=MAX_CASES, value=10, step=1, key=f"sweep_steps_{n}")
+            axes.append({"section": target[0], "key": target[1], "values": sweep_values(start, stop, steps)})
+
+        count = case_count(axes)
+        col_submit1, col_submit2, col_submit3 = st.columns([1, 1, 1])
+        with col_submit1:
+            priority = st.select_slider("Priority", options=list(PRIORITIES), value="Normal", key="sweep_priority")
+        with col_submit2:
+            export_format = st.radio("File format", options=["delta", "full", "binary"], key="sweep_format",
+                                     format_func={"delta": "Base file + deltas (compact)", "full": "One INI file per case",
+                                                  "binary": "Binary file (machine readable)"}.get,
+                                     help="The compact format stores only the changed parameters of each case. "
+                                          "Rebuild the full files with `python -m utils.config_delta expand <zip> <folder>`.")
+        with col_submit3:
+            st.markdown(f"**{count:,} cases**")
+            submitted = st.button("Start Batch Export", use_container_width=True, type="primary", disabled=not 0 < count <= MAX_CASES)
+        if count > MAX_CASES:
+            st.warning(f"⚠️ At most {MAX_CASES:,} cases per export")
+        if submitted:
+            queue, _ = get_job_queue()
+            unit_id = st.session_state.selected_unit[1] if isinstance(st.session_state.selected_unit, tuple) else str(st.session_state.selected_unit)
+            mask = capability_mask(st.session_state.selected_unit, st.session_state.selected_unit_type)
+            params = sweep_params(build_config(st.session_state), axes, st.session_state['version'], mask, export_format)
+            job_id = queue.submit(st.session_state.username, "batch_export", params,
+                                  title=f"Batch export {unit_id}, {count:,} cases", priority=PRIORITIES[priority])
+            st.success(f"✅ Export queued as job #{job_id}")
+
+def display_jobs():
+    """The user's background jobs, refreshed every 2 s while any is queued or running"""
+    queue, _ = get_job_queue()
+    jobs = queue.list(st.session_state.username)
+    active = any(job["status"] in ACTIVE for job in jobs)
+    if not active and st.session_state.get('jobs_polling'):
+        # last job finished: a full rerun turns polling off
+        st.session_state.jobs_polling = False
+        st.rerun()
+    if not jobs:
+        return
+
+    st.markdown("#### **Background Jobs**")
+    status_icons = {QUEUED: "⏳", RUNNING: "⚙️", DONE: "✅", FAILED: "❌"}
+    for job in jobs:
+        col_job1, col_job2, col_job3 = st.columns([4, 1, 1])
+        with col_job1:
+            created = datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M")
+            st.markdown(f"{status_icons.get(job['status'], '🚫')} **#{job['id']} {job['title']}** ({created}) - {job['message'] or job['status']}")
+            if job["status"] == RUNNING:
+                st.progress(job["progress"])
+            if job["status"] == FAILED and job["error"]:
+                st.caption(job["error"])
+        with col_job2:
+            if job["status"] == DONE and job["artifact"] and os.path.exists(job["artifact"]):
+                st.download_button("💾 Download", data=lambda path=job["artifact"]: read_artifact(path),
+                                   file_name=f"safelink_job_{job['id']}{os.path.splitext(job['artifact'])[1]}",
+                                   on_click="ignore", use_container_width=True, key=f"job_download_{job['id']}")
+        with col_job3:
+            if job["status"] in ACTIVE:
+                st.button("Cancel", use_container_width=True, key=f"job_cancel_{job['id']}",
+                          on_click=queue.cancel, args=(job["id"], st.session_state.username))
+            else:
+                st.button("🗑️ Remove", use_container_width=True, key=f"job_remove_{job['id']}",
+                          on_click=queue.delete, args=(job["id"], st.session_state.username))
+
+def display_operability():
+    """Allowable sea states of the configuration, when its grid was computed on the results page"""
+    with st.expander("🌊 **Operability**", expanded=False):
+        system = config_system(build_config(st.session_state))
+        grid = load_grid(grid_path(grid_key(system, DEFAULT_HS, DEFAULT_TP, DEFAULT_HEADINGS)))
+        if grid is None or not grid["done"].all():
+            st.info("Compute the operability of this configuration under **Select Results** to include its allowable sea states.")
+            st.page_link("pages/page_results.py", label="→ Go to **Select Results**")
+            return
+        table = allowable_table(grid)
+        st.markdown("**Allowable Hs [m] per Tp (rows) and heading (columns)**")
+        st.dataframe(table, use_container_width=True)
+        unit_id = st.session_state.selected_unit[1] if isinstance(st.session_state.selected_unit, tuple) else str(st.session_state.selected_unit)
+        st.download_button("💾 Download Operability Table (CSV)", data=table.to_csv(float_format="%.2f"),
+                           file_name=f"safelink_operability_{unit_id}.csv", mime="text/csv", use_container_width=True)
+
+def display_sensitivity_chart(study, metric):
+    """Bar chart of the main index per factor, with its confidence interval"""
+    table = sensitivity_table(study, metric)
+    value, conf = ("ST", "ST_conf") if study["method"] == "sobol" else ("mu_star", "mu_star_conf")
+    chart_df = pd.DataFrame({"Factor": table.index, "Index": table[value].values,
+                             "Low": (table[value] - table[conf]).values, "High": (table[value] + table[conf]).values})
+    title = "Total Sobol index S_T" if study["method"] == "sobol" else f"Morris μ*, change of {METRICS[metric].lower()}"
+    bars = alt.Chart(chart_df).mark_bar(color="#FFCD00").encode(
+        x=alt.X("Index:Q", title=title),
+        y=alt.Y("Factor:N", sort=list(table.index), title=None),
+        tooltip=["Factor", alt.Tooltip("Index:Q", format=".3f")],
+    )
+    error = alt.Chart(chart_df).mark_rule(color="#888888").encode(x="Low:Q", x2="High:Q", y=alt.Y("Factor:N", sort=list(table.index)))
+    st.altair_chart(bars + error, use_container_width=True)
+    return table
+
+def display_sensitivity():
+    """Sobol or Morris sensitivity of the simulated lift metrics to the configuration parameters"""
+    with st.expander("🎯 **Sensitivity Analysis**", expanded=False):
+        st.markdown("Find the parameters that drive the lift response before setting up a parameter sweep. Every sample is a "
+                    f"closed-loop simulation of the configuration with the external function (Hs {SEA_STATE[0]:g} m, Tp {SEA_STATE[1]:g} s), "
+                    "each parameter varied around its configured value.")
+        record = record_from_config(build_config(st.session_state))
+        _, stroke = unit_rating(record["unit_id"])
+        if not np.isfinite(stroke):
+            st.info("Sensitivity analysis needs the stroke of a catalog unit; the selected unit is not in the catalog.")
+            return
+        factors = available_factors(record)
+
+        col_sens1, col_sens2, col_sens3 = st.columns([1, 1, 1])
+        with col_sens1:
+            method = st.radio("Method", options=list(METHODS), format_func=METHODS.get, key="sensitivity_method",
+                              help="Morris screening ranks the parameters with few simulations; "
+                                   "Sobol indices quantify the share of the output variance of each parameter.")
+        with col_sens2:
+            if method == "sobol":
+                samples = st.select_slider("Base samples N", options=[64, 128, 256, 512, 1024], value=256, key="sensitivity_sobol_samples")
+            else:
+                samples = st.select_slider("Trajectories r", options=[10, 20, 50, 100], value=20, key="sensitivity_morris_samples")
+        with col_sens3:
+            spread = st.slider("Variation [± %]", min_value=5, max_value=50, value=20, step=5, key="sensitivity_spread")
+        names = st.multiselect("Parameters", options=factors, default=factors, format_func=lambda name: FACTORS[name][0],
+                               key="sensitivity_factors", help="Parameters with a value of zero and those of disabled special functions are fixed.")
+        runs = samples * (len(names) + 2) if method == "sobol" else samples * (len(names) + 1)
+
+        path = study_path(record["unit_id"], study_key(record, stroke, names, method, samples, spread / 100, SEA_STATE, 0))
+        study = load_study(path)
+        if study is None:
+            # the study runs as a background job; its progress is listed under Background Jobs
+            queue, _ = get_job_queue()
+            job = queue.get(st.session_state.sensitivity_jobs[path]) if path in st.session_state.get('sensitivity_jobs', {}) else None
+            col_run1, col_run2 = st.columns([2, 1])
+            with col_run1:
+                if job is not None and job["status"] in ACTIVE:
+                    st.caption(f"⚙️ Running as job #{job['id']} ({runs:,} simulations) - the results appear here when it is done.")
+                elif job is not None and job["status"] == FAILED:
+                    st.caption(f"❌ Job #{job['id']} failed: {job['error']}")
+                else:
+                    st.caption(f"{runs:,} simulations")
+            with col_run2:
+                start = st.button("Run Sensitivity Analysis", use_container_width=True, type="primary", key="sensitivity_run",
+                                  disabled=not names or (job is not None and job["status"] in ACTIVE))
+            if start:
+                params = {"record": record, "stroke": stroke, "names": names, "method": method, "samples": samples,
+                          "spread": spread / 100, "sea_state": list(SEA_STATE), "seed": 0,
+                          "directory": os.path.abspath(SENSITIVITY_DIR), "runs": runs}
+                job_id = queue.submit(st.session_state.username, "sensitivity_study", params,
+                                      title=f"Sensitivity {record['unit_id']}, {METHODS[method]}, {runs:,} simulations")
+                st.session_state.setdefault('sensitivity_jobs', {})[path] = job_id
+                st.rerun()
+            return
+
+        metric = st.selectbox("Output", options=study["metrics"], format_func=METRICS.get, key="sensitivity_metric")
+        table = display_sensitivity_chart(study, metric)
+        if study["method"] == "sobol":
+            st.caption("S_T: share of the output variance involving the parameter, including its interactions; S1: the parameter alone. "
+                       "Parameters with S_T near zero can stay fixed in a sweep. Bars show the 95 % bootstrap interval.")
+        else:
+            st.caption("μ*: mean absolute change of the output over the full variation range of the parameter. "
+                       "A σ comparable to μ* points to interactions or a non-linear effect. Bars show the 95 % bootstrap interval.")
+        st.dataframe(table.round(4), use_container_width=True)
+        unit_id = st.session_state.selected_unit[1] if isinstance(st.session_state.selected_unit, tuple) else str(st.session_state.selected_unit)
+        st.download_button("💾 Download Sensitivity Indices (CSV)", data=table.to_csv(float_format="%.4f"),
+                           file_name=f"safelink_sensitivity_{unit_id}_{study['method']}_{metric}.csv", mime="text/csv", use_container_width=True)
+
+def display_validation_errors(zero_unit_params, zero_payload_params, unsupported=()):
     """Display parameter validation error messages"""
-    st.error("❌ **Configuration Incomplete** - Some parameters are set to zero.")
+    if unsupported:
+        names = ", ".join(function.replace("_", " ").title() for function in unsupported)
+        st.error(f"❌ **Unsupported Special Functions** - The selected unit does not support: {names}. "
+                 "Disable them on page **Configure a unit -> Special Functionalities**.")
+    if zero_unit_params or zero_payload_params:
+        st.error("❌ **Configuration Incomplete** - Some parameters are set to zero.")
     
     if zero_unit_params:
         st.error(f"**Unit Parameters with zero values:** {', '.join(zero_unit_params)}")
@@ -354,7 +565,8 @@ def display_validation_errors(zero_unit_params, zero_payload_params):
     if zero_payload_params:
         st.error(f"**Payload Parameters with zero values:** {', '.join(zero_payload_params)}")
     
-    st.info("Please go to page: **Configure a unit -> Parameter Inputs** and enter realistic values for all parameters.")
+    if zero_unit_params or zero_payload_params:
+        st.info("Please go to page: **Configure a unit -> Parameter Inputs** and enter realistic values for all parameters.")
 
 def display_navigation_buttons():
     """Display navigation and session management buttons"""
@@ -402,6 +614,8 @@ def display_navigation_buttons():
         
     with col_nav5:
         if st.button("🚪 **Logout & Close**", use_container_width=True, type="secondary"):
+            # Revoke the token first, or the browser logs straight back in
+            logout(st.session_state, st.query_params)
             # Clear session state
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
@@ -438,7 +652,8 @@ if not unit_selected:
 else:
     # Step 2: Unit selected - validate parameters
     zero_unit_params, zero_payload_params = validate_parameters()
-    all_params_valid = not zero_unit_params and not zero_payload_params
+    unsupported = validate_special_functions()
+    all_params_valid = not zero_unit_params and not zero_payload_params and not unsupported
     
     # Step 3: Display configuration overview (always show if unit selected)
     display_unit_overview()
@@ -475,16 +690,27 @@ else:
                         use_container_width=True,
                         help="Download INI file"):
                 generate_config_file()
+        
+        display_results_ingest()
+        display_save_to_library()
+        display_batch_export()
+        display_sensitivity()
+        display_operability()
     
     else:
         # Parameters invalid - show error messages
-        display_validation_errors(zero_unit_params, zero_payload_params)
+        display_validation_errors(zero_unit_params, zero_payload_params, unsupported)
         
         col_back1, col_back2, col_back3 = st.columns([1, 1, 1])
         with col_back2:
             if st.button("← **Go Back to Unit configuration**", use_container_width=True, type="secondary"):
                 st.switch_page("pages/page_unit.py")
 
+# Background jobs, polled while any is queued or running
+jobs_queue, _ = get_job_queue()
+st.session_state.jobs_polling = jobs_queue.has_active(st.session_state.username)
+st.fragment(display_jobs, run_every="2s" if st.session_state.jobs_polling else None)()
+
 # Step 5: Navigation (always show)
 display_navigation_buttons()
 
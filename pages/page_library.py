@@ -0,0 +1,130 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from utils.config_library import ConfigLibrary, FUNCTION_BITS, PAGE_SIZE
+from utils.config_model import apply_config
+
+# page content
+st.markdown("# Configuration Library")
+st.markdown("Find configurations saved from the **Export Configuration** page and load them back into the configurator.")
+
+st.divider()
+
+FUNCTION_LABELS = {
+    "quick_lifting": "⚡ Quick Lifting",
+    "constant_tension": "🎯 Constant Tension",
+    "active_heave_compensation": "🌊 AHC",
+    "rod_lock": "🔒 Rod Lock",
+}
+
+@st.cache_resource
+def get_library():
+    """Configuration library shared by all sessions"""
+    return ConfigLibrary()
+
+def format_functions(mask):
+    return ", ".join(label for key, label in FUNCTION_LABELS.items() if mask & FUNCTION_BITS[key]) or "-"
+
+def load_into_configurator(config_id):
+    """Copy a saved configuration into the session state (button callback)"""
+    config = get_library().load(config_id, st.session_state.username, st.session_state.get('team'))
+    if config is None:
+        st.session_state.library_message = "❌ Configuration not found"
+        return
+    apply_config(config, st.session_state)
+    st.session_state.library_message = "✅ Configuration loaded. Continue on **Configure a Unit**."
+
+library = get_library()
+username = st.session_state.username
+team = st.session_state.get('team')
+
+# Filters
+col_filter1, col_filter2, col_filter3, col_filter4 = st.columns([3, 1, 2, 2])
+with col_filter1:
+    text = st.text_input("🔍 Search name, notes or unit ID", placeholder="e.g. jacket lift")
+with col_filter2:
+    category = st.selectbox("Category", options=["All", "IAHC", "PHC", "Shock absorber"])
+with col_filter3:
+    functions = st.multiselect("Special functions", options=list(FUNCTION_LABELS), format_func=FUNCTION_LABELS.get)
+with col_filter4:
+    col_payload1, col_payload2 = st.columns([1, 1])
+    with col_payload1:
+        payload_min = st.number_input("Payload from [Te]", min_value=0.0, value=0.0, step=10.0)
+    with col_payload2:
+        payload_max = st.number_input("to [Te]", min_value=0.0, value=0.0, step=10.0, help="0 = no upper limit")
+include_team = bool(team) and st.toggle(f"Include configurations shared with team **{team}**", value=True)
+
+filters = dict(
+    text=text,
+    category=None if category == "All" else category,
+    functions=sum(FUNCTION_BITS[key] for key in functions),
+    payload_range=(payload_min, payload_max) if payload_max > 0 else ((payload_min, float("inf")) if payload_min > 0 else None),
+    team=team if include_team else None,
+)
+
+# Pages are fetched lazily with a keyset cursor; a filter or user change starts over
+signature = repr((username, team, sorted(filters.items())))
+if st.session_state.get('library_signature') != signature:
+    rows, cursor = library.search(username, **filters)
+    st.session_state.library_signature = signature
+    st.session_state.library_rows = rows
+    st.session_state.library_cursor = cursor
+
+if st.session_state.get('library_message'):
+    st.info(st.session_state.pop('library_message'))
+
+rows = st.session_state.library_rows
+if not rows:
+    st.warning("⚠️ **No Saved Configurations** - Save one from the **Export Configuration** page.")
+else:
+    total = library.count(username, filters["team"])
+    st.markdown(f"{len(rows)} matching configurations shown, newest first ({total} saved in total).")
+    table = pd.DataFrame([{
+        "Name": row["name"],
+        "Unit": row["unit_id"],
+        "Category": row["category"],
+        "Special functions": format_functions(row["function_mask"]),
+        "Payload [Te]": row["payload_weight"],
+        "Lifting height [m]": row["lifting_height"],
+        "Owner": row["owner"] + (f" ({row['team']})" if row["team"] else ""),
+        "Saved": datetime.fromtimestamp(row["created_at"]).strftime("%Y-%m-%d %H:%M"),
+        "Notes": row["notes"],
+    } for row in rows])
+    selection = st.dataframe(table, use_container_width=True, hide_index=True, on_select="rerun", selection_mode="single-row")
+
+    if st.session_state.library_cursor is not None:
+        if st.button(f"Load {PAGE_SIZE} more", use_container_width=False):
+            more, cursor = library.search(username, after=st.session_state.library_cursor, **filters)
+            st.session_state.library_rows = rows + more
+            st.session_state.library_cursor = cursor
+            st.rerun()
+
+    selected_rows = selection.selection.rows
+    if selected_rows:
+        row = rows[selected_rows[0]]
+        st.divider()
+        st.markdown(f"### {row['name']}")
+        st.markdown(f"**Unit:** {row['unit_type']} | {row['unit_id']} &nbsp; **Config hash:** `{row['config_hash']}`")
+        if row["notes"]:
+            st.markdown(f"**Notes:** {row['notes']}")
+
+        col_action1, col_action2, col_action3 = st.columns([1, 1, 1])
+        with col_action1:
+            st.button("⚙️ **Load into configurator**", use_container_width=True, type="primary",
+                      on_click=load_into_configurator, args=(row["id"],))
+        with col_action2:
+            if st.button("➡️ Go to Configure a Unit", use_container_width=True):
+                st.switch_page("pages/page_unit.py")
+        with col_action3:
+            if row["owner"] == username and st.button("🗑️ Delete", use_container_width=True):
+                library.delete(row["id"], username)
+                st.session_state.library_signature = None
+                st.rerun()
+
+        with st.expander("Configuration file"):
+            config = library.load(row["id"], username, team)
+            if config is not None:
+                st.code("\n".join(f"[{section}]\n" + "\n".join(f"{key} = {value}" for key, value in config[section].items())
+                                  for section in config.sections()), language="ini")
+
+st.divider()
@@ -0,0 +1,261 @@
+import hashlib
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.config_model import SPECIAL_FUNCTION_KEYS, build_config, config_hash
+from utils.external_function import ExternalFunction, G
+from utils.telemetry import CHANNELS, TelemetryService
+
+# page content
+st.markdown("# Live Telemetry")
+st.markdown("View live or recorded data of a Safelink unit next to the response of the current configuration.")
+
+st.divider()
+
+REFRESH_SECONDS = 0.15           # ~7 Hz chart refresh
+WINDOW_SECONDS = 60.0
+INITIAL_SAMPLES = 12000          # a session joining a running source starts with the last ~60 s at 200 Hz
+MAX_CHART_POINTS = 1500
+SOURCE_TYPES = {
+    "Synthetic": "🧪 Synthetic heave (demo)",
+    "UDP": "📡 UDP stream",
+    "TCP": "🔌 TCP stream",
+    "Replay": "⏯️ Replay recording",
+}
+REPLAY_DIR = os.path.join(tempfile.gettempdir(), "safelink_replays")
+LISTENER_TYPES = ("UDP", "TCP")  # open server ports, so only the admin starts them
+MAX_REPLAYS = 8                  # replays loop forever, so idle ones are stopped
+REPLAY_IDLE_SECONDS = 300.0
+COLUMNS = ["time"] + CHANNELS + ["F_simulated"]
+
+@st.cache_resource
+def get_services():
+    """Running telemetry sources shared by all sessions: {source: TelemetryService}"""
+    return {}, threading.Lock()
+
+def is_admin():
+    return st.session_state.get('username') == "admin"
+
+def may_stop(service):
+    """Sources are shared by all sessions; only the user that started one or the admin stops it"""
+    return service is None or is_admin() or service.owner == st.session_state.get('username')
+
+def expire_replays(services):
+    """Stop replays no session followed for a while, and the least recently followed beyond MAX_REPLAYS (hold the lock)"""
+    replays = sorted((name for name in services if name.startswith("replay://")), key=lambda name: services[name].followed_at)
+    now = time.time()
+    for n, name in enumerate(replays):
+        if len(replays) - n > MAX_REPLAYS or now - services[name].followed_at > REPLAY_IDLE_SECONDS:
+            services.pop(name).stop()
+
+def start_source(source):
+    """Start (or restart) a telemetry source (button callback)"""
+    if source.split("://")[0].upper() in LISTENER_TYPES and not is_admin():
+        return
+    services, lock = get_services()
+    with lock:
+        if not may_stop(services.get(source)):
+            return
+        if source in services:
+            services.pop(source).stop()
+        if source.startswith("replay://"):
+            # a new upload or speed replaces the session's previous replay
+            previous = st.session_state.get('live_replay_source')
+            if previous in services and previous != source and may_stop(services[previous]):
+                services.pop(previous).stop()
+            st.session_state.live_replay_source = source
+        services[source] = TelemetryService(source, owner=st.session_state.get('username'))
+        expire_replays(services)
+    select_source(source)
+
+def stop_source(source):
+    services, lock = get_services()
+    with lock:
+        if source in services and may_stop(services[source]):
+            services.pop(source).stop()
+
+def save_recording(uploaded):
+    """Save an uploaded recording under a name unique to this session and its content"""
+    if 'live_replay_id' not in st.session_state:
+        st.session_state.live_replay_id = uuid.uuid4().hex
+    content = uploaded.getvalue()
+    name = f"{hashlib.sha256(content).hexdigest()[:12]}-{os.path.basename(uploaded.name)}"
+    path = os.path.join(REPLAY_DIR, st.session_state.live_replay_id, name)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+    return path
+
+def select_source(source):
+    """Follow a source from its most recent samples on"""
+    service = get_services()[0].get(source)
+    st.session_state.live_source = source
+    st.session_state.live_position = max(service.buffer.count - INITIAL_SAMPLES, 0) if service else 0
+    st.session_state.live_window = np.empty((len(COLUMNS), 0))
+    st.session_state.live_runtime = None
+    st.session_state.live_previous_time = None
+
+def configuration_ready():
+    """True once a unit was selected and configured on the unit page"""
+    return st.session_state.get('selected_unit') is not None and all(key in st.session_state for key in SPECIAL_FUNCTION_KEYS.values())
+
+def get_runtime():
+    """Reference runtime of the current configuration, rebuilt when the configuration changes"""
+    config = build_config(st.session_state)
+    key = config_hash(config)
+    if st.session_state.live_runtime is None or st.session_state.live_runtime_key != key:
+        st.session_state.live_runtime = ExternalFunction.from_config(config)
+        st.session_state.live_runtime_key = key
+        st.session_state.live_time_zero = None
+    return st.session_state.live_runtime
+
+def simulate(samples):
+    """Total force of the configuration for the measured stroke, tension and heave of new samples"""
+    if not configuration_ready():
+        return np.full(samples.shape[1], np.nan)
+    runtime = get_runtime()
+    if st.session_state.live_time_zero is None:
+        st.session_state.live_time_zero = samples[0, 0]
+    time_zero = st.session_state.live_time_zero
+    index = {name: row for row, name in enumerate(COLUMNS)}
+    inputs = np.nan_to_num(samples[[index["S_m"], index["vS_m"], index["F_IAHC_total_m"], index["v_external_MRU"], index["depth"]]])
+    forces = np.empty(samples.shape[1])
+    previous = st.session_state.get('live_previous_time') or samples[0, 0] - 0.01
+    step = runtime.step
+    for i, t in enumerate(samples[0].tolist()):
+        dt = t - previous if t > previous else 0.01
+        previous = t
+        stroke, stroke_velocity, tension, heave_velocity, depth = inputs[:, i].tolist()
+        forces[i] = step(t - time_zero, dt, stroke, stroke_velocity, tension, heave_velocity, depth)
+    st.session_state.live_previous_time = previous
+    return forces
+
+def display_source_controls():
+    """Select, start and stop the telemetry source"""
+    services, lock = get_services()
+    with lock:
+        expire_replays(services)
+    col_source1, col_source2 = st.columns([1, 2])
+    with col_source1:
+        source_type = st.radio("Source", options=list(SOURCE_TYPES), format_func=SOURCE_TYPES.get, key="live_source_type")
+    with col_source2:
+        if source_type == "Synthetic":
+            source = "synthetic://"
+            st.caption("Generated 100 Hz heave motion of a 9 s swell, to try the page without a unit.")
+        elif source_type in ("UDP", "TCP"):
+            col_host, col_port = st.columns([2, 1])
+            with col_host:
+                host = st.text_input("Listen address", value="0.0.0.0", key="live_host")
+            with col_port:
+                port = st.number_input("Port", min_value=1024, max_value=65535, value=5005 if source_type == "UDP" else 5006, step=1, key="live_port")
+            source = f"{source_type.lower()}://{host}:{int(port)}"
+            st.caption('One JSON object per line: `{"time": 12.34, "S_m": 1.52, "F_IAHC_total_m": 498.0, ...}`')
+            if not is_admin():
+                st.caption("🔒 Only the administrator can open UDP/TCP listeners; follow one below once it runs.")
+        else:
+            uploaded = st.file_uploader("Recording (CSV with a time column)", type=["csv"], key="live_recording")
+            speed = st.select_slider("Replay speed", options=[0.5, 1.0, 2.0, 5.0, 10.0], value=1.0, key="live_speed")
+            source = None
+            if uploaded is not None:
+                source = f"replay://{save_recording(uploaded)}?speed={speed:g}"
+
+        running = source in services and services[source].running()
+        allowed = source is not None and may_stop(services.get(source)) and (source_type not in LISTENER_TYPES or is_admin())
+        col_start, col_stop = st.columns(2)
+        with col_start:
+            st.button("▶️ Restart" if running else "▶️ Start", use_container_width=True, type="primary",
+                      disabled=not allowed, on_click=start_source, args=(source,))
+        with col_stop:
+            st.button("⏹️ Stop", use_container_width=True, disabled=not running or not may_stop(services.get(source)),
+                      on_click=stop_source, args=(source,))
+
+    others = [name for name, service in services.items() if service.running()]
+    if others:
+        current = st.session_state.live_source if st.session_state.live_source in others else others[0]
+        if current != st.session_state.live_source:
+            select_source(current)
+        following = st.selectbox("Following", options=others, index=others.index(current))
+        if following != st.session_state.live_source:
+            select_source(following)
+
+def downsample(frame):
+    step = math.ceil(len(frame) / MAX_CHART_POINTS)
+    return frame.iloc[::step] if step > 1 else frame
+
+def display_live():
+    """Read the samples received since the last refresh and redraw the charts"""
+    service = get_services()[0].get(st.session_state.live_source)
+    if service is None:
+        st.info("Start a source to see live data.")
+        return
+    if service.error:
+        st.error(f"❌ {service.error}")
+        return
+
+    service.followed_at = time.time()
+    position, samples = service.buffer.since(st.session_state.live_position)
+    st.session_state.live_position = position
+    if samples.shape[1]:
+        window = np.concatenate([st.session_state.live_window, np.vstack([samples, simulate(samples)])], axis=1)
+        st.session_state.live_window = window[:, window[0] >= window[0, -1] - WINDOW_SECONDS]
+
+    window = st.session_state.live_window
+    status = "🟢" if service.running() else "⚪"
+    st.caption(f"{status} {service.status} · {service.received:,} samples received")
+    if window.shape[1] < 2:
+        st.info("Waiting for data...")
+        return
+
+    frame = pd.DataFrame(window.T, columns=COLUMNS)
+    frame["Time [s]"] = frame["time"] - frame["time"].iloc[-1]
+    frame = frame.set_index("Time [s]")
+    span = window[0, -1] - window[0, 0]
+    rate = (window.shape[1] - 1) / span if span > 0 else 0.0
+    measured = frame["F_IAHC_total_m"]
+    difference = (measured - frame["F_simulated"]).dropna()
+    deviation = np.sqrt(np.mean(difference ** 2)) if len(difference) else math.nan
+
+    col_metric1, col_metric2, col_metric3, col_metric4 = st.columns(4)
+    col_metric1.metric("Sample rate", f"{rate:.0f} Hz")
+    col_metric2.metric("Stroke (S_m)", f"{frame['S_m'].iloc[-1]:.2f} m")
+    col_metric3.metric("Measured force", f"{measured.iloc[-1]:.0f} kN")
+    col_metric4.metric("RMS deviation from configuration", f"{deviation:.1f} kN")
+
+    forces = frame[["F_IAHC_total_m", "F_simulated"]].rename(columns={"F_IAHC_total_m": "Measured", "F_simulated": "Configuration"})
+    if configuration_ready() and st.session_state.check_box_constant_tension:
+        forces["CT set point"] = (st.session_state.saved_number_2_1 + st.session_state.saved_number_3_1) * G
+    st.markdown("**Force [kN]**")
+    if not configuration_ready():
+        st.caption("Configure a unit on **Configure a Unit** to compare the measured force with the response of its configuration.")
+    st.line_chart(downsample(forces), height=260)
+
+    channels = st.session_state.get('live_channels') or ["S_m", "h_external_MRU"]
+    st.markdown("**Motion**")
+    st.line_chart(downsample(frame[channels]), height=260)
+
+for key, default in (('live_source', None), ('live_position', 0), ('live_runtime', None), ('live_runtime_key', None)):
+    if key not in st.session_state:
+        st.session_state[key] = default
+if 'live_window' not in st.session_state:
+    st.session_state.live_window = np.empty((len(COLUMNS), 0))
+
+st.markdown("### 1. Source")
+display_source_controls()
+
+st.divider()
+st.markdown("### 2. Live data")
+st.multiselect("Motion channels", options=CHANNELS, default=["S_m", "h_external_MRU"], key="live_channels")
+live_service = get_services()[0].get(st.session_state.live_source)
+polling = live_service is not None and live_service.running()
+st.fragment(display_live, run_every=REFRESH_SECONDS if polling else None)()
+
+st.divider()
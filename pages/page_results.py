@@ -1,6 +1,13 @@
 import streamlit as st
-from PIL import Image
 import os
+import threading
+import altair as alt
+import numpy as np
+import pandas as pd
+from utils.config_model import SPECIAL_FUNCTION_KEYS, build_config
+from utils.operability import DEFAULT_HEADINGS, DEFAULT_HS, DEFAULT_TP, OperabilityRun, allowable_table, config_system, grid_key, grid_path
+from utils.channels import RESULT_OPTIONS, PAYLOAD_RESULT_OPTIONS
+from utils.shared_cache import cached_image
 
 # page 2 content
 st.markdown("# Selection of Customized Results")
@@ -45,7 +52,7 @@ with col1:
     selection_box_results = st.selectbox("OrcaFlex defaults", options=["OrcaFlex defaults", "Customized"], key="results_selectbox", index=results_index)
 
 with col2:
-    image = Image.open(os.path.join('figures', 'SafelinkTabWiFi.png'))
+    image = cached_image(os.path.join('figures', 'SafelinkTabWiFi.png'), 300)
     col1, col2 = st.columns([1, 1])
     with col2:
         st.image(image, width=300)    
@@ -54,7 +61,7 @@ if selection_box_results == "OrcaFlex defaults":
     st.session_state.customized_results = False
     st.markdown("The results will be generated based on the OrcaFlex predefined results.")
     st.divider()
-    image = Image.open(os.path.join('figures', 'Lazy_Wave_Riser.png'))
+    image = cached_image(os.path.join('figures', 'Lazy_Wave_Riser.png'), 1000)
     col01, col02, col03 = st.columns([1, 6, 1])
     with col02:
         st.image(image, width=1000)    
@@ -76,66 +83,8 @@ elif selection_box_results == "Customized":
         st.info("**Default customized results are selected!** Modify the selections below to show more results in addition to the OrcaFlex defaults.")
         st.markdown("See [Help documentation](https://www.safelink.no) for detailed explaination of the results listed bellow. Contact [Safelink]() if more results are needed.")
         st.divider()
-        options = [
-                    "Force (F_fb)",                 
-                    "Force (d_PID_CT_dt)",           
-                    "Force (F_CT_point)",            
-                    "Force External (F_external)",   
-                    "Force Internal (F_internal)",   
-                    "Force Passive (F_passive)",     
-                    "Force Active (F_active)",       
-                    "Force Spring (F_spring)",       
-                    "Force Damping (F_damping)",     
-                    "Force Friction (F_friction)",   
-                    "Force Feedforward (F_ff)",      
-                    "Force (F_CT)",                     
-                    "Force (Target_CT)",             
-                    "Measured Force (F_IAHC_total_m)",  
-                    "Measured Stroke (S_m)",          
-                    "Measured Stroke Velocity (vS_m)",
-                    "Measured Stroke Acc (acc_S_m)",  
-                    "Measured velocity (v_rod_m)",    
-                    "Measured heave (h_rod_m)",       
-                    "Setpoint (F_sp_CT)",             
-                    "Setpoint (F_sp_HC)",             
-                    "Setpoint (v_rod_sp)",            
-                    "Setpoint (h_rod_sp)",            
-                    "Orcaflex Stroke (S_orc)",          
-                    "Orcaflex Stroke Velocity (vS_orc)",
-                    "Filtered (S_m_LP)",        
-                    "Filtered (vS_m_LP)",       
-                    "Filtered (acc_S_m_LP)",    
-                    "Tracking error (e_h_rod)",         
-                    "Tracking error (e_v_payload)",     
-                    "Tracking error (e_F_CT)",          
-                    "Tracking error (e_v_body)",      
-                    "S-curve (S_curve_x)",              
-                    "S-curve (S_curve_v)",              
-                    "S-curve (S_curve_j)",              
-                    "S-curve (S_curve_acc)",            
-                    "S-curve (S_curve_x_k)",          
-                    "S-curve (S_curve_v_k)",          
-                    "S-curve (S_curve_acc_k)",        
-                    "F_fb_limit_lower",               
-                    "F_fb_limit_upper",               
-                    ]
-        options_payload =[
-                    "acc_payload_MRU",        
-                    "acc_external_MRU",       
-                    "acc_external_MRU_inverted",
-                    "acc_payload_sp",         
-                    "acc_payload_sp_fb",      
-                    "v_payload_sp_fb",        
-                    "v_payload_m",            
-                    "v_external_MRU",         
-                    "h_external_MRU",         
-                    "v_external_MRU_inverted",
-                    "h_external_MRU_inverted",
-                    "acc_limit_lower",        
-                    "acc_limit_upper",        
-                    "v_payload_limit_lower",  
-                    "v_payload_limit_upper",  
-                    ]
+        options = RESULT_OPTIONS
+        options_payload = PAYLOAD_RESULT_OPTIONS
         #%% system parameters
 
         st.markdown("### Available Results")
@@ -306,6 +255,110 @@ elif selection_box_results == "Customized":
         st.warning("⚠️ **No Unit Selected** - Please choose a unit.")
         st.page_link("pages/page_unit.py", label="← Back to **Unit Selection**")
         
+@st.cache_resource
+def get_operability_runs():
+    """Operability grids being computed, shared by all sessions: {grid key: OperabilityRun}"""
+    return {}, threading.Lock()
+
+def operability_system():
+    """Lift system of the current configuration, or None while the unit or payload is not configured"""
+    if not all(key in st.session_state for key in SPECIAL_FUNCTION_KEYS.values()):
+        return None
+    system = config_system(build_config(st.session_state))
+    if not np.isfinite(system["swl"]) or system["mass"] <= 0 or system["area"] <= 0:
+        return None
+    return system
+
+def start_operability(system):
+    """Start (or resume) the grid of a system (button callback)"""
+    runs, lock = get_operability_runs()
+    key = grid_key(system, DEFAULT_HS, DEFAULT_TP, DEFAULT_HEADINGS)
+    with lock:
+        if key not in runs or not runs[key].running():
+            runs[key] = OperabilityRun(system, DEFAULT_HS, DEFAULT_TP, DEFAULT_HEADINGS)
+
+def display_operability_heatmap(grid, heading_index):
+    """Governing utilization over Hs x Tp at one heading"""
+    hs, tp = grid["hs"], grid["tp"]
+    utilization = np.fmax(grid["splash"], grid["depth"])[:, :, heading_index]
+    valid = grid["valid"][:, :, heading_index] & grid["done"][None, :, heading_index]
+    heatmap_df = pd.DataFrame({
+        "Tp [s]": np.tile(tp, len(hs)),
+        "Tp end": np.tile(tp, len(hs)) + (tp[1] - tp[0]),
+        "Hs [m]": np.repeat(hs, len(tp)),
+        "Hs end": np.repeat(hs, len(tp)) + (hs[1] - hs[0]),
+        "Utilization": np.nan_to_num(utilization.ravel(), nan=-1.0).round(3),
+        "Valid": valid.ravel(),
+    })
+    heatmap = alt.Chart(heatmap_df).mark_rect().encode(
+        x=alt.X("Tp [s]:Q", title="Peak period Tp [s]"),
+        x2="Tp end:Q",
+        y=alt.Y("Hs [m]:Q", title="Significant wave height Hs [m]"),
+        y2="Hs end:Q",
+        color=alt.condition(
+            "datum.Valid",
+            alt.Color("Utilization:Q", scale=alt.Scale(domain=[0, 1.5], scheme="redyellowgreen", reverse=True), title="Utilization"),
+            alt.value("#3a3a3a"),
+        ),
+        tooltip=["Hs [m]", "Tp [s]", "Utilization", "Valid"],
+    )
+    st.altair_chart(heatmap, use_container_width=True)
+
+def display_operability():
+    """Progress, heat-map and allowable sea states of the current configuration's grid, refreshed every second while computing"""
+    system = operability_system()
+    if system is None:
+        st.info("Configure a catalog unit and the payload weight, area and volume on **Configure a Unit** to compute its operability.")
+        return
+    runs, _ = get_operability_runs()
+    key = grid_key(system, DEFAULT_HS, DEFAULT_TP, DEFAULT_HEADINGS)
+    if key not in runs and os.path.exists(grid_path(key)):
+        # stored by an earlier run: load it, or resume it when it was interrupted
+        start_operability(system)
+    run = runs.get(key)
+    if (run is None or not run.running()) and st.session_state.get('operability_polling'):
+        # run finished: a full rerun turns polling off
+        st.session_state.operability_polling = False
+        st.rerun()
+
+    col_op1, col_op2, col_op3 = st.columns([2, 1, 1])
+    with col_op1:
+        if run is None:
+            st.caption(f"{len(DEFAULT_HS)} Hs × {len(DEFAULT_TP)} Tp × {len(DEFAULT_HEADINGS)} headings, linear screening model of the lift.")
+        elif run.error:
+            st.error(f"❌ {run.error}")
+        else:
+            st.progress(run.progress, text=f"{run.status.capitalize()} · {run.progress:.0%} of the sea states")
+    with col_op2:
+        if st.button("▶️ Compute" if run is None else "▶️ Resume", use_container_width=True, type="primary",
+                     disabled=run is not None and (run.running() or run.progress == 1), key="operability_start"):
+            start_operability(system)
+            st.rerun()
+    with col_op3:
+        st.button("⏹️ Cancel", use_container_width=True, disabled=run is None or not run.running(),
+                  on_click=lambda: run.cancel(), key="operability_cancel")
+    if run is None or not run.result()["done"].any():
+        return
+
+    grid = run.result()
+    heading_index = st.select_slider("Heading (0° = head seas)", options=range(len(DEFAULT_HEADINGS)),
+                                     format_func=lambda i: f"{DEFAULT_HEADINGS[i]:g}°", key="operability_heading")
+    display_operability_heatmap(grid, heading_index)
+    st.caption("Governing utilization of slack slings, unit SWL and unit stroke in the splash zone and at depth. Utilization above 1 fails; grey cells are not computed yet or steeper than Tz ≥ 8.9·√(Hs/g).")
+    st.markdown("**Allowable Hs [m] per Tp (rows) and heading (columns)**")
+    st.dataframe(allowable_table(grid), use_container_width=True)
+
+if st.session_state.selected_unit != None and st.session_state.selected_unit != "None":
+    st.divider()
+    st.markdown("### 🌊 Operability")
+    st.markdown("Allowable sea states of the configuration over significant wave height, peak period and heading. The grid is stored, so a configuration is only computed once and an interrupted run resumes.")
+    # poll only while this configuration's own grid runs, not whenever any session computes one
+    operability = operability_system()
+    operability_run = None if operability is None else get_operability_runs()[0].get(
+        grid_key(operability, DEFAULT_HS, DEFAULT_TP, DEFAULT_HEADINGS))
+    st.session_state.operability_polling = operability_run is not None and operability_run.running()
+    st.fragment(display_operability, run_every=1.0 if st.session_state.operability_polling else None)()
+
 # go to next page
 st.markdown("<br>"*3, unsafe_allow_html=True)
 col_next_1, col_next_2, col_next_3 = st.columns([1, 1, 1])
@@ -1,7 +1,25 @@
 import streamlit as st
-from PIL import Image
 import pandas as pd
+import numpy as np
+import altair as alt
+import json
 import os
+from utils.catalog import load_unit_data, catalog_arrays
+from utils.capabilities import capability_mask, capability_dict, catalog_masks, source_key, CATEGORY_MASKS, CAPABILITY_BITS, CAPABILITY_LABELS, FUNCTION_CAPABILITIES
+from utils.config_binary import ENUMS, FLOAT_FIELDS, FUNCTION_FIELDS
+from utils.config_model import SPECIAL_FUNCTION_KEYS, param_value
+from utils.feasibility import feasibility_matrix, limiting_check, payload_grid
+from utils.lift_model import lift_system_from_state
+from utils.operability import DEFAULT_TP
+from utils.resonance import DEPTHS, candidate_periods, period_curve, resonance_margin, resonant_ranges, wave_band
+from utils.recommend import CatalogIndex
+from utils.profiling import span
+from utils.shared_cache import cached_image
+from utils.surrogate import ResponseSurface, model_path
+from utils.sensitivity import FACTORS
+from utils.tuning import DIRECTORY as TUNING_DIR, TUNABLE, load_result, tunable_settings, tuning_key, tuning_path
+from utils.jobs import ACTIVE, DONE
+from utils.job_service import get_job_queue
 
 
 def auto_save_param(param_name):
@@ -13,22 +31,10 @@ def auto_save_param(param_name):
 st.markdown("# Unit Selection and Configuration")
 st.divider()
 
-# Import safelink units from Excel file
-@st.cache_data
-def load_unit_data():
-    """Load and process unit data from Excel file"""
-    try:
-        df = pd.read_excel( os.path.join('materials', 'Safelink_units.xlsx'), header=0)
-        df.sort_values(by="Unit Type", inplace=True)
-        df.reset_index(drop=True, inplace=True)
-        return df
-    except Exception as e:
-        st.error(f"Error loading unit data: {e}")
-        return pd.DataFrame()
-
 # Load the data
 
-safelink_units = load_unit_data()
+with span("load_unit_data"):
+    safelink_units = load_unit_data()
 # Categorize units based on actual data
 iahc_units = safelink_units[safelink_units['Unit Type'].str.contains('IAHC', case=False, na=False)]
 poseidon_units = safelink_units[safelink_units['Unit Type'].str.contains('Poseidon', case=False, na=False)]
@@ -100,24 +106,6 @@ def get_unit_type(session_unit):
     else:
         return "IAHC"  # Final fallback
 
-# Check if selected unit supports special features
-def get_unit_capabilities(selected_unit, unit_type):
-    """Determine which special features are available for the selected unit"""
-    if not selected_unit:
-        return {"ahc": False, "quick_lifting": False, "constant_tension": False, "rod_lock": False, "rod_orientation": True}
-    # IAHC units support all features including rod functions
-    if unit_type == "IAHC":
-        return {"ahc": True, "quick_lifting": True, "constant_tension": True, "rod_lock": True, "rod_orientation": True}
-    # PHC units support most features including rod functions
-    elif unit_type == "PHC":
-        return {"ahc": False, "quick_lifting": True, "constant_tension": True, "rod_lock": True, "rod_orientation": True}
-    # Shock absorber units support basic features
-    elif unit_type == "Shock absorber":
-        return {"ahc": False, "quick_lifting": True, "constant_tension": False, "rod_lock": True, "rod_orientation": True}
-    # Other units have minimal features
-    else:
-        return {"ahc": False, "quick_lifting": False, "constant_tension": False, "rod_lock": False, "rod_orientation": False}
-
 # Initialize session state with first available unit if none selected
 if 'selected_unit' not in st.session_state or st.session_state['selected_unit'] == "None" or st.session_state['selected_unit'] is None:
     if IAHC_units:
@@ -192,9 +180,80 @@ def get_unit_specifications(unit_data):
     # Look up specifications from the loaded Excel data
     return unit_specs_lookup[unit_id]
 
+@st.cache_resource(max_entries=1)
+def get_catalog_index(catalog_key):
+    """Sorted catalog index shared by all sessions, rebuilt when the catalog or its capability sidecar changes"""
+    return CatalogIndex(catalog_arrays(), catalog_masks())
+
+def apply_recommended_unit(unit_type, unit_id, category):
+    """Select a recommended unit (callback, runs before the selection widgets are created)"""
+    radio_keys = {"IAHC": "iahc_selectbox", "PHC": "phc_selectbox", "Shock absorber": "shock_selectbox"}
+    st.session_state.selected_unit = (unit_type, unit_id)
+    st.session_state.selected_unit_type = category
+    st.session_state.unit_selectbox = category
+    st.session_state[radio_keys[category]] = (unit_type, unit_id)
+
+def display_unit_recommendation():
+    """Ranked list of units for the current payload and required special functions"""
+    feature_labels = {
+        "quick_lifting": "⚡ Quick Lifting",
+        "constant_tension": "🎯 Constant Tension",
+        "ahc": "🌊 Active Heave Compensation",
+        "rod_lock": "🔒 Rod Lock/Unlock",
+    }
+    col_rec1, col_rec2, col_rec3 = st.columns([2, 1, 1])
+    with col_rec1:
+        required_features = st.multiselect("Required special functions", options=list(feature_labels), format_func=feature_labels.get, key="recommend_features")
+    with col_rec2:
+        min_stroke = st.number_input("Minimum stroke [m]", min_value=0.0, max_value=10.0, value=0.0, step=0.1, key="recommend_min_stroke")
+    with col_rec3:
+        max_utilization = st.slider("Max SWL utilization", min_value=0.5, max_value=1.0, value=0.9, step=0.05, key="recommend_max_utilization")
+    
+    payload_weight = param_value(st.session_state, "number_2_1")
+    sling_weight = param_value(st.session_state, "number_3_1")
+    lifting_height = param_value(st.session_state, "number_1_1")
+    rod_lock_depth = st.session_state.rod_lock_depth if st.session_state.check_box_rod_lock else None
+    
+    if payload_weight <= 0:
+        st.info("Enter the payload weight under **3. Parameter Inputs** to get a recommendation.")
+        return
+    
+    recommendations = get_catalog_index(source_key()).recommend(
+        payload_weight, sling_weight, lifting_height or None, rod_lock_depth,
+        min_stroke=min_stroke, features=tuple(required_features), max_utilization=max_utilization,
+    )
+    st.caption(f"Payload {payload_weight} Te + slings {sling_weight} Te, available lifting height {lifting_height} m"
+               + (f", rod lock at {rod_lock_depth} m" if rod_lock_depth is not None else ""))
+    
+    if not recommendations:
+        st.warning("⚠️ No unit in the catalog meets these requirements.")
+        return
+    
+    recommendations_df = pd.DataFrame(recommendations)
+    recommendations_df.insert(0, "Rank", range(1, len(recommendations_df) + 1))
+    st.dataframe(
+        recommendations_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "unit_type": "Unit Type",
+            "unit_id": "Unit ID",
+            "category": "Category",
+            "swl": st.column_config.NumberColumn("SWL [Te]", format="%.0f"),
+            "stroke": st.column_config.NumberColumn("Stroke [m]", format="%.1f"),
+            "design_water_depth": st.column_config.NumberColumn("Design Water Depth [m]", format="%.0f"),
+            "utilization": st.column_config.ProgressColumn("SWL Utilization", min_value=0.0, max_value=1.0, format="%.2f"),
+        },
+    )
+    best = recommendations[0]
+    st.button(f"Use recommended unit: {best['unit_type']} | {best['unit_id']}", type="primary",
+              on_click=apply_recommended_unit, args=(best["unit_type"], best["unit_id"], best["category"]))
+
 st.markdown("### 1. Unit Selection")
 st.markdown("Select the unit to be used in your lifting simulations/operations.")
 st.write("Contact [Safelink AS]() and consult  [help documentation](http://safelink.no) for detailed unit specifications.")
+if st.toggle("🔎 Recommend a unit for my payload", key="recommend_mode"):
+    display_unit_recommendation()
 col1, col2, col3 = st.columns([2, 1, 2])
 with col1:
     selection_box_unit_type = st.selectbox("IAHC", options=["IAHC", "PHC", "Shock absorber"], key="unit_selectbox", index=category_index)
@@ -224,7 +283,7 @@ with col1:
     if config["spacing"]:
             st.markdown("<br>"*11, unsafe_allow_html=True)
             
-with col2:
+with col2, span("spec_table"):
     specs = get_unit_specifications(st.session_state.selected_unit)
     
     st.markdown("<br>"*1, unsafe_allow_html=True)
@@ -275,7 +334,7 @@ with col2:
     
 with col3:
     _, col_unit_2,_ = st.columns([2,3,2])
-    with col_unit_2:
+    with col_unit_2, span("get_unit_image"):
         # Photo of Safelink unit in operation
         st.markdown("<br>"*2, unsafe_allow_html=True)
         
@@ -285,18 +344,67 @@ with col3:
         
         image_path = get_unit_image(display_unit_serial, display_unit_type)
         try: 
-            image = Image.open(image_path)
+            image = cached_image(image_path)
             st.image(image, use_container_width=True)
             
         except Exception as e:
             fallback_path = os.path.join('figures', 'ahc.jpg')
             try:
-                fallback_image = Image.open(fallback_path)
+                fallback_image = cached_image(fallback_path)
                 st.image(fallback_image, use_container_width=True)
             except:
                 st.warning("Image not found")
 
 
+def display_feasibility_map():
+    """Heat-map of SWL utilization for every unit over a payload grid"""
+    if safelink_units.empty:
+        return
+    arrays = catalog_arrays()
+    payloads = payload_grid(arrays["swl"])
+    sling_weight = param_value(st.session_state, "number_3_1")
+    lifting_height = param_value(st.session_state, "number_1_1")
+    rod_lock_depth = st.session_state.rod_lock_depth if st.session_state.check_box_rod_lock else None
+    
+    utilization, feasible = feasibility_matrix(arrays, payloads, sling_weight, lifting_height, rod_lock_depth)
+    reasons = limiting_check(arrays, lifting_height, rod_lock_depth)
+    
+    unit_labels = [f"{unit_type} | {unit_id}" for unit_type, unit_id in zip(arrays["unit_type"], arrays["unit_id"])]
+    heatmap_df = pd.DataFrame({
+        "Unit": pd.Series(unit_labels).repeat(len(payloads)).to_numpy(),
+        "Payload [Te]": np.tile(payloads, len(unit_labels)).round(1),
+        "Payload end": np.tile(payloads + (payloads[1] - payloads[0]), len(unit_labels)).round(1),
+        "Utilization": utilization.ravel().round(3),
+        "Feasible": feasible.ravel(),
+    })
+    
+    heatmap = alt.Chart(heatmap_df).mark_rect().encode(
+        x=alt.X("Payload [Te]:Q", title="Payload weight in air [Te]"),
+        x2="Payload end:Q",
+        y=alt.Y("Unit:N", sort=unit_labels, title=None),
+        color=alt.condition(
+            "datum.Feasible",
+            alt.Color("Utilization:Q", scale=alt.Scale(domain=[0, 1], scheme="viridis"), title="SWL utilization"),
+            alt.value("#3a3a3a"),
+        ),
+        tooltip=["Unit", "Payload [Te]", "Utilization", "Feasible"],
+    )
+    current_payload = alt.Chart(pd.DataFrame({"Payload [Te]": [param_value(st.session_state, "number_2_1")]})).mark_rule(color="#FFCD00", size=2).encode(x="Payload [Te]:Q")
+    st.altair_chart(heatmap + current_payload, use_container_width=True)
+    
+    current_load = param_value(st.session_state, "number_2_1") + sling_weight
+    viable = [label for label, ok, swl in zip(unit_labels, reasons == "", arrays["swl"]) if ok and current_load <= swl]
+    st.caption(f"Grey cells are not feasible (SWL exceeded, unit height + stroke above the available lifting height of {lifting_height} m"
+               + (f", or design water depth below the rod lock depth of {rod_lock_depth} m" if rod_lock_depth is not None else "") + "). "
+               f"The yellow line marks the current payload; sling weight {sling_weight} Te is included.")
+    if viable:
+        st.success(f"✅ {len(viable)} unit(s) viable for the current payload: " + ", ".join(viable))
+    else:
+        st.warning("⚠️ No unit is viable for the current payload and lifting height.")
+
+with st.expander("📊 Feasibility Map - which units can carry your payload?", expanded=False):
+    display_feasibility_map()
+
 #%% System Parameters and User Inputs
 st.divider()
 
@@ -306,7 +414,7 @@ with col_1:
     st.write("See [help documentation](http://safelink.no) for detailed explanation of parameters and settings.")
 with col_2:
     try:
-        image_certificate = Image.open(os.path.join('figures', 'Safelink_Tablet_red.jpg'))
+        image_certificate = cached_image(os.path.join('figures', 'Safelink_Tablet_red.jpg'))
         _, col2,_ = st.columns([2,3,2])
         with col2:
             st.markdown("<br>"*1, unsafe_allow_html=True)
@@ -315,8 +423,13 @@ with col_2:
         st.info("Certificate image not found")
 # Special Functionalities Section with Rod Functions
 
-# Check what features are available for current unit
-unit_capabilities = st.session_state.unit_capabilities = get_unit_capabilities(st.session_state.selected_unit, st.session_state.selected_unit_type)
+# Check what features are available for current unit (capability mask of the Unit ID)
+unit_capability_mask = capability_mask(st.session_state.selected_unit, st.session_state.selected_unit_type)
+unit_capabilities = st.session_state.unit_capabilities = capability_dict(unit_capability_mask)
+# a function enabled for a previous unit must not carry over to a unit without it
+for function, capability in FUNCTION_CAPABILITIES.items():
+    if not unit_capability_mask & CAPABILITY_BITS[capability]:
+        st.session_state[SPECIAL_FUNCTION_KEYS[function]] = False
 
 # Define callback functions for immediate state updates
 def update_constant_tension():
@@ -555,31 +668,15 @@ else:
     
     st.markdown("### 💡 Feature Availability by Unit Type")
     
-    col_avail1, col_avail2, col_avail3 = st.columns([1, 1, 1])
-    
-    with col_avail1:
-        st.markdown("#### IAHC Units")
-        st.success("✅ Constant Tension Mode")
-        st.success("✅ Active Heave Compensation")
-        st.success("✅ Quick Lifting Mode")
-        st.success("✅ Rod Lock/Unlock Mode")
-        st.success("✅ Rod Orientation Control")
-    
-    with col_avail2:
-        st.markdown("#### PHC Units")
-        st.success("✅ Constant Tension Mode")
-        st.warning("❌ Active Heave Compensation")
-        st.success("✅ Quick Lifting Mode")
-        st.success("✅ Rod Lock/Unlock Mode")
-        st.success("✅ Rod Orientation Control")
-    
-    with col_avail3:
-        st.markdown("#### Other Units")
-        st.warning("❌ Constant Tension Mode")
-        st.warning("❌ Active Heave Compensation")
-        st.success("✅ Quick Lifting Mode")
-        st.warning("❌ Rod Lock/Unlock Mode")
-        st.success("✅ Rod Orientation Control")
+    # defaults per category; units listed in the capability table may differ
+    for col_avail, (category, category_mask) in zip(st.columns(len(CATEGORY_MASKS)), CATEGORY_MASKS.items()):
+        with col_avail:
+            st.markdown(f"#### {category} Units")
+            for capability, label in CAPABILITY_LABELS.items():
+                if category_mask & CAPABILITY_BITS[capability]:
+                    st.success(f"✅ {label}")
+                else:
+                    st.warning(f"❌ {label}")
     
     if not safelink_units.empty:
         st.markdown("### 📋 Available Units by Type")
@@ -739,6 +836,236 @@ with st.expander('Expand to view & edit'):
             st.write("")
             st.write(r"$[m]$ Length parameter 4")
 
+@st.cache_data(max_entries=50)
+def resonance_curves(system):
+    """Natural period over depth of the configured unit and of every catalog unit (cached per payload)"""
+    system = dict(system)
+    return period_curve(system), candidate_periods(system, catalog_arrays())
+
+def display_resonance_check():
+    """Natural period over depth against the wave periods of the sea states"""
+    system = lift_system_from_state(st.session_state)
+    if system is None:
+        st.info("Enter the payload weight under **Parameter Inputs** to check the lift for resonance.")
+        return
+    col_tp, col_depth = st.columns(2)
+    with col_tp:
+        tp_range = st.slider("Sea states, peak period Tp [s]", min_value=DEFAULT_TP[0], max_value=DEFAULT_TP[-1], value=(6.0, 12.0), step=0.5, key="resonance_tp")
+    with col_depth:
+        target_depth = st.number_input("Target depth [m]", min_value=0.0, max_value=float(DEPTHS[-1]), value=float(system["depth"]), step=10.0, key="resonance_depth")
+
+    curve, candidates = resonance_curves(tuple(system.items()))
+    band = wave_band(np.arange(tp_range[0], tp_range[1] + 0.25, 0.5))
+    index = int(np.searchsorted(DEPTHS, target_depth))
+    margin = resonance_margin(curve, band)
+    ranges = [(start, end) for start, end in resonant_ranges(DEPTHS, margin) if start <= target_depth]
+
+    col_metric1, col_metric2, col_metric3 = st.columns(3)
+    col_metric1.metric("Natural period at target depth", f"{curve[index]:.1f} s")
+    col_metric2.metric("Wave periods", f"{band[0]:.1f} - {band[1]:.1f} s")
+    col_metric3.metric("Resonance margin", f"{margin[index]:+.0%}")
+    if ranges:
+        st.warning("⚠️ Resonant while lowering through " + ", ".join(f"{start:.0f}-{min(end, target_depth):.0f} m" for start, end in ranges))
+    else:
+        st.success("✅ Natural period outside the wave periods down to the target depth")
+
+    arrays = catalog_arrays()
+    step = 10
+    curves_df = pd.DataFrame({
+        "Depth [m]": np.tile(DEPTHS[::step], len(arrays["unit_id"]) + 1),
+        "Natural period [s]": np.concatenate([curve[::step], candidates[:, ::step].ravel()]).round(2),
+        "Unit": np.repeat(np.concatenate([["Configured"], arrays["unit_id"]]), len(DEPTHS[::step])),
+    })
+    band_chart = alt.Chart(pd.DataFrame({"low": [band[0]], "high": [band[1]]})).mark_rect(color="#E4572E", opacity=0.2).encode(x="low:Q", x2="high:Q")
+    candidate_lines = alt.Chart(curves_df[curves_df["Unit"] != "Configured"]).mark_line(color="#888888", strokeWidth=1, opacity=0.5).encode(
+        x=alt.X("Natural period [s]:Q", scale=alt.Scale(domain=[0, max(2 * band[1], float(curve.max()) * 1.1)], clamp=True)),
+        y=alt.Y("Depth [m]:Q", scale=alt.Scale(reverse=True)),
+        detail="Unit:N",
+        tooltip=["Unit", "Depth [m]", "Natural period [s]"],
+    )
+    configured_line = alt.Chart(curves_df[curves_df["Unit"] == "Configured"]).mark_line(color="#FFCD00", strokeWidth=3).encode(
+        x="Natural period [s]:Q", y="Depth [m]:Q", tooltip=["Depth [m]", "Natural period [s]"],
+    )
+    target_rule = alt.Chart(pd.DataFrame({"Depth [m]": [target_depth]})).mark_rule(strokeDash=[4, 4]).encode(y="Depth [m]:Q")
+    st.altair_chart(band_chart + candidate_lines + configured_line + target_rule, use_container_width=True)
+    st.caption("Yellow: the configured unit; grey: the other catalog units with this payload. The shaded band holds the wave periods with "
+               "more than half the peak spectral energy (JONSWAP) of the selected sea states.")
+
+    candidate_margin = resonance_margin(candidates[:, :index + 1], band)
+    candidates_df = pd.DataFrame({
+        "Unit": [f"{unit_type} | {unit_id}" for unit_type, unit_id in zip(arrays["unit_type"], arrays["unit_id"])],
+        "Period at target depth [s]": candidates[:, index].round(1),
+        "Smallest margin [%]": (candidate_margin.min(axis=1) * 100).round(0),
+        "Resonance free": candidate_margin.min(axis=1) >= 0,
+    }).sort_values("Smallest margin [%]", ascending=False)
+    st.dataframe(candidates_df, use_container_width=True, hide_index=True)
+
+@st.cache_resource(max_entries=20)
+def load_surrogate(path, modified):
+    """Surrogate model of a unit type, reloaded when the trainer saved a new version"""
+    return ResponseSurface.load(path)
+
+def current_features():
+    """Surrogate model inputs (utils.surrogate.FEATURES) of the parameters as currently entered"""
+    features = {f"Unit_Parameters.parameter_{i}": param_value(st.session_state, f"number_{i}_0") for i in range(1, 11)}
+    features.update({f"Payload_Parameters.parameter_{i}": param_value(st.session_state, f"number_{i}_1") for i in range(1, 11)})
+    for function, state_key in SPECIAL_FUNCTION_KEYS.items():
+        enabled = bool(st.session_state.get(state_key, False))
+        features[f"Special_Functions.{function}"] = enabled
+        for field in FUNCTION_FIELDS[function]:
+            features[f"Function_Parameters.{field}"] = st.session_state.get(field) if enabled else 0.0
+    features["Safety_Parameters.max_force_limit"] = st.session_state.get('max_force_limit', 0.0)
+    return features
+
+def display_surrogate_predictions():
+    """Result statistics predicted from the stored results of the unit type, updated on every edit"""
+    unit_type = st.session_state.selected_unit[0] if isinstance(st.session_state.selected_unit, tuple) else str(st.session_state.selected_unit)
+    path = model_path(unit_type)
+    if not os.path.exists(path):
+        st.info(f"No stored results for **{unit_type}** units yet. Predictions appear once results are stored under "
+                "**Summary & Export → Store Simulation Results**; the model is trained in the background.")
+        return
+    model = load_surrogate(path, os.path.getmtime(path))
+    features = current_features()
+    mean, band = model.predict(features)
+    predictions = pd.DataFrame({"Prediction": mean, "Lower (95 %)": mean - band, "Upper (95 %)": mean + band, "Cases": model.count},
+                               index=pd.Index(model.targets, name="Result"))
+
+    st.caption(f"Response surface of {len(model.hashes)} stored {unit_type} cases, varying "
+               f"{', '.join(name.split('.')[-1].replace('_', ' ') for name in model.inputs) or 'no parameters'}.")
+    outside = model.extrapolated(features)
+    if outside:
+        st.warning("⚠️ Outside the range of the stored cases: " + ", ".join(name.replace("_", " ").replace(".", ": ") for name in outside)
+                   + ". The predictions are extrapolated.")
+    channels = sorted({target.split(" ")[0] for target in model.targets})
+    channel = st.selectbox("Result channel", options=channels, key="surrogate_channel")
+    selected = [target for target in model.targets if target.split(" ")[0] == channel]
+    for column, target in zip(st.columns(max(len(selected), 1)), selected):
+        value, half_width = predictions.loc[target, "Prediction"], band[model.targets.index(target)]
+        column.metric(target, f"{value:,.2f}", help=f"95 % band {value - half_width:,.2f} to {value + half_width:,.2f}" if np.isfinite(half_width) else "Too few cases for a band")
+        if np.isfinite(half_width):
+            column.caption(f"± {half_width:,.2f}")
+    st.dataframe(predictions.round(3), use_container_width=True)
+
+with st.expander("🔮 Predicted Results - from the stored results of this unit type", expanded=False):
+    display_surrogate_predictions()
+
+with st.expander("🎵 Resonance Check - natural period vs depth", expanded=False):
+    display_resonance_check()
+
+def current_record():
+    """Configuration record (utils.config_binary) of the parameters as currently entered"""
+    return {
+        "unit_id": st.session_state.selected_unit[1] if isinstance(st.session_state.selected_unit, tuple) else str(st.session_state.selected_unit),
+        "functions": {function: bool(st.session_state.get(state_key, False)) for function, state_key in SPECIAL_FUNCTION_KEYS.items()},
+        "parameters": {name: st.session_state.get(name) for name in FLOAT_FIELDS + list(ENUMS)},
+        "unit_parameters": [param_value(st.session_state, f"number_{i}_0") for i in range(1, 11)],
+        "payload_parameters": [param_value(st.session_state, f"number_{i}_1") for i in range(1, 11)],
+    }
+
+def apply_tuned_settings(settings):
+    """Write optimised settings to the special function inputs"""
+    for name, value in settings.items():
+        st.session_state[name] = value
+
+def display_tuning_job(job_id):
+    """Progress of the queued optimisation; a full rerun shows the result once the job ended"""
+    queue, _ = get_job_queue()
+    job = queue.get(job_id)
+    if job is None or job["status"] not in ACTIVE:
+        st.rerun()
+    col_job1, col_job2 = st.columns([4, 1])
+    with col_job1:
+        st.progress(job["progress"], text=job["message"] if job["message"] not in ("", "Started") else "Simulating the current settings...")
+    with col_job2:
+        st.button("Cancel", use_container_width=True, key="tuning_cancel", on_click=queue.cancel, args=(job_id, st.session_state.username))
+
+def display_tuning():
+    """Optimise the special function settings with the closed-loop lift simulation"""
+    record = current_record()
+    arrays = catalog_arrays()
+    rows = np.flatnonzero(arrays["unit_id"] == record["unit_id"])
+    if len(rows) == 0 or record["payload_parameters"][1] <= 0:
+        st.info("Select a catalog unit and enter the payload weight under **Parameter Inputs** to optimise the settings.")
+        return
+    names = tunable_settings(record)
+    if not names:
+        st.info("Enable Quick Lifting, Constant Tension, Rod Lock or AHC above to optimise their settings.")
+        return
+    st.markdown("Search the settings of the enabled special functions that minimise the payload motion in a sea state, "
+                "keeping the stroke within 90 % of its range, the active force within 90 % of the max force limit and "
+                "the slings tight. Every candidate is a closed-loop simulation with the external function.")
+    queue, _ = get_job_queue()
+    tuning_job = st.session_state.get('tuning_job')
+    job = queue.get(tuning_job["id"]) if tuning_job is not None else None
+    tuning_active = job is not None and job["status"] in ACTIVE
+    col_tune1, col_tune2, col_tune3 = st.columns([1, 1, 1])
+    with col_tune1:
+        hs = st.number_input("Hs [m]", min_value=0.5, max_value=6.0, value=2.0, step=0.25, key="tuning_hs")
+    with col_tune2:
+        tp = st.number_input("Tp [s]", min_value=4.0, max_value=18.0, value=8.0, step=0.5, key="tuning_tp")
+    with col_tune3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        start = st.button("🛠️ Optimise Settings", use_container_width=True, type="primary", key="tuning_run",
+                          disabled=tuning_active)
+
+    stroke = float(arrays["stroke"][rows[0]])
+    inputs = json.dumps([record, hs, tp], sort_keys=True)
+    path = tuning_path(record["unit_id"], tuning_key(record, stroke, names, (hs, tp, 0.0), 0))
+    if start and not tuning_active:
+        result = load_result(path)
+        if result is not None:
+            st.session_state.tuning_result = {"inputs": inputs, "result": result}
+        else:
+            # the search runs as a background job, so the page stays responsive
+            params = {"record": record, "stroke": stroke, "names": names, "sea_state": [hs, tp, 0.0], "seed": 0,
+                      "directory": os.path.abspath(TUNING_DIR)}
+            job_id = queue.submit(st.session_state.username, "tune_settings", params,
+                                  title=f"Optimise settings {record['unit_id']}, Hs {hs:g} m, Tp {tp:g} s")
+            st.session_state.tuning_job = {"id": job_id, "inputs": inputs, "path": path}
+            # rerun, so the button shows as disabled while the job runs
+            st.rerun()
+
+    if tuning_job is not None:
+        if job is not None and job["status"] in ACTIVE:
+            st.fragment(display_tuning_job, run_every="1s")(tuning_job["id"])
+            return
+        del st.session_state.tuning_job
+        result = load_result(tuning_job["path"]) if job is not None and job["status"] == DONE else None
+        if result is not None:
+            st.session_state.tuning_result = {"inputs": tuning_job["inputs"], "result": result}
+        elif job is not None and job["error"]:
+            st.error(f"❌ The optimisation failed: {job['error']}")
+
+    tuning = st.session_state.get('tuning_result')
+    if tuning is None:
+        return
+    result = tuning["result"]
+    if tuning["inputs"] != inputs:
+        st.caption("The configuration changed since the optimisation, run it again to update the settings.")
+    if result["feasible"]:
+        st.success(f"✅ Settings found after {result['evaluations']} simulations ({result['stopped']})")
+    else:
+        st.warning(f"⚠️ No settings keep the stroke, force and sling tension within the limits in Hs {hs:g} m; "
+                   "the best compromise is shown. Consider a unit with more stroke or a lower sea state.")
+    before, after = result["initial_metrics"], result["best_metrics"]
+    col_result1, col_result2, col_result3, col_result4 = st.columns(4)
+    col_result1.metric("RMS payload velocity", f"{after['payload_velocity']:.3f} m/s", f"{after['payload_velocity'] - before['payload_velocity']:+.3f} m/s", delta_color="inverse")
+    col_result2.metric("Max stroke utilization", f"{after['stroke_utilization']:.0%}", f"{after['stroke_utilization'] - before['stroke_utilization']:+.0%}", delta_color="inverse")
+    col_result3.metric("Peak active force", f"{after['F_fb_peak']:.0f} kN", f"{after['F_fb_peak'] - before['F_fb_peak']:+.0f} kN", delta_color="inverse")
+    col_result4.metric("Min tension", f"{after['tension_min']:.0f} kN", f"{after['tension_min'] - before['tension_min']:+.0f} kN")
+    settings_df = pd.DataFrame({
+        "Setting": [FACTORS[name][0] for name in result["names"]],
+        "Current": [st.session_state.get(name) for name in result["names"]],
+        "Optimised": [result["best"][name] for name in result["names"]],
+        "Range": [f"{TUNABLE[name][1]:g} - {TUNABLE[name][2]:g}" for name in result["names"]],
+    })
+    st.dataframe(settings_df, use_container_width=True, hide_index=True)
+    st.button("Apply Optimised Settings", use_container_width=True, key="tuning_apply", on_click=apply_tuned_settings, args=(result["best"],))
+
+with st.expander("🛠️ Optimise Special Function Settings", expanded=False):
+    display_tuning()
+
 # Navigation to next page
 col_next_1, col_next_2, col_next_3 = st.columns([1, 1, 1])
 with col_next_2:
@@ -1,7 +1,7 @@
 import streamlit as st
-from PIL import Image
 from datetime import datetime
 import os
+from utils.shared_cache import cached_image, cached_markdown
 
 #%% set up the page configuration
 st.set_page_config(
@@ -13,100 +13,24 @@ st.set_page_config(
 st.session_state.setdefault('image_welcome', True)
 st.session_state.setdefault('logged_in', False)
 st.session_state.setdefault('username', '')
-st.session_state.setdefault('show_login_dialog', False)
 
 def hide_welcome_image():
     st.session_state.image_welcome = False
 
-def show_login_dialog():
-    st.session_state.show_login_dialog = True
-
-def hide_login_dialog():
-    st.session_state.show_login_dialog = False
-
-def handle_login(username, password):
-    # Simple authentication - in production, use proper authentication
-    valid_users = {
-        "admin": "password123",
-        "user": "user123",
-        "demo": "demo"
-    }
-    
-    if username in valid_users and valid_users[username] == password:
-        st.session_state.logged_in = True
-        st.session_state.username = username
-        st.session_state.show_login_dialog = False
-        st.success(f"Welcome, {username}!")
-        st.rerun()
-    else:
-        st.error("Invalid username or password")
-
-def handle_logout():
-    st.session_state.logged_in = False
-    st.session_state.username = ''
-    st.session_state.show_login_dialog = False
-    st.success("Logged out successfully!")
-    st.rerun()
-
 # Main page content
-image = Image.open( os.path.join('figures', 'Safelink Logo Medium.png'))
+image = cached_image(os.path.join('figures', 'Safelink Logo Medium.png'), 1000)
 col1, col2, col3 = st.columns([1, 1, 1])
 with col2:
     st.image(image, width=1000)
 
-#%% Login/Logout section
+#%% Signed-in user (login and logout are handled in main.py)
 st.divider()
 col_login1, col_login2, col_login3 = st.columns([3, 1, 3])
 
 with col_login2:
-    if not st.session_state.logged_in:
-        if st.button("🔐 Login", use_container_width=True, type="primary"):
-            show_login_dialog()
-    else:
+    if st.session_state.logged_in:
         st.success(f"👤 Welcome, {st.session_state.username}")
 
-# Login Dialog
-if st.session_state.show_login_dialog and not st.session_state.logged_in:
-    with st.container():
-        st.markdown("### 🔐 Login to Safelink Configuration Tool")
-        
-        col_dialog1, col_dialog2, col_dialog3 = st.columns([1, 2, 1])
-        with col_dialog2:
-            with st.form("login_form"):
-                st.markdown("**Please enter your credentials:**")
-                username = st.text_input("Username", placeholder="Enter username")
-                password = st.text_input("Password", type="password", placeholder="Enter password")
-                
-                col_btn1, col_btn2, col_btn3 = st.columns([1, 1, 1])
-                with col_btn1:
-                    login_submitted = st.form_submit_button("Login", use_container_width=True, type="primary")
-                with col_btn2:
-                    cancel_submitted = st.form_submit_button("Cancel", use_container_width=True)
-                with col_btn3:
-                    demo_submitted = st.form_submit_button("Demo Login", use_container_width=True)
-                
-                if login_submitted and username and password:
-                    handle_login(username, password)
-                
-                if cancel_submitted:
-                    hide_login_dialog()
-                    st.rerun()
-                
-                if demo_submitted:
-                    handle_login("demo", "demo")
-            
-            # Demo credentials info
-            with st.expander("Demo Credentials"):
-                st.info("""
-                **Demo Account:**
-                - Username: demo
-                - Password: demo
-                
-                **Test Accounts:**
-                - Username: admin, Password: password123
-                - Username: user, Password: user123
-                """)
-
 # Only show main content if logged in
 if st.session_state.logged_in:
     #%% Main welcome content
@@ -123,7 +47,7 @@ if st.session_state.logged_in:
         st.markdown("Technical support of OrcaFlex simulation: autodept@safelink.no.")
     st.divider()
         
-    image = Image.open(os.path.join('figures', 'Cover-final0.jpg'))
+    image = cached_image(os.path.join('figures', 'Cover-final0.jpg'), 1000)
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if st.session_state.image_welcome:
@@ -135,54 +59,51 @@ if st.session_state.logged_in:
     st.divider()
     with col1:
         # AHC introduction
-        with open("./materials/AHC_introduction.md", "r", encoding="utf-8") as file:
-            AHC_introduction = file.read()
+        AHC_introduction = cached_markdown(os.path.join("materials", "AHC_introduction.md"))
         st.markdown(AHC_introduction, unsafe_allow_html=True)
         
         # a AHC photo
         col11, col21, col31 = st.columns([1, 1, 1])
         with col21:
             st.markdown("<br>"*1, unsafe_allow_html=True)
-            image = Image.open(os.path.join('figures', 'IAHC 700 undocked 003.png'))
+            image = cached_image(os.path.join('figures', 'IAHC 700 undocked 003.png'), 200)
             st.image(image, width=200)
             
     with col2:
         # PHC introduction
-        with open("./materials/PHC_introduction.md", "r", encoding="utf-8") as file:
-            PHC_introduction = file.read()
+        PHC_introduction = cached_markdown(os.path.join("materials", "PHC_introduction.md"))
         st.markdown(PHC_introduction, unsafe_allow_html=True)
         
         # a PHC photo
         col1, col2, col3 = st.columns([1, 6, 1])
         with col2:
             st.markdown("<br>"*1, unsafe_allow_html=True)
-            image = Image.open(os.path.join('figures', '10.png'))
+            image = cached_image(os.path.join('figures', '10.png'), 400)
             st.image(image, width=400)
     
     # Simulation service
     col1, col2 = st.columns([3, 1])
     with col1:
         st.markdown("<br>"*1, unsafe_allow_html=True)
-        with open("./materials/simulation_service.md", "r", encoding="utf-8") as file:
-            simulation_service = file.read()
+        simulation_service = cached_markdown(os.path.join("materials", "simulation_service.md"))
         st.markdown(simulation_service, unsafe_allow_html=True)
     
     with col2:
         # decorative image
         st.markdown("<br>"*6, unsafe_allow_html=True)
-        image = Image.open( os.path.join('figures', 'shutterstock_162848774.jpg'))
+        image = cached_image(os.path.join('figures', 'shutterstock_162848774.jpg'), 270)
         st.image(image, width=270)
 
     # OrcaFlex simulation image
     col1, col2, col3 = st.columns([1, 6, 1])
     with col2:
-        image = Image.open(os.path.join('figures', 'orcaflex_simulation.png'))
+        image = cached_image(os.path.join('figures', 'orcaflex_simulation.png'), 1000)
         st.image(image, width=1000)
         
     
     #%% Safelink certificates
     st.divider()
-    image_certificate = Image.open( os.path.join('figures', 'shutterstock_1904707174.jpg'))
+    image_certificate = cached_image(os.path.join('figures', 'shutterstock_1904707174.jpg'), 500)
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
         st.markdown("<br><br>", unsafe_allow_html=True)
@@ -0,0 +1,333 @@
+"""Authentication: hashed credential store, signed session tokens and login rate limiting.
+
+Credentials live in a JSON file outside the source tree (SAFELINK_CREDENTIALS, default
+~/.safelink/credentials.json):
+
+    {"secret": "<random hex used to sign session tokens>",
+     "users": {"alice": {"hash": "scrypt$16384$8$1$<salt>$<key>", "team": "ops"},
+               "demo":  {"hash": "...", "demo": true}}}
+
+Manage it with
+    python -m utils.auth add alice --team ops        (prompts for the password)
+    python -m utils.auth remove alice
+
+Passwords are hashed with scrypt (salted, memory-hard) and compared with hmac.compare_digest.
+Successful verifications are remembered for a while under an HMAC of the credentials, so
+repeated logins (e.g. at shift change) do not recompute scrypt, and at most SCRYPT_CONCURRENCY
+hashes are computed at a time to bound memory. Failed attempts are limited per user name and per
+client address with token buckets.
+
+After a login the browser gets a signed token in a cookie (TOKEN_COOKIE) that logs the user in
+again without a password until it expires (SAFELINK_TOKEN_HOURS, default 12). Tokens are kept
+out of the URL, where a copied link would log its recipient in as the sender. Tokens carry the user's token
+generation from the credentials file; logging out or changing the password increments it, which
+revokes every token issued to that user before.
+"""
+import argparse
+import base64
+import getpass
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from utils.results_store import file_lock
+from utils.session_store import detach_session
+
+CREDENTIALS_FILE = os.environ.get(
+    "SAFELINK_CREDENTIALS", os.path.join(os.path.expanduser("~"), ".safelink", "credentials.json")
+)
+TOKEN_HOURS = float(os.environ.get("SAFELINK_TOKEN_HOURS", "12"))
+TOKEN_COOKIE = "safelink_token"
+TOKEN_PARAM = "token"               # tokens were passed in the URL before; dropped from it on sight
+
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1     # 16 MiB and ~50 ms per hash
+SCRYPT_CONCURRENCY = max(2, (os.cpu_count() or 2) // 2)
+CACHE_SIZE = 4096
+CACHE_SECONDS = 15 * 60
+BUCKET_CAPACITY = 5                # failed attempts allowed in a burst
+BUCKET_REFILL = 1 / 30             # one more attempt every 30 s
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def hash_password(password, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Encoded scrypt hash of a password with a random salt"""
+    salt = secrets.token_bytes(16)
+    key = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=32)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(key)}"
+
+
+_scrypt_slots = threading.BoundedSemaphore(SCRYPT_CONCURRENCY)
+
+
+def verify_password(password, encoded):
+    """Check a password against an encoded hash in constant time"""
+    try:
+        scheme, n, r, p, salt, key = encoded.split("$")
+        if scheme != "scrypt":
+            return False
+        expected = _unb64(key)
+        with _scrypt_slots:
+            actual = hashlib.scrypt(password.encode("utf-8"), salt=_unb64(salt), n=int(n), r=int(r), p=int(p),
+                                    dklen=len(expected), maxmem=128 * int(n) * int(r) * (int(p) + 1) + 2 ** 20)
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+class TokenBucket:
+    """Per-key token buckets; each failed attempt takes a token"""
+
+    def __init__(self, capacity=BUCKET_CAPACITY, refill_per_second=BUCKET_REFILL, max_keys=100000):
+        self.capacity = capacity
+        self.refill = refill_per_second
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _level(self, key, now):
+        tokens, stamp = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - stamp) * self.refill)
+
+    def allowed(self, key):
+        """True if the key has a token left"""
+        with self._lock:
+            return self._level(key, time.monotonic()) >= 1
+
+    def consume(self, key):
+        with self._lock:
+            now = time.monotonic()
+            self._buckets[key] = (max(0.0, self._level(key, now) - 1), now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+    def retry_after(self, key):
+        """Seconds until the key gets a token again"""
+        with self._lock:
+            level = self._level(key, time.monotonic())
+        return 0.0 if level >= 1 else (1 - level) / self.refill
+
+
+class CredentialStore:
+    """Users and hashes from the credentials file, reloaded when the file changes"""
+
+    def __init__(self, path=CREDENTIALS_FILE):
+        self.path = path
+        self._stamp = None
+        self._data = {"secret": "", "users": {}}
+        self._lock = threading.Lock()
+        self._verified = OrderedDict()      # HMAC of (user, password, hash) -> verification time
+        self.limiter = TokenBucket()
+
+    def _load(self):
+        try:
+            stamp = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return self._data
+        if stamp != self._stamp:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+            with self._lock:
+                self._data, self._stamp = data, stamp
+                self._verified.clear()
+        return self._data
+
+    @property
+    def configured(self):
+        return bool(self._load()["users"])
+
+    @property
+    def secret(self):
+        return self._load()["secret"].encode("utf-8")
+
+    def user(self, username):
+        return self._load()["users"].get(username)
+
+    def demo_user(self):
+        """Name of the account flagged for password-less demo access, if any"""
+        return next((name for name, record in self._load()["users"].items() if record.get("demo")), None)
+
+    def _cache_key(self, username, password, encoded):
+        message = "\x1f".join((username, password, encoded)).encode("utf-8")
+        return hmac.new(self.secret, message, hashlib.sha256).digest()
+
+    def verify(self, username, password):
+        """User record if the password matches, else None"""
+        record = self.user(username)
+        if record is None:
+            # spend the same time as for a real user so names cannot be probed
+            verify_password(password, _DUMMY_HASH)
+            return None
+        key = self._cache_key(username, password, record["hash"])
+        now = time.monotonic()
+        with self._lock:
+            verified_at = self._verified.get(key)
+        if verified_at is not None and now - verified_at < CACHE_SECONDS:
+            return record
+        if not verify_password(password, record["hash"]):
+            return None
+        with self._lock:
+            self._verified[key] = now
+            self._verified.move_to_end(key)
+            while len(self._verified) > CACHE_SIZE:
+                self._verified.popitem(last=False)
+        return record
+
+    def authenticate(self, username, password, client=None):
+        """Returns (record, error message); the record is None when the login is refused"""
+        keys = [f"user:{username}"] + ([f"client:{client}"] if client else [])
+        blocked = [key for key in keys if not self.limiter.allowed(key)]
+        if blocked:
+            wait = max(self.limiter.retry_after(key) for key in blocked)
+            return None, f"Too many failed attempts, try again in {wait:.0f} s"
+        record = self.verify(username, password)
+        if record is None:
+            for key in keys:
+                self.limiter.consume(key)
+            return None, "Invalid username or password"
+        return record, None
+
+    # -- session tokens -----------------------------------------------------------------------
+
+    def issue_token(self, username, hours=TOKEN_HOURS):
+        generation = (self.user(username) or {}).get("token_generation", 0)
+        payload = _b64(json.dumps([username, int(time.time() + hours * 3600), generation]).encode("utf-8"))
+        signature = _b64(hmac.new(self.secret, payload.encode("ascii"), hashlib.sha256).digest())
+        return f"{payload}.{signature}"
+
+    def verify_token(self, token):
+        """User name of a valid, unexpired and unrevoked token for an existing user, else None"""
+        if not token or "." not in token or not self.secret:
+            return None
+        try:
+            # tokens come from the URL; anything that is not ASCII was not issued here
+            payload, _, signature = (part.encode("ascii") for part in token.partition("."))
+        except UnicodeEncodeError:
+            return None
+        expected = _b64(hmac.new(self.secret, payload, hashlib.sha256).digest()).encode("ascii")
+        if not hmac.compare_digest(signature, expected):
+            return None
+        try:
+            username, expires, generation = json.loads(_unb64(payload.decode("ascii")))
+        except (ValueError, TypeError):
+            return None
+        record = self.user(username)
+        if expires < time.time() or record is None or generation != record.get("token_generation", 0):
+            return None
+        return username
+
+    def revoke_tokens(self, username):
+        """Invalidate all tokens issued to the user so far (logout)"""
+        if self.user(username) is None:
+            return
+        with self._editing() as data:
+            record = data.get("users", {}).get(username)
+            if record is not None:
+                record["token_generation"] = record.get("token_generation", 0) + 1
+
+    # -- management ---------------------------------------------------------------------------
+
+    def save_user(self, username, password, team=None, demo=False):
+        record = {"hash": hash_password(password)}
+        if team:
+            record["team"] = team
+        if demo:
+            record["demo"] = True
+        with self._editing() as data:
+            data["secret"] = data.get("secret") or secrets.token_hex(32)
+            previous = data.get("users", {}).get(username, {})
+            # a new password also revokes the tokens issued with the old one
+            record["token_generation"] = previous.get("token_generation", 0) + bool(previous)
+            data.setdefault("users", {})[username] = record
+
+    def remove_user(self, username):
+        with self._editing() as data:
+            data.get("users", {}).pop(username, None)
+
+    @contextmanager
+    def _editing(self):
+        """Copy of the credentials to modify, written back under an exclusive lock on the file"""
+        with file_lock(self.path):
+            self._stamp = None      # re-read: another process may have written within the mtime resolution
+            data = json.loads(json.dumps(self._load()))
+            yield data
+            self._write(data)
+
+    def _write(self, data):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp, self.path)
+        self._stamp = None          # reload even when the file system's mtime did not change
+
+
+_DUMMY_HASH = hash_password(secrets.token_hex(8), n=SCRYPT_N)
+
+_store = None
+
+
+def credential_store():
+    """Process-wide CredentialStore of the configured credentials file"""
+    global _store
+    if _store is None:
+        _store = CredentialStore()
+    return _store
+
+
+def logout(state, query_params):
+    """Log a browser session out (the logout buttons): revoke the user's tokens, so the token cookie
+    no longer logs in, and forget the token, the stored session and the user's library rows"""
+    if state.get('username'):
+        credential_store().revoke_tokens(state['username'])
+    state['logged_in'] = False
+    state['username'] = ''
+    state['team'] = None
+    state['show_login_dialog'] = True
+    state.pop('auth_token', None)
+    query_params.pop(TOKEN_PARAM, None)
+    detach_session(state, query_params)
+    for key in ('library_rows', 'library_signature', 'library_cursor'):
+        state.pop(key, None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the Safelink credentials file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="add a user or change a password")
+    add.add_argument("username")
+    add.add_argument("--team")
+    add.add_argument("--demo", action="store_true", help="allow password-less 'Demo Login' as this user")
+    remove = sub.add_parser("remove", help="remove a user")
+    remove.add_argument("username")
+    args = parser.parse_args(argv)
+
+    store = credential_store()
+    if args.command == "add":
+        password = getpass.getpass(f"Password for {args.username}: ")
+        if not password or password != getpass.getpass("Repeat password: "):
+            print("Passwords are empty or do not match", file=sys.stderr)
+            return 1
+        store.save_user(args.username, password, team=args.team, demo=args.demo)
+    else:
+        store.remove_user(args.username)
+    print(f"Updated {store.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Batch export of a parameter sweep around the current configuration (runs as a job).
+
+A sweep is the base configuration plus a list of axes, each a (section, key, values) triple;
+the cases are the cartesian product of the axes. The artifact is a zip of either
+    "full"      one INI file per case and a cases.csv index of the swept values and hashes
+    "delta"     the base INI file and one line of changed keys per case (see utils.config_delta)
+    "binary"    all cases in one binary configuration file (see utils.config_binary) and cases.csv
+"""
+import configparser
+import csv
+import io
+import itertools
+import math
+import os
+import zipfile
+from datetime import datetime
+
+import numpy as np
+
+from utils.config_model import config_hash, write_config
+from utils.config_delta import DeltaArchiveWriter
+from utils.config_binary import record_from_config, pack, U32
+from utils.config_library import FUNCTION_BITS, function_mask
+
+MAX_CASES = 100000
+SWEEP_SECTIONS = ("Unit_Parameters", "Payload_Parameters", "Function_Parameters")
+FORMATS = ("full", "delta", "binary")
+
+
+def sweep_values(start, stop, steps):
+    """Evenly spaced values from start to stop (inclusive), rounded for readable INI files"""
+    return [float(v) for v in np.round(np.linspace(start, stop, int(steps)), 6)]
+
+
+def case_count(axes):
+    return math.prod(len(axis["values"]) for axis in axes) if axes else 0
+
+
+def sweep_params(config, axes, version, capability_mask, format="full"):
+    """Job parameters of a sweep around a configuration (configparser).
+
+    capability_mask is the unit's mask from utils.capabilities, looked up by the page so the
+    job workers do not load the catalog (and Streamlit with it).
+    """
+    for axis in axes:
+        if axis["section"] not in SWEEP_SECTIONS:
+            raise ValueError(f"Section {axis['section']} cannot be swept")
+    unsupported = [function for function, bit in FUNCTION_BITS.items() if function_mask(config) & bit & ~capability_mask]
+    if unsupported:
+        raise ValueError(f"Unit {config['Unit']['unit_id']} does not support {', '.join(unsupported)}")
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format '{format}'")
+    count = case_count(axes)
+    if not 0 < count <= MAX_CASES:
+        raise ValueError(f"A sweep has 1 to {MAX_CASES} cases, this one has {count}")
+    return {
+        "base": {section: dict(config[section]) for section in config.sections()},
+        "axes": axes,
+        "version": version,
+        "format": format,
+        "capability_mask": int(capability_mask),
+    }
+
+
+def sweep_cases(params):
+    """Yield (case number, swept values, configparser) for every case; the parser is reused"""
+    config = configparser.ConfigParser()
+    config.read_dict(params["base"])
+    axes = params["axes"]
+    for number, values in enumerate(itertools.product(*(axis["values"] for axis in axes)), start=1):
+        for axis, value in zip(axes, values):
+            config[axis["section"]][axis["key"]] = str(value)
+        yield number, values, config
+
+
+def export_sweep(params, job):
+    """Job function: write the zip of all cases and return its path"""
+    if params.get("format") == "delta":
+        return export_sweep_delta(params, job)
+    if params.get("format") == "binary":
+        return export_sweep_binary(params, job)
+    total = case_count(params["axes"])
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    path = job.artifact_path(".zip")
+    tmp = f"{path}.tmp"
+    index = io.StringIO()
+    writer = csv.writer(index)
+    writer.writerow(["case", "file", "config_hash"] + [f"{axis['section']}.{axis['key']}" for axis in params["axes"]])
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for number, values, config in sweep_cases(params):
+                name = f"case_{number:05d}.ini"
+                ini = io.StringIO()
+                write_config(config, ini, params["version"], generated_at)
+                archive.writestr(name, ini.getvalue())
+                writer.writerow([number, name, config_hash(config), *values])
+                job.progress(number / total, f"{number} / {total} cases")
+            archive.writestr("cases.csv", index.getvalue())
+    except BaseException:
+        # cancelled or failed: no partial artifact is left behind
+        os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return path
+
+
+def export_sweep_delta(params, job):
+    """Write the sweep as base INI plus per-case deltas"""
+    total = case_count(params["axes"])
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    path = job.artifact_path(".zip")
+    tmp = f"{path}.tmp"
+    base = configparser.ConfigParser()
+    base.read_dict(params["base"])
+    try:
+        with DeltaArchiveWriter(tmp, base, params["version"], generated_at) as writer:
+            for number, _, config in sweep_cases(params):
+                writer.add(config, number)
+                job.progress(number / total, f"{number} / {total} cases")
+    except BaseException:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return path
+
+
+def export_sweep_binary(params, job):
+    """Write the sweep as one multi-record binary configuration file"""
+    total = case_count(params["axes"])
+    path = job.artifact_path(".zip")
+    tmp = f"{path}.tmp"
+    records = io.BytesIO()
+    index = io.StringIO()
+    writer = csv.writer(index)
+    writer.writerow(["case", "config_hash"] + [f"{axis['section']}.{axis['key']}" for axis in params["axes"]])
+    try:
+        for number, values, config in sweep_cases(params):
+            data = pack(record_from_config(config))
+            records.write(U32.pack(len(data)) + data)
+            writer.writerow([number, config_hash(config), *values])
+            job.progress(number / total, f"{number} / {total} cases")
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("cases.slcf", records.getvalue())
+            archive.writestr("cases.csv", index.getvalue())
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,141 @@
+"""Capability matrix of the catalog units, precompiled to one bit mask per Unit ID.
+
+Every unit starts from the default of its category (CATEGORY_MASKS). Units with non-default
+capabilities are overridden by capability columns in the catalog or, taking precedence, in the
+optional sidecar file materials/unit_capabilities.csv:
+
+    Unit ID,quick_lifting,constant_tension,ahc,rod_lock,rod_orientation
+    PHCC 60-4000-001,,0,,,          <- this unit has no constant tension; blanks keep the default
+
+The masks are built once per catalog version (cached alongside the catalog arrays in the
+shared cache). UI gating, export validation and the batch tooling all read the same mask; the
+special function bits are the bits of utils.config_library.FUNCTION_BITS, so checking a
+configuration's function mask against a unit is one AND, also over whole arrays of cases.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.catalog import CATALOG_FILE, catalog_arrays, load_unit_data
+from utils.config_library import FUNCTION_BITS, function_mask
+from utils.shared_cache import file_key, shared_cache
+
+SIDECAR_FILE = os.path.join('materials', 'unit_capabilities.csv')
+
+CAPABILITY_BITS = {
+    "quick_lifting": FUNCTION_BITS["quick_lifting"],
+    "constant_tension": FUNCTION_BITS["constant_tension"],
+    "ahc": FUNCTION_BITS["active_heave_compensation"],
+    "rod_lock": FUNCTION_BITS["rod_lock"],
+    "rod_orientation": 16,
+}
+CAPABILITY_LABELS = {
+    "constant_tension": "Constant Tension Mode",
+    "ahc": "Active Heave Compensation",
+    "quick_lifting": "Quick Lifting Mode",
+    "rod_lock": "Rod Lock/Unlock Mode",
+    "rod_orientation": "Rod Orientation Control",
+}
+# special function in the configuration -> capability it needs
+FUNCTION_CAPABILITIES = {
+    "quick_lifting": "quick_lifting",
+    "constant_tension": "constant_tension",
+    "active_heave_compensation": "ahc",
+    "rod_lock": "rod_lock",
+}
+FUNCTION_MASK = sum(FUNCTION_BITS.values())
+
+
+def mask_of(*capabilities):
+    return sum(CAPABILITY_BITS[name] for name in capabilities)
+
+
+CATEGORY_MASKS = {
+    "IAHC": mask_of("quick_lifting", "constant_tension", "ahc", "rod_lock", "rod_orientation"),
+    "PHC": mask_of("quick_lifting", "constant_tension", "rod_lock", "rod_orientation"),
+    "Shock absorber": mask_of("quick_lifting", "rod_lock", "rod_orientation"),
+}
+NO_UNIT_MASK = mask_of("rod_orientation")
+
+
+def source_key():
+    """Version of the catalog and the capability sidecar, changes when either file does"""
+    key = file_key(CATALOG_FILE)
+    if os.path.exists(SIDECAR_FILE):
+        key += "|" + file_key(SIDECAR_FILE)
+    return key
+
+
+def _overrides(table):
+    """{unit_id: (set bits, cleared bits)} from the capability columns of a table"""
+    columns = {str(column).strip().lower().replace(" ", "_"): column for column in table.columns}
+    present = [name for name in CAPABILITY_BITS if name in columns]
+    if "unit_id" not in columns or not present:
+        return {}
+    overrides = {}
+    for _, row in table.iterrows():
+        set_bits = clear_bits = 0
+        for name in present:
+            value = row[columns[name]]
+            if pd.isna(value) or str(value).strip() == "":
+                continue
+            if str(value).strip().lower() in ("1", "1.0", "true", "yes", "y", "x"):
+                set_bits |= CAPABILITY_BITS[name]
+            else:
+                clear_bits |= CAPABILITY_BITS[name]
+        overrides[str(row[columns["unit_id"]])] = (set_bits, clear_bits)
+    return overrides
+
+
+def _build_masks():
+    arrays = catalog_arrays()
+    masks = np.array([CATEGORY_MASKS.get(str(category), 0) for category in arrays["category"]], dtype=np.uint8)
+    overrides = _overrides(load_unit_data())
+    if os.path.exists(SIDECAR_FILE):
+        overrides.update(_overrides(pd.read_csv(SIDECAR_FILE, dtype=str)))
+    for row, unit_id in enumerate(arrays["unit_id"]):
+        if str(unit_id) in overrides:
+            set_bits, clear_bits = overrides[str(unit_id)]
+            masks[row] = (int(masks[row]) | set_bits) & ~clear_bits & 0xFF
+    return {"unit_id": np.asarray(arrays["unit_id"]), "mask": masks}
+
+
+def catalog_masks():
+    """Capability masks (uint8) aligned with utils.catalog.catalog_arrays"""
+    return shared_cache().arrays("capabilities", source_key(), _build_masks)["mask"]
+
+
+@st.cache_data
+def _mask_lookup(key):
+    table = shared_cache().arrays("capabilities", key, _build_masks)
+    return {str(unit_id): int(mask) for unit_id, mask in zip(table["unit_id"], table["mask"])}
+
+
+def capability_mask(selected_unit, category):
+    """Capability mask of the selected unit (tuple of unit type and Unit ID)"""
+    if not selected_unit:
+        return NO_UNIT_MASK
+    unit_id = selected_unit[1] if isinstance(selected_unit, tuple) else str(selected_unit)
+    mask = _mask_lookup(source_key()).get(unit_id)
+    return CATEGORY_MASKS.get(category, 0) if mask is None else mask
+
+
+def capability_dict(mask):
+    """{capability: bool} view of a mask, e.g. {"ahc": False, "quick_lifting": True, ...}"""
+    return {name: bool(mask & bit) for name, bit in CAPABILITY_BITS.items()}
+
+
+def unsupported_bits(function_masks, capability_masks):
+    """Enabled special function bits the unit does not support (ints or arrays)"""
+    return np.bitwise_and(np.bitwise_and(function_masks, FUNCTION_MASK), np.invert(np.asarray(capability_masks, dtype=np.uint8)))
+
+
+def unsupported_functions(config, mask=None):
+    """Special functions enabled in a configuration that its unit does not support"""
+    if mask is None:
+        unit = config["Unit"]
+        mask = capability_mask((unit["unit_type"], unit["unit_id"]), unit["category"])
+    bits = int(unsupported_bits(function_mask(config), mask))
+    return [function for function, capability in FUNCTION_CAPABILITIES.items() if bits & CAPABILITY_BITS[capability]]
@@ -0,0 +1,87 @@
+"""Safelink unit catalog loaded from materials/Safelink_units.xlsx"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.shared_cache import file_key, shared_cache
+
+CATALOG_FILE = os.path.join('materials', 'Safelink_units.xlsx')
+
+
+def _read_unit_table():
+    """Catalog columns as arrays, read from the Excel file"""
+    df = pd.read_excel(CATALOG_FILE, header=0)
+    df.sort_values(by="Unit Type", inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    return {
+        column: df[column].to_numpy(dtype=None if pd.api.types.is_numeric_dtype(df[column]) else str)
+        for column in df.columns
+    }
+
+
+@st.cache_resource(max_entries=1)
+def _unit_frame(key):
+    """Catalog DataFrame over the memory-mapped columns, numeric columns are not copied"""
+    return pd.DataFrame(shared_cache().arrays("catalog_table", key, _read_unit_table), copy=False)
+
+
+# Import safelink units from Excel file
+def load_unit_data():
+    """Load and process unit data from Excel file (parsed once per host, see utils.shared_cache).
+
+    The frame is shared by all sessions and its numeric columns are read-only, so filter it, don't modify it.
+    """
+    try:
+        return _unit_frame(file_key(CATALOG_FILE))
+    except Exception as e:
+        st.error(f"Error loading unit data: {e}")
+        return pd.DataFrame()
+
+
+def unit_height(overall_size):
+    """Height [m] from the 'L/W/H' overall size column"""
+    try:
+        return float(str(overall_size).split("/")[2])
+    except (IndexError, ValueError):
+        return np.nan
+
+
+def unit_arrays(units):
+    """Numeric catalog columns as aligned NumPy arrays (one entry per unit)"""
+    return {
+        "unit_id": units["Unit ID"].to_numpy(dtype=str),
+        "unit_type": units["Unit Type"].to_numpy(dtype=str),
+        "category": units["Unit Type"].map(unit_category).to_numpy(dtype=str),
+        "swl": units["SWL [Te]"].to_numpy(dtype=float),
+        "stroke": units["stroke [m]"].to_numpy(dtype=float),
+        "design_water_depth": units["design water depth [m]"].to_numpy(dtype=float),
+        "gas_volume": units["gas volume [m3 @ atm]"].to_numpy(dtype=float),
+        "design_pressure": units["design pressure [bar]"].to_numpy(dtype=float),
+        "height": units["overall size [L/W/H, m]"].map(unit_height).to_numpy(dtype=float),
+    }
+
+
+def catalog_arrays():
+    """unit_arrays of the catalog, memory-mapped read-only from the shared cache"""
+    return shared_cache().arrays("catalog", file_key(CATALOG_FILE), lambda: unit_arrays(load_unit_data()))
+
+
+def unit_rating(unit_id):
+    """(SWL [Te], stroke [m]) of a catalog unit, NaN when the unit is not in the catalog"""
+    arrays = catalog_arrays()
+    rows = np.flatnonzero(arrays["unit_id"] == str(unit_id))
+    if len(rows) == 0:
+        return np.nan, np.nan
+    return float(arrays["swl"][rows[0]]), float(arrays["stroke"][rows[0]])
+
+
+def unit_category(unit_type):
+    """Category used throughout the tool for a catalog 'Unit Type'"""
+    if "iahc" in unit_type.lower():
+        return "IAHC"
+    if "poseidon" in unit_type.lower():
+        return "PHC"
+    return "Shock absorber"
+
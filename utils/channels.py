@@ -0,0 +1,90 @@
+"""Result channels that can be requested from the Safelink external function"""
+
+# Body and rod results (the first 15 entries are body results, the rest rod results)
+RESULT_OPTIONS = [
+    "Force (F_fb)",
+    "Force (d_PID_CT_dt)",
+    "Force (F_CT_point)",
+    "Force External (F_external)",
+    "Force Internal (F_internal)",
+    "Force Passive (F_passive)",
+    "Force Active (F_active)",
+    "Force Spring (F_spring)",
+    "Force Damping (F_damping)",
+    "Force Friction (F_friction)",
+    "Force Feedforward (F_ff)",
+    "Force (F_CT)",
+    "Force (Target_CT)",
+    "Measured Force (F_IAHC_total_m)",
+    "Measured Stroke (S_m)",
+    "Measured Stroke Velocity (vS_m)",
+    "Measured Stroke Acc (acc_S_m)",
+    "Measured velocity (v_rod_m)",
+    "Measured heave (h_rod_m)",
+    "Setpoint (F_sp_CT)",
+    "Setpoint (F_sp_HC)",
+    "Setpoint (v_rod_sp)",
+    "Setpoint (h_rod_sp)",
+    "Orcaflex Stroke (S_orc)",
+    "Orcaflex Stroke Velocity (vS_orc)",
+    "Filtered (S_m_LP)",
+    "Filtered (vS_m_LP)",
+    "Filtered (acc_S_m_LP)",
+    "Tracking error (e_h_rod)",
+    "Tracking error (e_v_payload)",
+    "Tracking error (e_F_CT)",
+    "Tracking error (e_v_body)",
+    "S-curve (S_curve_x)",
+    "S-curve (S_curve_v)",
+    "S-curve (S_curve_j)",
+    "S-curve (S_curve_acc)",
+    "S-curve (S_curve_x_k)",
+    "S-curve (S_curve_v_k)",
+    "S-curve (S_curve_acc_k)",
+    "F_fb_limit_lower",
+    "F_fb_limit_upper",
+]
+BODY_RESULT_OPTIONS = RESULT_OPTIONS[:15]
+ROD_RESULT_OPTIONS = RESULT_OPTIONS[15:]
+
+PAYLOAD_RESULT_OPTIONS = [
+    "acc_payload_MRU",
+    "acc_external_MRU",
+    "acc_external_MRU_inverted",
+    "acc_payload_sp",
+    "acc_payload_sp_fb",
+    "v_payload_sp_fb",
+    "v_payload_m",
+    "v_external_MRU",
+    "h_external_MRU",
+    "v_external_MRU_inverted",
+    "h_external_MRU_inverted",
+    "acc_limit_lower",
+    "acc_limit_upper",
+    "v_payload_limit_lower",
+    "v_payload_limit_upper",
+]
+
+
+def channel_id(label):
+    """Return the channel name of a result label, e.g. 'Force (F_fb)' -> 'F_fb'"""
+    if label.endswith(")") and "(" in label:
+        return label[label.rindex("(") + 1:-1]
+    return label
+
+
+def selected_channels(selected_results):
+    """Flatten st.session_state.selected_results into a list of channel names"""
+    channels = []
+    for group in ("body_results", "rod_results", "payload_results"):
+        for label in (selected_results or {}).get(group, []):
+            name = channel_id(label)
+            if name not in channels:
+                channels.append(name)
+    return channels
+
+
+# Numeric ids of the channels for the binary configuration format. Append only: the position
+# of a channel is its id in files already written.
+CHANNEL_NAMES = [channel_id(label) for label in RESULT_OPTIONS + PAYLOAD_RESULT_OPTIONS]
+CHANNEL_NUMBERS = {name: number for number, name in enumerate(CHANNEL_NAMES)}
@@ -0,0 +1,211 @@
+"""Compact binary configuration format for machine consumers (.slcf).
+
+The INI file stays the human-readable export. This format carries the same configuration with
+typed values, so loaders read it with fixed offsets instead of splitting strings: floats keep
+full double precision and result selections are channel ids (utils.channels.CHANNEL_NUMBERS).
+
+Layout, little-endian, schema version 1:
+
+    header      4s magic b"SLCF", u16 schema version, u16 reserved (0)
+    fixed       u8 category, u8 special function bits, u8 customized results,
+                u8 x4 enums: rod_orientation, rod_lock_operation, rod_lock_mode, motion_reference
+                (index into ENUMS, 255 = not set)
+    floats      f64 x30: FLOAT_FIELDS, then unit parameters 1-10, then payload parameters 1-10
+                (NaN = not set, e.g. parameters of a disabled special function)
+    strings     unit_type, unit_id: u16 byte length + UTF-8
+    results     body, rod, payload: u16 count + u16 channel id each
+
+A file of several configurations (batch export) is a sequence of records, each prefixed with
+its u32 byte length.
+"""
+import math
+import struct
+
+from utils.channels import CHANNEL_NAMES, CHANNEL_NUMBERS, channel_id
+from utils.config_library import FUNCTION_BITS
+from utils.config_model import SPECIAL_FUNCTION_KEYS
+
+MAGIC = b"SLCF"
+SCHEMA_VERSION = 1
+ABSENT = 255
+
+CATEGORIES = ["IAHC", "PHC", "Shock absorber"]
+ENUMS = {
+    "rod_orientation": ["Rod Down (Standard)", "Rod Up (Inverted)"],
+    "rod_lock_operation": ["Lifting Down", "Lifting Up", "Both Directions"],
+    "rod_lock_mode": ["Auto Lock at Depth", "Auto Unlock at Depth"],
+    "motion_reference": ["Onboard", "External"],
+}
+FLOAT_FIELDS = [
+    "rod_lock_depth", "lock_hold_time", "lock_speed", "quick_start_time", "quick_acceleration_limit",
+    "tension_start_time", "tension_tolerance", "heave_start_time", "max_stroke_speed", "max_force_limit",
+]
+# parameters written only when their special function is enabled (as in the INI export)
+FUNCTION_FIELDS = {
+    "rod_lock": ["rod_lock_depth", "rod_lock_operation", "rod_lock_mode", "lock_hold_time", "lock_speed"],
+    "quick_lifting": ["quick_start_time", "quick_acceleration_limit"],
+    "constant_tension": ["tension_start_time", "tension_tolerance"],
+    "active_heave_compensation": ["heave_start_time", "max_stroke_speed", "motion_reference"],
+}
+RESULT_GROUPS = ["body_results", "rod_results", "payload_results"]
+STATE_RESULT_KEYS = {
+    "body_results": "selected_body_results",
+    "rod_results": "selected_rod_results",
+    "payload_results": "selected_payload_results",
+}
+
+HEADER = struct.Struct("<4sHH")
+FIXED = struct.Struct("<BBB4B")
+FLOATS = struct.Struct(f"<{len(FLOAT_FIELDS) + 20}d")
+U16 = struct.Struct("<H")
+U32 = struct.Struct("<I")
+
+
+def _unit_field(selected_unit, index):
+    return selected_unit[index] if isinstance(selected_unit, tuple) else str(selected_unit)
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def record_from_state(state):
+    """Typed configuration record of the session state (or any mapping), like build_config"""
+    functions = {key: bool(state[state_key]) for key, state_key in SPECIAL_FUNCTION_KEYS.items()}
+    parameters = {name: None for name in FLOAT_FIELDS + list(ENUMS)}
+    parameters["rod_orientation"] = state["rod_orientation"]
+    parameters["max_force_limit"] = float(state["max_force_limit"])
+    for function, names in FUNCTION_FIELDS.items():
+        if functions[function]:
+            for name in names:
+                parameters[name] = state[name] if name in ENUMS else float(state[name])
+    return {
+        "category": str(state["selected_unit_type"]),
+        "unit_type": _unit_field(state["selected_unit"], 0),
+        "unit_id": _unit_field(state["selected_unit"], 1),
+        "functions": functions,
+        "parameters": parameters,
+        "unit_parameters": [float(state[f"saved_number_{i}_0"]) for i in range(1, 11)],
+        "payload_parameters": [float(state[f"saved_number_{i}_1"]) for i in range(1, 11)],
+        "customized_results": bool(state["customized_results"]),
+        "results": {group: [channel_id(label) for label in state[key] or []] for group, key in STATE_RESULT_KEYS.items()},
+    }
+
+
+def record_from_config(config):
+    """Typed configuration record of an INI configuration (configparser)"""
+    function_parameters = config["Function_Parameters"]
+    parameters = {name: None for name in FLOAT_FIELDS + list(ENUMS)}
+    for name in ENUMS:
+        parameters[name] = function_parameters.get(name)
+    for name in FLOAT_FIELDS:
+        parameters[name] = _float(function_parameters.get(name))
+    parameters["max_force_limit"] = float(config["Safety_Parameters"]["max_force_limit"])
+    results = {}
+    for group in RESULT_GROUPS:
+        value = config["Results"][group]
+        results[group] = [] if value == "None" else [channel_id(item.strip()) for item in value.split(",") if item.strip()]
+    return {
+        "category": config["Unit"]["category"],
+        "unit_type": config["Unit"]["unit_type"],
+        "unit_id": config["Unit"]["unit_id"],
+        "functions": {key: config["Special_Functions"].get(key) == "True" for key in FUNCTION_BITS},
+        "parameters": parameters,
+        "unit_parameters": [float(config["Unit_Parameters"][f"parameter_{i}"]) for i in range(1, 11)],
+        "payload_parameters": [float(config["Payload_Parameters"][f"parameter_{i}"]) for i in range(1, 11)],
+        "customized_results": config["Results"]["customized"] == "True",
+        "results": results,
+    }
+
+
+def _string(text):
+    data = text.encode("utf-8")
+    return U16.pack(len(data)) + data
+
+
+def pack(record):
+    """Encode a configuration record as bytes"""
+    parameters = record["parameters"]
+    enums = [ABSENT if parameters[name] is None else ENUMS[name].index(parameters[name]) for name in ENUMS]
+    functions = sum(bit for key, bit in FUNCTION_BITS.items() if record["functions"][key])
+    floats = [math.nan if parameters[name] is None else parameters[name] for name in FLOAT_FIELDS]
+    parts = [
+        HEADER.pack(MAGIC, SCHEMA_VERSION, 0),
+        FIXED.pack(CATEGORIES.index(record["category"]), functions, int(record["customized_results"]), *enums),
+        FLOATS.pack(*floats, *record["unit_parameters"], *record["payload_parameters"]),
+        _string(record["unit_type"]),
+        _string(record["unit_id"]),
+    ]
+    for group in RESULT_GROUPS:
+        try:
+            ids = [CHANNEL_NUMBERS[name] for name in record["results"][group]]
+        except KeyError as e:
+            raise ValueError(f"Result channel {e} has no channel id") from None
+        parts.append(U16.pack(len(ids)) + struct.pack(f"<{len(ids)}H", *ids))
+    return b"".join(parts)
+
+
+def unpack(data, offset=0):
+    """Decode one record from bytes; returns (record, end offset)"""
+    magic, version, _ = HEADER.unpack_from(data, offset)
+    if magic != MAGIC:
+        raise ValueError("Not a Safelink binary configuration")
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported schema version {version}, expected {SCHEMA_VERSION}")
+    offset += HEADER.size
+    category, functions, customized, *enums = FIXED.unpack_from(data, offset)
+    offset += FIXED.size
+    floats = FLOATS.unpack_from(data, offset)
+    offset += FLOATS.size
+    strings = []
+    for _ in range(2):
+        (length,) = U16.unpack_from(data, offset)
+        strings.append(bytes(data[offset + 2:offset + 2 + length]).decode("utf-8"))
+        offset += 2 + length
+    results = {}
+    for group in RESULT_GROUPS:
+        (count,) = U16.unpack_from(data, offset)
+        ids = struct.unpack_from(f"<{count}H", data, offset + 2)
+        results[group] = [CHANNEL_NAMES[i] for i in ids]
+        offset += 2 + 2 * count
+
+    parameters = {name: None if math.isnan(value) else value for name, value in zip(FLOAT_FIELDS, floats)}
+    for name, index in zip(ENUMS, enums):
+        parameters[name] = None if index == ABSENT else ENUMS[name][index]
+    count = len(FLOAT_FIELDS)
+    record = {
+        "category": CATEGORIES[category],
+        "unit_type": strings[0],
+        "unit_id": strings[1],
+        "functions": {key: bool(functions & bit) for key, bit in FUNCTION_BITS.items()},
+        "parameters": parameters,
+        "unit_parameters": list(floats[count:count + 10]),
+        "payload_parameters": list(floats[count + 10:count + 20]),
+        "customized_results": bool(customized),
+        "results": results,
+    }
+    return record, offset
+
+
+def loads(data):
+    """Decode a single-configuration file"""
+    return unpack(data)[0]
+
+
+def pack_many(records):
+    """Encode several records as one file (u32 length prefix per record)"""
+    parts = []
+    for record in records:
+        data = pack(record)
+        parts.append(U32.pack(len(data)) + data)
+    return b"".join(parts)
+
+
+def iter_records(data):
+    """Yield the records of a multi-configuration file"""
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        (length,) = U32.unpack_from(view, offset)
+        yield unpack(view[offset + 4:offset + 4 + length])[0]
+        offset += 4 + length
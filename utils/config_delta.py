@@ -0,0 +1,155 @@
+"""Compact storage of related configurations as one base file plus per-case deltas.
+
+A delta holds only the keys of the parameter sections that differ from the base, flattened as
+{"Section.key": value}; a key the case does not have is stored as None. A delta archive is a
+zip with
+
+    base.ini        the base configuration, written like any exported INI file
+    cases.jsonl     one line per case: {"case": n, "config_hash": ..., "delta": {...}}
+
+For a sweep every case typically differs in one to three keys, so the archive is 10-100x
+smaller than the full files. DeltaArchive rebuilds any case on demand, or all of them with
+
+    python -m utils.config_delta expand sweep.zip output_dir
+"""
+import argparse
+import configparser
+import io
+import json
+import os
+import zipfile
+
+from utils.config_model import config_hash, write_config
+
+DELTA_SECTIONS = ("Unit_Parameters", "Payload_Parameters", "Function_Parameters")
+BASE_FILE = "base.ini"
+CASES_FILE = "cases.jsonl"
+
+
+def config_delta(base, config, sections=DELTA_SECTIONS):
+    """Keys of `sections` where config differs from base, as {"Section.key": value or None}"""
+    delta = {}
+    for section in sections:
+        old = base[section] if base.has_section(section) else {}
+        new = config[section] if config.has_section(section) else {}
+        for key, value in new.items():
+            if old.get(key) != value:
+                delta[f"{section}.{key}"] = value
+        for key in old:
+            if key not in new:
+                delta[f"{section}.{key}"] = None
+    return delta
+
+
+def apply_delta(base, delta):
+    """New configparser: the base with the delta applied"""
+    sections = {section: dict(base[section]) for section in base.sections()}
+    for name, value in delta.items():
+        section, _, key = name.partition(".")
+        if value is None:
+            sections.get(section, {}).pop(key, None)
+        else:
+            sections.setdefault(section, {})[key] = value
+    config = configparser.ConfigParser()
+    config.read_dict(sections)
+    return config
+
+
+class DeltaArchiveWriter:
+    """Write a delta archive case by case (use as a context manager)"""
+
+    def __init__(self, path, base, version, generated_at):
+        self.base = base
+        self.version = version
+        self.generated_at = generated_at
+        self.archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        ini = io.StringIO()
+        write_config(base, ini, version, generated_at)
+        self.archive.writestr(BASE_FILE, ini.getvalue())
+        self.cases = io.StringIO()
+        self.count = 0
+
+    def add(self, config, number=None):
+        self.count += 1
+        record = {"case": number or self.count, "config_hash": config_hash(config), "delta": config_delta(self.base, config)}
+        self.cases.write(json.dumps(record, separators=(",", ":")) + "\n")
+        return record
+
+    def close(self):
+        self.archive.writestr(CASES_FILE, self.cases.getvalue())
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.archive.close()
+
+
+class DeltaArchive:
+    """Read a delta archive and rebuild the full configuration of any case"""
+
+    def __init__(self, path):
+        with zipfile.ZipFile(path) as archive:
+            base_text = archive.read(BASE_FILE).decode("utf-8")
+            lines = archive.read(CASES_FILE).decode("utf-8").splitlines()
+        header = [line for line in base_text.splitlines() if line.startswith("#")]
+        self.version = next((line.split(":", 1)[1].strip() for line in header if line.startswith("# Version:")), "")
+        self.generated_at = next((line.split(":", 1)[1].strip() for line in header if line.startswith("# Datetime:")), "")
+        self.base = configparser.ConfigParser()
+        self.base.read_string(base_text)
+        self.records = [json.loads(line) for line in lines if line]
+        self._by_case = {record["case"]: record for record in self.records}
+
+    def __len__(self):
+        return len(self.records)
+
+    def case_numbers(self):
+        return [record["case"] for record in self.records]
+
+    def config(self, case, verify=True):
+        """Full configuration (configparser) of a case"""
+        record = self._by_case[case]
+        config = apply_delta(self.base, record["delta"])
+        if verify and config_hash(config) != record["config_hash"]:
+            raise ValueError(f"Case {case} does not match its config hash {record['config_hash']}")
+        return config
+
+    def ini_text(self, case):
+        """The case as a complete INI file, with the header of the base file"""
+        ini = io.StringIO()
+        write_config(self.config(case), ini, self.version, self.generated_at)
+        return ini.getvalue()
+
+    def expand(self, directory):
+        """Write every case as case_<n>.ini into a directory; returns the number of files"""
+        os.makedirs(directory, exist_ok=True)
+        for case in self.case_numbers():
+            with open(os.path.join(directory, f"case_{case:05d}.ini"), "w", encoding="utf-8") as file:
+                file.write(self.ini_text(case))
+        return len(self)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild full configuration files from a delta archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    expand = sub.add_parser("expand", help="write every case as an INI file")
+    expand.add_argument("archive")
+    expand.add_argument("directory")
+    show = sub.add_parser("show", help="print one case")
+    show.add_argument("archive")
+    show.add_argument("case", type=int)
+    args = parser.parse_args(argv)
+
+    archive = DeltaArchive(args.archive)
+    if args.command == "expand":
+        print(f"Wrote {archive.expand(args.directory)} files to {args.directory}")
+    else:
+        print(archive.ini_text(args.case), end="")
+
+
+if __name__ == "__main__":
+    main()
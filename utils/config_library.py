@@ -0,0 +1,191 @@
+"""Library of saved configurations per user and team (SQLite).
+
+Every saved configuration keeps its INI text plus the columns it is searched on: unit, category,
+special functions (bit mask), the main payload parameters, and name/notes in an FTS5 index.
+Listings return metadata only and are paged with a keyset cursor on (created_at, id), so a page
+costs the same with 10 or 10 000 saved configurations; the INI text is loaded on demand.
+
+    SAFELINK_LIBRARY    database file (default config_library.db)
+"""
+import configparser
+import io
+import os
+import sqlite3
+import threading
+import time
+
+from utils.config_model import config_hash
+
+DEFAULT_PATH = os.environ.get("SAFELINK_LIBRARY", "config_library.db")
+PAGE_SIZE = 25
+
+# bits of the function_mask column
+FUNCTION_BITS = {"quick_lifting": 1, "constant_tension": 2, "active_heave_compensation": 4, "rod_lock": 8}
+
+LIST_COLUMNS = (
+    "id", "owner", "team", "name", "notes", "config_hash", "unit_id", "unit_type", "category",
+    "function_mask", "lifting_height", "payload_weight", "sling_weight", "created_at",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    team TEXT,
+    name TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    config_hash TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    unit_type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    function_mask INTEGER NOT NULL,
+    lifting_height REAL,
+    payload_weight REAL,
+    sling_weight REAL,
+    config TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS configs_owner ON configs (owner, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS configs_team ON configs (team, created_at DESC, id DESC) WHERE team IS NOT NULL;
+CREATE INDEX IF NOT EXISTS configs_unit ON configs (unit_id);
+CREATE INDEX IF NOT EXISTS configs_category_payload ON configs (category, payload_weight);
+CREATE INDEX IF NOT EXISTS configs_functions ON configs (function_mask);
+CREATE INDEX IF NOT EXISTS configs_hash ON configs (config_hash);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS configs_fts USING fts5(
+    name, notes, unit_id, content='configs', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS configs_ai AFTER INSERT ON configs BEGIN
+    INSERT INTO configs_fts (rowid, name, notes, unit_id) VALUES (new.id, new.name, new.notes, new.unit_id);
+END;
+CREATE TRIGGER IF NOT EXISTS configs_ad AFTER DELETE ON configs BEGIN
+    INSERT INTO configs_fts (configs_fts, rowid, name, notes, unit_id) VALUES ('delete', old.id, old.name, old.notes, old.unit_id);
+END;
+CREATE TRIGGER IF NOT EXISTS configs_au AFTER UPDATE ON configs BEGIN
+    INSERT INTO configs_fts (configs_fts, rowid, name, notes, unit_id) VALUES ('delete', old.id, old.name, old.notes, old.unit_id);
+    INSERT INTO configs_fts (rowid, name, notes, unit_id) VALUES (new.id, new.name, new.notes, new.unit_id);
+END;
+"""
+
+
+def function_mask(config):
+    """Bit mask of the special functions enabled in a configuration"""
+    return sum(bit for key, bit in FUNCTION_BITS.items() if config["Special_Functions"].get(key) == "True")
+
+
+def fts_query(text):
+    """Prefix match on every word of free text, safe to pass to MATCH"""
+    words = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class ConfigLibrary:
+    """Saved configurations with indexed search and keyset pagination"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        # one connection per Streamlit script thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def save(self, owner, name, config, notes="", team=None):
+        """Save a configuration (configparser) and return its id"""
+        payload = config["Payload_Parameters"]
+        ini = _ini_text(config)
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "INSERT INTO configs (owner, team, name, notes, config_hash, unit_id, unit_type, category, function_mask, "
+                "lifting_height, payload_weight, sling_weight, config, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    owner, team or None, name, notes, config_hash(config),
+                    config["Unit"]["unit_id"], config["Unit"]["unit_type"], config["Unit"]["category"], function_mask(config),
+                    float(payload["parameter_1"]), float(payload["parameter_2"]), float(payload["parameter_3"]),
+                    ini, time.time(),
+                ),
+            )
+            return cursor.lastrowid
+
+    def search(self, user, team=None, text="", unit_id=None, category=None, functions=0,
+               payload_range=None, after=None, limit=PAGE_SIZE):
+        """One page of configurations visible to `user` (own ones plus those shared with `team`).
+
+        `functions` is a mask of FUNCTION_BITS that must all be enabled. `after` is the cursor
+        returned with the previous page. Returns (rows, next_cursor); next_cursor is None on the
+        last page.
+        """
+        if team:
+            clauses, params = ["(c.owner = ? OR c.team = ?)"], [user, team]
+        else:
+            clauses, params = ["c.owner = ?"], [user]
+        join = ""
+        if text.strip():
+            join = "JOIN configs_fts f ON f.rowid = c.id"
+            clauses.append("configs_fts MATCH ?")
+            params.append(fts_query(text))
+        if unit_id:
+            clauses.append("c.unit_id = ?")
+            params.append(unit_id)
+        if category:
+            clauses.append("c.category = ?")
+            params.append(category)
+        if functions:
+            clauses.append("(c.function_mask & ?) = ?")
+            params += [functions, functions]
+        if payload_range is not None:
+            clauses.append("c.payload_weight BETWEEN ? AND ?")
+            params += list(payload_range)
+        if after is not None:
+            clauses.append("(c.created_at, c.id) < (?, ?)")
+            params += list(after)
+
+        columns = ", ".join(f"c.{column}" for column in LIST_COLUMNS)
+        sql = (f"SELECT {columns} FROM configs c {join} WHERE {' AND '.join(clauses)} "
+               f"ORDER BY c.created_at DESC, c.id DESC LIMIT ?")
+        rows = [dict(row) for row in self._connection().execute(sql, params + [limit + 1])]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+        return rows, next_cursor
+
+    def count(self, user, team=None):
+        if team:
+            sql, params = "SELECT COUNT(*) FROM configs WHERE owner = ? OR team = ?", (user, team)
+        else:
+            sql, params = "SELECT COUNT(*) FROM configs WHERE owner = ?", (user,)
+        return self._connection().execute(sql, params).fetchone()[0]
+
+    def load(self, config_id, user, team=None):
+        """The configuration (configparser) with the given id, if visible to `user`"""
+        row = self._connection().execute(
+            "SELECT config FROM configs WHERE id = ? AND (owner = ? OR (team IS NOT NULL AND team = ?))",
+            (config_id, user, team),
+        ).fetchone()
+        if row is None:
+            return None
+        config = configparser.ConfigParser()
+        config.read_string(row["config"])
+        return config
+
+    def delete(self, config_id, user):
+        """Delete a configuration owned by `user`"""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM configs WHERE id = ? AND owner = ?", (config_id, user))
+
+
+def _ini_text(config):
+    buffer = io.StringIO()
+    config.write(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,156 @@
+"""Configuration model shared by the export page and the results tooling"""
+import configparser
+import hashlib
+
+
+def _unit_field(selected_unit, index):
+    return selected_unit[index] if isinstance(selected_unit, tuple) else str(selected_unit)
+
+
+def param_value(state, name):
+    """Current value of a parameter input (the saved value once the user has edited it)"""
+    return state.get(f"saved_{name}") or state.get(name, 0.0)
+
+
+def build_config(state):
+    """Build the external function configuration from the session state (or any mapping)"""
+    config = configparser.ConfigParser()
+
+    # Unit configuration
+    config["Unit"] = {
+        "category": str(state["selected_unit_type"]),
+        "unit_type": _unit_field(state["selected_unit"], 0),
+        "unit_id": _unit_field(state["selected_unit"], 1),
+    }
+
+    # Special functions configuration
+    config["Special_Functions"] = {
+        "quick_lifting": str(state["check_box_quicklifting"]),
+        "constant_tension": str(state["check_box_constant_tension"]),
+        "active_heave_compensation": str(state["check_box_active_heave_compensation"]),
+        "rod_lock": str(state["check_box_rod_lock"])
+    }
+
+    # Special function parameters
+    config["Function_Parameters"] = {}
+
+    # Rod Functions parameters
+    config["Function_Parameters"]["rod_orientation"] = str(state["rod_orientation"])
+
+    if state["check_box_rod_lock"]:
+        config["Function_Parameters"]["rod_lock_depth"] = str(state["rod_lock_depth"])
+        config["Function_Parameters"]["rod_lock_operation"] = str(state["rod_lock_operation"])
+        config["Function_Parameters"]["rod_lock_mode"] = str(state["rod_lock_mode"])
+        config["Function_Parameters"]["lock_hold_time"] = str(state["lock_hold_time"])
+        config["Function_Parameters"]["lock_speed"] = str(state["lock_speed"])
+
+    # Quick lifting parameters
+    if state["check_box_quicklifting"]:
+        config["Function_Parameters"]["quick_start_time"] = str(state["quick_start_time"])
+        config["Function_Parameters"]["quick_acceleration_limit"] = str(state["quick_acceleration_limit"])
+
+    # Constant tension parameters
+    if state["check_box_constant_tension"]:
+        config["Function_Parameters"]["tension_start_time"] = str(state["tension_start_time"])
+        config["Function_Parameters"]["tension_tolerance"] = str(state["tension_tolerance"])
+
+    # Active heave compensation parameters
+    if state["check_box_active_heave_compensation"]:
+        config["Function_Parameters"]["heave_start_time"] = str(state["heave_start_time"])
+        config["Function_Parameters"]["max_stroke_speed"] = str(state["max_stroke_speed"])
+        config["Function_Parameters"]["motion_reference"] = str(state["motion_reference"])
+
+    # Safety parameters
+    config["Safety_Parameters"] = {
+        "max_force_limit": str(state["max_force_limit"]),
+    }
+
+    # Unit parameters
+    config["Unit_Parameters"] = {}
+    for i in range(1, 11):
+        config["Unit_Parameters"][f"parameter_{i}"] = str(state[f'saved_number_{i}_0'])
+
+    # Payload parameters
+    config["Payload_Parameters"] = {}
+    for i in range(1, 11):
+        config["Payload_Parameters"][f"parameter_{i}"] = str(state[f'saved_number_{i}_1'])
+
+    # Results configuration
+    config["Results"] = {
+        "customized": str(state["customized_results"]),
+        "body_results": ", ".join(state["selected_body_results"]) if state["selected_body_results"] else "None",
+        "rod_results": ", ".join(state["selected_rod_results"]) if state["selected_rod_results"] else "None",
+        "payload_results": ", ".join(state["selected_payload_results"]) if state["selected_payload_results"] else "None",
+    }
+    return config
+
+
+def config_hash(config):
+    """Stable hash of the configuration content (section and key order independent)"""
+    digest = hashlib.sha256()
+    for section in sorted(config.sections()):
+        for key, value in sorted(config[section].items()):
+            digest.update(f"{section}\x1f{key}\x1f{value}\x1e".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def write_config(config, file, version, generated_at):
+    """Write a configuration as the INI file we ship, with the standard header comments"""
+    file.write("# External function Configuration File\n")
+    file.write("# Generated by Safelink OrcaFlex Configuration Web Tool\n")
+    file.write(f"# Version: {version}\n")
+    file.write(f"# Datetime: {generated_at}\n")
+    file.write(f"# Config hash: {config_hash(config)}\n")
+    file.write("# Contact Safelink post@safelink.no if any questions.\n")
+    file.write("#\n\n")
+    config.write(file)
+
+
+FLOAT_PARAMETERS = {
+    "rod_lock_depth", "lock_hold_time", "lock_speed", "quick_start_time", "quick_acceleration_limit",
+    "tension_start_time", "tension_tolerance", "heave_start_time", "max_stroke_speed",
+}
+SPECIAL_FUNCTION_KEYS = {
+    "quick_lifting": "check_box_quicklifting",
+    "constant_tension": "check_box_constant_tension",
+    "active_heave_compensation": "check_box_active_heave_compensation",
+    "rod_lock": "check_box_rod_lock",
+}
+
+
+def _result_list(value):
+    return [] if value == "None" else [item.strip() for item in value.split(",") if item.strip()]
+
+
+def apply_config(config, state):
+    """Load an external function configuration back into the session state (inverse of build_config)"""
+    unit = config["Unit"]
+    state["selected_unit"] = (unit["unit_type"], unit["unit_id"])
+    state["selected_unit_type"] = unit["category"]
+    # selection widgets of the unit page follow the loaded unit
+    state["unit_selectbox"] = unit["category"]
+    radio_keys = {"IAHC": "iahc_selectbox", "PHC": "phc_selectbox", "Shock absorber": "shock_selectbox"}
+    if unit["category"] in radio_keys:
+        state[radio_keys[unit["category"]]] = state["selected_unit"]
+
+    for key, state_key in SPECIAL_FUNCTION_KEYS.items():
+        state[state_key] = config["Special_Functions"].get(key) == "True"
+
+    for key, value in config["Function_Parameters"].items():
+        state[key] = float(value) if key in FLOAT_PARAMETERS else value
+
+    state["max_force_limit"] = float(config["Safety_Parameters"]["max_force_limit"])
+
+    for group, section in ((0, "Unit_Parameters"), (1, "Payload_Parameters")):
+        for i in range(1, 11):
+            value = float(config[section][f"parameter_{i}"])
+            state[f"saved_number_{i}_{group}"] = value
+            state[f"number_{i}_{group}"] = value
+
+    results = config["Results"]
+    state["customized_results"] = results["customized"] == "True"
+    state["results_selectbox"] = "Customized" if state["customized_results"] else "OrcaFlex defaults"
+    for key in ("body_results", "rod_results", "payload_results"):
+        state[f"selected_{key}"] = _result_list(results[key])
+    state["selected_results"] = {key: state[f"selected_{key}"] for key in ("body_results", "rod_results", "payload_results")}
+    state["results_manually_cleared"] = False
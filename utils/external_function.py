@@ -0,0 +1,265 @@
+"""Reference runtime of the Safelink external function for time-domain simulation.
+
+The exported configuration (INI or .slcf) is loaded once and compiled: every parameter the
+control law needs becomes a local float of a closure, the quick-lifting S-curve is tabulated
+on a fine time grid, and the special functions that are disabled are not evaluated at all.
+The per-step call then only does float arithmetic, without dict lookups, string parsing or
+new containers; its results are written into one preallocated list (ExternalFunction.out,
+indexed by OUTPUT_INDEX) and the total force is returned.
+
+    runtime = ExternalFunction.from_file("config.ini")
+    force = runtime.step(t, dt, stroke, stroke_velocity, tension, heave_velocity, depth)
+
+Inputs are in s, m, m/s and kN; forces are in kN, the configuration's Te are converted with G.
+
+The model is a reference implementation of the control law for checking exported
+configurations and for benchmarking, not the certified controller:
+    passive     gas spring F0 * (L / (L - (S - S_eq)))^1.4 with the gas column L = V / A, plus
+                linear damping
+    constant    PID on the tension error beyond the tension tolerance, towards the static
+    tension     load of payload and slings, from tension_start_time
+    quick       jerk-limited S-curve of the rod end over the available lifting height with the
+    lifting     quick acceleration limit, tracked with position and velocity feedback
+    AHC         rod velocity set point opposite to the heave velocity, limited to the
+                max stroke speed, from heave_start_time
+    rod lock    holds the stroke once the lock condition held for the lock hold time and the
+                stroke speed is below the lock speed
+The active force is limited to +- max_force_limit and reversed for an inverted rod.
+
+Parameters used: unit parameter_1 equilibrium stroke [m], parameter_2 force at equilibrium [Te],
+parameter_4 damping force at 1 m/s [Te], parameter_5 cross-sectional area [m²], parameter_6 gas
+volume [m³]; payload parameter_1 lifting height [m], parameter_2 payload weight [Te],
+parameter_3 sling weight [Te].
+"""
+import configparser
+
+import numpy as np
+
+from utils.config_binary import loads, record_from_config
+
+G = 9.81
+KAPPA = 1.4                      # polytropic exponent of the gas spring
+MIN_GAS_FRACTION = 0.05          # the gas column never compresses below 5 % of its length
+CT_GAINS = (1.0, 0.5, 0.05)      # kp [-], ki [1/s], kd [s] on the tension error
+K_POSITION = 500.0               # kN/m, quick lifting position feedback
+K_VELOCITY = 200.0               # kN/(m/s), quick lifting and AHC velocity feedback
+K_LOCK, C_LOCK = 5000.0, 500.0   # kN/m, kN/(m/s), rod lock hold
+JERK_TIME = 0.5                  # s, acceleration ramp time of the S-curve
+CURVE_STEP = 0.001               # s, time resolution of the tabulated S-curve
+
+OUTPUTS = (
+    "F_active", "F_passive", "F_spring", "F_damping", "F_fb", "F_fb_limit_lower", "F_fb_limit_upper",
+    "F_sp_CT", "e_F_CT", "d_PID_CT_dt", "F_CT",
+    "S_curve_x", "S_curve_v", "S_curve_acc", "S_curve_j",
+    "h_rod_m", "v_rod_m", "h_rod_sp", "v_rod_sp", "e_h_rod",
+    "rod_locked",
+)
+OUTPUT_INDEX = {name: index for index, name in enumerate(OUTPUTS)}
+
+
+def s_curve(distance, acceleration, jerk_time=JERK_TIME, step=CURVE_STEP):
+    """Jerk-limited rest-to-rest motion over a distance: arrays (x, v, acc, j) sampled every step.
+
+    Symmetric profile without cruise phase: the acceleration ramps up in jerk_time, holds, ramps
+    down, and the deceleration mirrors it. The hold time is solved so the motion ends at distance.
+    """
+    zeros = np.zeros(1)
+    if distance <= 0 or acceleration <= 0:
+        return zeros, zeros, zeros, zeros
+    # distance = a (Tj + Th) (2 Tj + Th)
+    hold = (-3 * jerk_time + np.sqrt(jerk_time ** 2 + 4 * distance / acceleration)) / 2
+    if hold < 0:
+        hold, jerk_time = 0.0, np.sqrt(distance / (2 * acceleration))
+    half = 2 * jerk_time + hold
+    t = np.arange(0.0, 2 * half + step, step)
+    ramp = np.clip(t / jerk_time, 0, 1) * np.clip((half - t) / jerk_time, 0, 1)
+    ramp -= np.clip((t - half) / jerk_time, 0, 1) * np.clip((2 * half - t) / jerk_time, 0, 1)
+    acc = acceleration * ramp
+    v = np.concatenate([[0.0], np.cumsum((acc[1:] + acc[:-1]) / 2) * step])
+    x = np.concatenate([[0.0], np.cumsum((v[1:] + v[:-1]) / 2) * step])
+    x *= distance / x[-1]
+    v[-1] = acc[-1] = 0.0
+    j = np.gradient(acc, step)
+    j[-1] = 0.0
+    return x, v, acc, j
+
+
+def _value(parameter, default=0.0):
+    return default if parameter is None else float(parameter)
+
+
+class ExternalFunction:
+    """A configuration compiled for per-step evaluation"""
+
+    def __init__(self, record):
+        self.record = record
+        self.out = [0.0] * len(OUTPUTS)
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(record_from_config(config))
+
+    @classmethod
+    def from_file(cls, path):
+        """Compile an exported .ini or .slcf file"""
+        if path.endswith(".slcf"):
+            with open(path, "rb") as file:
+                return cls(loads(file.read()))
+        config = configparser.ConfigParser()
+        config.read(path, encoding="utf-8")
+        return cls.from_config(config)
+
+    def reset(self):
+        """Clear the controller state (integrator, lock, outputs) for a new simulation"""
+        for index in range(len(self.out)):
+            self.out[index] = 0.0
+        self.step = self._compile()
+
+    def _compile(self):
+        record = self.record
+        functions = record["functions"]
+        parameters = record["parameters"]
+        unit = record["unit_parameters"]
+        payload = record["payload_parameters"]
+        out = self.out
+
+        s_eq = unit[0]
+        f_precharge = unit[1] * G
+        gas_length = unit[5] / unit[4] if unit[4] > 0 else 0.0
+        min_gas_length = MIN_GAS_FRACTION * gas_length
+        damping = unit[3] * G
+        orientation = -1.0 if parameters["rod_orientation"] == "Rod Up (Inverted)" else 1.0
+        force_limit = _value(parameters["max_force_limit"]) * G
+
+        constant_tension = functions["constant_tension"]
+        tension_start = _value(parameters["tension_start_time"])
+        tolerance = _value(parameters["tension_tolerance"]) * G
+        tension_sp = (payload[1] + payload[2]) * G
+        kp, ki, kd = CT_GAINS
+
+        quick_lifting = functions["quick_lifting"]
+        quick_start = _value(parameters["quick_start_time"])
+        curve = s_curve(payload[0], _value(parameters["quick_acceleration_limit"])) if quick_lifting else s_curve(0, 0)
+        # lists: indexing returns the stored float objects, numpy scalars would be new objects
+        curve_x, curve_v, curve_acc, curve_j = (array.tolist() for array in curve)
+        curve_rate = 1.0 / CURVE_STEP
+        curve_last = len(curve_x) - 1
+
+        ahc = functions["active_heave_compensation"]
+        heave_start = _value(parameters["heave_start_time"])
+        max_speed = _value(parameters["max_stroke_speed"])
+        # the external MRU signal is inverted relative to the onboard heave velocity
+        heave_sign = 1.0 if parameters["motion_reference"] == "External" else -1.0
+
+        rod_lock = functions["rod_lock"]
+        lock_depth = _value(parameters["rod_lock_depth"])
+        lock_at_depth = parameters["rod_lock_mode"] != "Auto Unlock at Depth"
+        lock_direction = {"Lifting Down": 1.0, "Lifting Up": -1.0}.get(parameters["rod_lock_operation"], 0.0)
+        lock_hold = _value(parameters["lock_hold_time"])
+        lock_speed = _value(parameters["lock_speed"])
+
+        F_ACTIVE, F_PASSIVE, F_SPRING, F_DAMPING, F_FB, F_FB_LOWER, F_FB_UPPER = range(7)
+        F_SP_CT, E_F_CT, D_PID_CT, F_CT = range(7, 11)
+        S_X, S_V, S_ACC, S_J = range(11, 15)
+        H_ROD_M, V_ROD_M, H_ROD_SP, V_ROD_SP, E_H_ROD, ROD_LOCKED = range(15, 21)
+        out[F_FB_LOWER] = -force_limit
+        out[F_FB_UPPER] = force_limit
+
+        integral = 0.0
+        error_prev = 0.0
+        lock_timer = 0.0
+        locked = rod_lock and not lock_at_depth
+        stroke_lock = s_eq
+        depth_prev = 0.0
+
+        def step(t, dt, stroke, stroke_velocity, tension, heave_velocity, depth):
+            """Advance one time step; returns the total force [kN] and fills `out`"""
+            nonlocal integral, error_prev, lock_timer, locked, stroke_lock, depth_prev
+
+            gas = gas_length - (stroke - s_eq)
+            if gas < min_gas_length:
+                gas = min_gas_length
+            f_spring = f_precharge * (gas_length / gas) ** KAPPA if gas_length > 0.0 else f_precharge
+            f_damping = damping * stroke_velocity
+            # rod end height: with the rod down it falls as the stroke extends
+            h_rod = -orientation * (stroke - s_eq)
+            v_rod = -orientation * stroke_velocity
+            f_active = 0.0
+
+            if constant_tension and t >= tension_start:
+                error = tension_sp - tension
+                if error > tolerance:
+                    error -= tolerance
+                elif error < -tolerance:
+                    error += tolerance
+                else:
+                    error = 0.0
+                integral += error * dt
+                derivative = (error - error_prev) / dt
+                error_prev = error
+                f_ct = kp * error + ki * integral + kd * derivative
+                f_active += f_ct
+                out[F_SP_CT] = tension_sp
+                out[E_F_CT] = error
+                out[D_PID_CT] = derivative
+                out[F_CT] = f_ct
+
+            if quick_lifting and t >= quick_start:
+                i = int((t - quick_start) * curve_rate)
+                if i > curve_last:
+                    i = curve_last
+                x = curve_x[i]
+                v = curve_v[i]
+                f_active += K_POSITION * (x - h_rod) + K_VELOCITY * (v - v_rod)
+                out[S_X] = x
+                out[S_V] = v
+                out[S_ACC] = curve_acc[i]
+                out[S_J] = curve_j[i]
+                out[H_ROD_SP] = x
+                out[V_ROD_SP] = v
+                out[E_H_ROD] = x - h_rod
+
+            if ahc and t >= heave_start:
+                v_sp = heave_sign * heave_velocity
+                if v_sp > max_speed:
+                    v_sp = max_speed
+                elif v_sp < -max_speed:
+                    v_sp = -max_speed
+                f_active += K_VELOCITY * (v_sp - v_rod)
+                out[V_ROD_SP] = v_sp
+
+            if rod_lock:
+                descent = depth - depth_prev
+                depth_prev = depth
+                wanted = (depth >= lock_depth) == lock_at_depth
+                if wanted and not locked:
+                    if lock_direction * descent >= 0.0 and -lock_speed <= stroke_velocity <= lock_speed:
+                        lock_timer += dt
+                        if lock_timer >= lock_hold:
+                            locked = True
+                            stroke_lock = stroke
+                elif not wanted:
+                    lock_timer = 0.0
+                    locked = False
+                if locked:
+                    f_active += orientation * (K_LOCK * (stroke - stroke_lock) + C_LOCK * stroke_velocity)
+                out[ROD_LOCKED] = 1.0 if locked else 0.0
+
+            f_active *= orientation
+            f_fb = f_active
+            if f_fb > force_limit:
+                f_fb = force_limit
+            elif f_fb < -force_limit:
+                f_fb = -force_limit
+            f_passive = f_spring + f_damping
+            out[F_ACTIVE] = f_active
+            out[F_PASSIVE] = f_passive
+            out[F_SPRING] = f_spring
+            out[F_DAMPING] = f_damping
+            out[F_FB] = f_fb
+            out[H_ROD_M] = h_rod
+            out[V_ROD_M] = v_rod
+            return f_passive + f_fb
+
+        return step
@@ -0,0 +1,42 @@
+"""Feasibility / utilization of every catalog unit over a payload grid.
+
+All checks are evaluated in one pass by broadcasting unit columns (n_units, 1) against the
+payload grid (1, n_payload); there is no per-unit loop.
+"""
+import numpy as np
+
+
+def payload_grid(swl, n_points=120, margin=1.1):
+    """Dense payload grid [Te] covering the catalog SWL range"""
+    return np.linspace(0.0, margin * np.nanmax(swl), n_points)
+
+
+def feasibility_matrix(arrays, payloads, sling_weight, lifting_height, rod_lock_depth=None):
+    """Utilization and feasibility of all units for all payload weights.
+
+    arrays          catalog columns from utils.catalog.unit_arrays
+    payloads        payload weights in air [Te], shape (n_payload,)
+    sling_weight    sling weight [Te] carried by the unit in addition to the payload
+    lifting_height  available lifting height [m]; the unit height plus stroke must fit
+    rod_lock_depth  depth [m] the unit has to reach (None when rod lock is not used)
+
+    Returns (utilization, feasible), both shaped (n_units, n_payload).
+    """
+    swl = arrays["swl"][:, None]
+    load = np.asarray(payloads, dtype=float)[None, :] + sling_weight
+
+    utilization = load / swl
+    fits_height = (arrays["height"] + arrays["stroke"] <= lifting_height)[:, None]
+    depth_rated = np.ones_like(fits_height) if rod_lock_depth is None else (arrays["design_water_depth"] >= rod_lock_depth)[:, None]
+
+    feasible = (utilization <= 1.0) & fits_height & depth_rated
+    return utilization, feasible
+
+
+def limiting_check(arrays, lifting_height, rod_lock_depth=None):
+    """Per-unit reason why a unit is ruled out independently of the payload ('' when it is not)"""
+    reasons = np.full(arrays["swl"].shape, "", dtype=object)
+    reasons[arrays["height"] + arrays["stroke"] > lifting_height] = "lifting height"
+    if rod_lock_depth is not None:
+        reasons[arrays["design_water_depth"] < rod_lock_depth] = "water depth"
+    return reasons
@@ -0,0 +1,18 @@
+"""Job queue of the running app (utils.jobs), shared by the pages.
+
+get_job_queue is held in st.cache_resource, so the worker processes are started once per server
+process, by whichever page needs the queue first. Keep it out of utils.jobs: the workers and
+`python -m utils.jobs worker` import that module and should not load Streamlit.
+"""
+import streamlit as st
+
+from utils.jobs import WORKERS, JobQueue, WorkerPool
+
+
+@st.cache_resource
+def get_job_queue():
+    """Job queue shared by all sessions, with its worker processes"""
+    queue = JobQueue()
+    queue.recover()
+    workers = WorkerPool(WORKERS) if WORKERS > 0 else None
+    return queue, workers
@@ -0,0 +1,318 @@
+"""Local job queue for long-running work (batch exports, simulations, post-processing).
+
+Jobs are rows in a SQLite database, so they survive reruns, page changes and server restarts.
+Worker processes claim the highest-priority queued job, run it and write its artifact file;
+the page script only inserts the job and polls its record, so it never blocks on the work.
+
+A job function takes (params, job) and returns the path of its artifact (or None). It reports
+progress with job.progress(fraction, message), which also raises JobCancelled once the user
+cancelled the job. Register job functions in JOB_KINDS as "module:function".
+
+    SAFELINK_JOBS           database file (default jobs.db)
+    SAFELINK_JOB_ARTIFACTS  artifact directory (default job_artifacts)
+    SAFELINK_JOB_WORKERS    worker processes started with the app (default 2; 0 to run them
+                            separately with `python -m utils.jobs worker`)
+    SAFELINK_JOB_TTL_DAYS   finished jobs and their artifacts are purged after (default 7)
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+
+DEFAULT_PATH = os.environ.get("SAFELINK_JOBS", "jobs.db")
+ARTIFACT_DIR = os.environ.get("SAFELINK_JOB_ARTIFACTS", "job_artifacts")
+WORKERS = int(os.environ.get("SAFELINK_JOB_WORKERS", "2"))
+TTL_DAYS = float(os.environ.get("SAFELINK_JOB_TTL_DAYS", "7"))
+POLL_SECONDS = 0.5               # idle worker poll interval
+PROGRESS_SECONDS = 0.25          # minimum interval between progress writes
+
+JOB_KINDS = {
+    "batch_export": "utils.batch_export:export_sweep",
+    "train_surrogates": "utils.surrogate:train_job",
+    "sensitivity_study": "utils.sensitivity:study_job",
+    "tune_settings": "utils.tuning:tune_job",
+}
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+PRIORITIES = {"Low": -10, "Normal": 0, "High": 10}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    title TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    params TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    artifact TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker_pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (priority DESC, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, id DESC);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when the job was cancelled"""
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, TypeError):
+        return True
+    return True
+
+
+class JobQueue:
+    """Job records in SQLite: submit, list, cancel and claim jobs"""
+
+    def __init__(self, path=DEFAULT_PATH, artifact_dir=ARTIFACT_DIR):
+        self.path = path
+        self.artifact_dir = artifact_dir
+        self._local = threading.local()
+        os.makedirs(artifact_dir, exist_ok=True)
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        # one connection per thread (Streamlit script threads, worker processes)
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def submit(self, owner, kind, params, title="", priority=0):
+        """Queue a job and return its id"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (owner, kind, title, priority, params, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (owner, kind, title or kind, priority, json.dumps(params), time.time()),
+            )
+            return cursor.lastrowid
+
+    def get(self, job_id):
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, owner, limit=20):
+        """Most recent jobs of a user, without their parameters"""
+        rows = self._connection().execute(
+            "SELECT id, kind, title, priority, status, progress, message, artifact, error, "
+            "created_at, started_at, finished_at FROM jobs WHERE owner = ? ORDER BY id DESC LIMIT ?",
+            (owner, limit),
+        )
+        return [dict(row) for row in rows]
+
+    def has_active(self, owner):
+        return self._connection().execute(
+            "SELECT 1 FROM jobs WHERE owner = ? AND status IN (?, ?) LIMIT 1", (owner, *ACTIVE)
+        ).fetchone() is not None
+
+    def cancel(self, job_id, owner):
+        """Cancel a queued job right away; a running one stops at its next progress report"""
+        with self._connection() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, message = 'Cancelled' "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, owner, QUEUED),
+            )
+            connection.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND owner = ? AND status = ?",
+                (job_id, owner, RUNNING),
+            )
+
+    def delete(self, job_id, owner):
+        """Remove a finished job and its artifact"""
+        job = self.get(job_id)
+        if job is None or job["owner"] != owner or job["status"] in ACTIVE:
+            return
+        self._remove_artifact(job["artifact"])
+        with self._connection() as connection:
+            connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def artifact_path(self, job_id, suffix=""):
+        return os.path.join(self.artifact_dir, f"job_{job_id}{suffix}")
+
+    def _remove_artifact(self, path):
+        if path and os.path.exists(path):
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+    # -- worker side ------------------------------------------------------------------------------
+
+    def claim(self, pid):
+        """Mark the next queued job (highest priority, oldest first) as running and return it"""
+        with self._connection() as connection:
+            rows = connection.execute(
+                "UPDATE jobs SET status = ?, worker_pid = ?, started_at = ?, message = 'Started' "
+                "WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY priority DESC, id LIMIT 1) AND status = ? "
+                "RETURNING *",
+                (RUNNING, pid, time.time(), QUEUED, QUEUED),
+            ).fetchall()
+        return dict(rows[0]) if rows else None
+
+    def report(self, job_id, progress, message):
+        """Store progress; returns True if the job was cancelled meanwhile"""
+        with self._connection() as connection:
+            connection.execute("UPDATE jobs SET progress = ?, message = ? WHERE id = ?", (progress, message, job_id))
+            row = connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def finish(self, job_id, status, artifact=None, error=None, message=""):
+        with self._connection() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, artifact = ?, error = ?, message = ?, finished_at = ?, "
+                "progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END WHERE id = ?",
+                (status, artifact, error, message, time.time(), status, job_id),
+            )
+
+    def recover(self):
+        """Requeue jobs whose worker died, and purge expired jobs with their artifacts"""
+        connection = self._connection()
+        for row in connection.execute("SELECT id, worker_pid FROM jobs WHERE status = ?", (RUNNING,)).fetchall():
+            if not _pid_alive(row["worker_pid"]):
+                with connection:
+                    connection.execute(
+                        "UPDATE jobs SET status = ?, worker_pid = NULL, progress = 0, message = 'Requeued' "
+                        "WHERE id = ? AND status = ?",
+                        (QUEUED, row["id"], RUNNING),
+                    )
+        if TTL_DAYS:
+            expired = connection.execute(
+                "SELECT id, artifact FROM jobs WHERE finished_at < ?", (time.time() - TTL_DAYS * 86400,)
+            ).fetchall()
+            for row in expired:
+                self._remove_artifact(row["artifact"])
+            with connection:
+                connection.executemany("DELETE FROM jobs WHERE id = ?", [(row["id"],) for row in expired])
+
+
+class Job:
+    """Handle passed to a job function"""
+
+    def __init__(self, queue, record):
+        self.queue = queue
+        self.id = record["id"]
+        self.owner = record["owner"]
+        self._last_report = 0.0
+
+    def artifact_path(self, suffix=""):
+        return self.queue.artifact_path(self.id, suffix)
+
+    def progress(self, fraction, message="", force=False):
+        """Report progress (0..1); raises JobCancelled if the job was cancelled"""
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_SECONDS:
+            return
+        self._last_report = now
+        if self.queue.report(self.id, min(max(fraction, 0.0), 1.0), message):
+            raise JobCancelled()
+
+
+def resolve(kind):
+    module, _, name = JOB_KINDS[kind].partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def run_job(queue, record):
+    job = Job(queue, record)
+    try:
+        artifact = resolve(record["kind"])(json.loads(record["params"]), job)
+    except JobCancelled:
+        queue.finish(job.id, CANCELLED, message="Cancelled")
+    except Exception as e:
+        queue.finish(job.id, FAILED, error="".join(traceback.format_exception_only(type(e), e)).strip(),
+                     message="Failed")
+    else:
+        queue.finish(job.id, DONE, artifact=artifact, message="Done")
+
+
+def worker_loop(path=DEFAULT_PATH, artifact_dir=ARTIFACT_DIR, stop=None):
+    """Claim and run jobs until `stop` (a multiprocessing.Event) is set"""
+    queue = JobQueue(path, artifact_dir)
+    pid = os.getpid()
+    while stop is None or not stop.is_set():
+        record = queue.claim(pid)
+        if record is None:
+            time.sleep(POLL_SECONDS)
+            continue
+        run_job(queue, record)
+
+
+class WorkerPool:
+    """Worker processes started alongside the app (held in st.cache_resource)"""
+
+    def __init__(self, count=WORKERS, path=DEFAULT_PATH, artifact_dir=ARTIFACT_DIR):
+        # spawn, so the workers do not inherit the server's threads and locks. Not daemonic, so a
+        # job can run a process pool of its own (utils.sensitivity, utils.tuning); they are shut down
+        # at exit instead, before multiprocessing joins them, also when this process is itself a
+        # multiprocessing child, which skips atexit.
+        context = multiprocessing.get_context("spawn")
+        self.stop = context.Event()
+        self.processes = [
+            context.Process(target=worker_loop, args=(path, artifact_dir, self.stop), daemon=False,
+                            name=f"safelink-job-worker-{i}")
+            for i in range(count)
+        ]
+        for process in self.processes:
+            process.start()
+        multiprocessing.util.Finalize(self, self.shutdown, exitpriority=10)
+
+    def alive(self):
+        return sum(process.is_alive() for process in self.processes)
+
+    def shutdown(self, timeout=5):
+        """Stop the workers; a worker still busy after `timeout` is terminated and its job requeued on the next start"""
+        self.stop.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Safelink job workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="run job workers in the foreground")
+    worker.add_argument("--processes", type=int, default=max(WORKERS, 1))
+    args = parser.parse_args(argv)
+
+    JobQueue().recover()
+    pool = WorkerPool(args.processes)
+    try:
+        while pool.alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
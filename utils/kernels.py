@@ -0,0 +1,190 @@
+"""Streaming signal kernels: low-pass filters of the measured channels and the constant tension PID.
+
+Both process time series in chunks of shape (cases, samples) and keep their state between
+calls, so a long record (or thousands of cases at once) is processed piece by piece with the
+same result as in one go:
+
+    filters = MeasuredFilters(fs=100.0, cases=len(records))
+    pid = ConstantTensionPID.from_records(records, fs=100.0)
+    for chunk in chunks:                     # {"S_m": (cases, n), ..., "F_IAHC_total_m": (cases, n)}
+        filtered = filters(chunk)            # {"S_m_LP": ..., "vS_m_LP": ..., "acc_S_m_LP": ...}
+        tension = pid(chunk["F_IAHC_total_m"])  # {"F_sp_CT": ..., "e_F_CT": ..., "F_CT": ...}
+
+The PID uses the control law of utils.external_function (same gains, deadband and start
+time), vectorized over the samples of a chunk. Filtered channels of a recorded CSV file:
+
+    python -m utils.kernels filter raw.csv filtered.csv --cutoff 1.0 [--config config.ini]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import signal
+
+from utils.external_function import CT_GAINS, G, ExternalFunction
+
+DEFAULT_CUTOFF = 1.0             # Hz
+DEFAULT_ORDER = 2
+FILTERED_CHANNELS = {"S_m": "S_m_LP", "vS_m": "vS_m_LP", "acc_S_m": "acc_S_m_LP"}
+TENSION_CHANNEL = "F_IAHC_total_m"
+CHUNK_ROWS = 100000
+
+
+def _cases(values, cases):
+    return np.array(np.broadcast_to(np.asarray(values, dtype=float), (cases,)))
+
+
+class LowPass:
+    """Butterworth low-pass filter of `cases` signals, fed chunk by chunk"""
+
+    def __init__(self, cutoff=DEFAULT_CUTOFF, fs=100.0, cases=1, order=DEFAULT_ORDER):
+        self.sos = signal.butter(order, cutoff, fs=fs, output="sos")
+        self.cases = cases
+        self.reset()
+
+    def reset(self):
+        self.state = None
+
+    def __call__(self, chunk):
+        chunk = np.asarray(chunk, dtype=float).reshape(self.cases, -1)
+        if chunk.shape[1] == 0:
+            return chunk.copy()
+        if self.state is None:
+            # start in steady state at the first sample, without a transient from zero
+            self.state = signal.sosfilt_zi(self.sos)[:, None, :] * chunk[None, :, 0, None]
+        filtered, self.state = signal.sosfilt(self.sos, chunk, axis=-1, zi=self.state)
+        return filtered
+
+
+class MeasuredFilters:
+    """The low-pass filtered channels (S_m_LP, vS_m_LP, acc_S_m_LP) of the measured ones"""
+
+    def __init__(self, fs, cases=1, cutoff=DEFAULT_CUTOFF, order=DEFAULT_ORDER):
+        self.filters = {raw: LowPass(cutoff, fs, cases, order) for raw in FILTERED_CHANNELS}
+
+    def reset(self):
+        for low_pass in self.filters.values():
+            low_pass.reset()
+
+    def __call__(self, chunk):
+        """{raw name: (cases, n)} -> {filtered name: (cases, n)} for the channels in the chunk"""
+        return {FILTERED_CHANNELS[raw]: low_pass(chunk[raw]) for raw, low_pass in self.filters.items() if raw in chunk}
+
+
+class ConstantTensionPID:
+    """Constant tension PID of `cases` configurations, fed chunk by chunk.
+
+    setpoint    static tension set point [kN] per case
+    tolerance   deadband [kN]: errors within it are ignored, larger ones reduced by it
+    start_time  time [s] from which the loop is active, per case
+    Before the start time all outputs are 0. F_CT_point is the measured tension latched when
+    the loop became active.
+    """
+
+    def __init__(self, setpoint, tolerance, start_time, fs, gains=CT_GAINS):
+        self.setpoint = np.asarray(setpoint, dtype=float).reshape(-1)
+        cases = len(self.setpoint)
+        self.tolerance = _cases(tolerance, cases)
+        self.start_time = _cases(start_time, cases)
+        self.dt = 1.0 / fs
+        self.gains = gains
+        self.reset()
+
+    @classmethod
+    def from_records(cls, records, fs, gains=CT_GAINS):
+        """From configuration records (utils.config_binary); cases without constant tension get
+        a start time of infinity, so their outputs stay 0"""
+        setpoint = [(record["payload_parameters"][1] + record["payload_parameters"][2]) * G for record in records]
+        tolerance = [(record["parameters"]["tension_tolerance"] or 0.0) * G for record in records]
+        start_time = [
+            (record["parameters"]["tension_start_time"] or 0.0) if record["functions"]["constant_tension"] else np.inf
+            for record in records
+        ]
+        return cls(setpoint, tolerance, start_time, fs, gains)
+
+    def reset(self):
+        cases = len(self.setpoint)
+        self.samples = 0
+        self.integral = np.zeros(cases)
+        self.error = np.zeros(cases)
+        self.point = np.full(cases, np.nan)
+
+    def __call__(self, tension):
+        """Measured tension (cases, n) [kN] -> dict of output channels, each (cases, n)"""
+        tension = np.asarray(tension, dtype=float).reshape(len(self.setpoint), -1)
+        n = tension.shape[1]
+        if n == 0:
+            empty = np.zeros_like(tension)
+            return {name: empty for name in ("F_sp_CT", "e_F_CT", "d_PID_CT_dt", "F_CT", "F_CT_point")}
+        kp, ki, kd = self.gains
+        dt = self.dt
+        t = (self.samples + np.arange(n)) * dt
+        self.samples += n
+        active = t[None, :] >= self.start_time[:, None]
+
+        error = self.setpoint[:, None] - tension
+        error = np.sign(error) * np.maximum(np.abs(error) - self.tolerance[:, None], 0.0)
+        error[~active] = 0.0
+        integral = self.integral[:, None] + np.cumsum(error, axis=1) * dt
+        derivative = np.diff(error, axis=1, prepend=self.error[:, None]) / dt
+        derivative[~active] = 0.0
+        force = kp * error + ki * integral + kd * derivative
+
+        starting = np.isnan(self.point) & active.any(axis=1)
+        first = active.argmax(axis=1)
+        self.point[starting] = tension[starting, first[starting]]
+        self.integral = integral[:, -1].copy()
+        self.error = error[:, -1].copy()
+        return {
+            "F_sp_CT": np.where(active, self.setpoint[:, None], 0.0),
+            "e_F_CT": error,
+            "d_PID_CT_dt": derivative,
+            "F_CT": force,
+            "F_CT_point": np.where(active, self.point[:, None], 0.0),
+        }
+
+
+def filter_file(source, target, cutoff=DEFAULT_CUTOFF, fs=None, config=None, chunk_rows=CHUNK_ROWS):
+    """Add the filtered (and, with a configuration, the constant tension) channels to a CSV
+    record of one case, reading and writing it in chunks; returns the number of rows"""
+    filters = pid = None
+    rows = 0
+    for number, chunk in enumerate(pd.read_csv(source, chunksize=chunk_rows)):
+        if filters is None:
+            if fs is None:
+                if "time" not in chunk or len(chunk) < 2:
+                    raise ValueError("The sampling rate is needed when the file has no time column")
+                fs = 1.0 / float(chunk["time"].iloc[1] - chunk["time"].iloc[0])
+            filters = MeasuredFilters(fs, cutoff=cutoff)
+            if config is not None:
+                if TENSION_CHANNEL not in chunk:
+                    raise ValueError(f"The file has no {TENSION_CHANNEL} column")
+                pid = ConstantTensionPID.from_records([ExternalFunction.from_file(config).record], fs)
+        channels = {name: chunk[name].to_numpy(dtype=float) for name in FILTERED_CHANNELS if name in chunk}
+        for name, values in filters(channels).items():
+            chunk[name] = values[0]
+        if pid is not None:
+            for name, values in pid(chunk[TENSION_CHANNEL].to_numpy(dtype=float)).items():
+                chunk[name] = values[0]
+        chunk.to_csv(target, mode="w" if number == 0 else "a", header=number == 0, index=False)
+        rows += len(chunk)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute filtered channels of recorded data")
+    sub = parser.add_subparsers(dest="command", required=True)
+    filter_parser = sub.add_parser("filter", help="add S_m_LP, vS_m_LP, acc_S_m_LP (and the CT channels) to a CSV file")
+    filter_parser.add_argument("source")
+    filter_parser.add_argument("target")
+    filter_parser.add_argument("--cutoff", type=float, default=DEFAULT_CUTOFF, help="cut-off frequency [Hz]")
+    filter_parser.add_argument("--fs", type=float, help="sampling rate [Hz] (default: from the time column)")
+    filter_parser.add_argument("--config", help="exported configuration; adds the constant tension channels")
+    args = parser.parse_args(argv)
+
+    rows = filter_file(args.source, args.target, args.cutoff, args.fs, args.config)
+    print(f"Wrote {rows} rows to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
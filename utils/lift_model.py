@@ -0,0 +1,216 @@
+"""Linear frequency-domain model of a lift with a Safelink unit, for screening sea states.
+
+The crane tip follows the vessel motion, the wire and the unit act as springs in series, and
+the payload (with its added mass) hangs below them:
+
+    crane tip RAO   heave, roll and pitch contributions as damped single degree of freedom
+                    responses, combined by heading (sum of magnitudes, conservative)
+    wave spectrum   JONSWAP (gamma 3.3), scaled to Hs
+    wire            EA / (length), length = depth + crane height; a third of its mass moves
+                    with the payload
+    unit            linearized gas spring kappa F / L_gas; constant tension softens it
+                    (CT_SOFTENING), active heave compensation cancels the crane tip motion
+                    up to the max stroke speed (AHC_EFFICIENCY)
+    tension         T / eta = k (-m w^2 + i c w) / (k - m w^2 + i c w)
+
+Statistics are spectral: standard deviations from the integrated response spectra and most
+probable maxima over the operation duration. All functions take the system as a plain dict
+(see lift_system) so it can be sent to worker processes.
+"""
+import math
+
+import numpy as np
+
+from utils.config_model import param_value
+from utils.splash_zone import DEFAULT_COEFFICIENTS, G, RHO, TP_TZ, splash_zone_loads
+
+OMEGA = np.linspace(0.15, 3.0, 400)          # rad/s
+TRAPEZOID = (np.r_[0.0, np.diff(OMEGA)] + np.r_[np.diff(OMEGA), 0.0]) / 2   # trapezoidal rule weights over OMEGA
+GAMMA = 3.3
+VESSEL = {
+    "heave_period": 9.0, "heave_damping": 0.5,
+    "roll_period": 14.0, "roll_damping": 0.1, "roll_lever": 0.15,     # m crane tip heave per m wave amplitude, quasi-static
+    "pitch_period": 8.0, "pitch_damping": 0.3, "pitch_lever": 0.3,
+}
+WIRE_EA = 1.0e9                  # N, crane wire axial stiffness
+CRANE_HEIGHT = 20.0              # m, wire length above the water line
+WIRE_MASS = 20.0                 # kg/m, crane wire
+KAPPA = 1.4
+CT_SOFTENING = 0.05              # unit stiffness factor with constant tension active
+AHC_EFFICIENCY = 0.9             # fraction of the crane tip motion AHC cancels within its speed limit
+STRUCTURAL_DAMPING = 0.05        # fraction of critical damping at depth
+DURATION = 1800.0                # s, exposure for the most probable maxima
+SLACK_MARGIN = 0.1               # minimum tension as a fraction of the static weight in water
+DEFAULT_DEPTH = 100.0            # m, target depth when rod lock is not used
+
+
+def lift_system(record, swl, stroke, depth=None):
+    """System of a configuration record (utils.config_binary) and its unit's SWL [Te] and stroke [m]"""
+    unit = record["unit_parameters"]
+    payload = record["payload_parameters"]
+    functions = record["functions"]
+    if depth is None:
+        depth = record["parameters"]["rod_lock_depth"] if functions["rod_lock"] else DEFAULT_DEPTH
+    mass = (payload[1] + payload[2]) * 1000.0
+    area, volume = payload[4], payload[5]
+    return {
+        "mass": mass,
+        "volume": volume,
+        "area": area,
+        "added_mass": RHO * DEFAULT_COEFFICIENTS["added_mass"] * math.pi / 4 * area ** 1.5,
+        "gas_length": unit[5] / unit[4] if unit[4] > 0 and unit[5] > 0 else 2.0 * stroke,
+        "swl": swl * 1000.0 * G,
+        "stroke": stroke,
+        "depth": float(depth or DEFAULT_DEPTH),
+        "constant_tension": bool(functions["constant_tension"]),
+        "ahc": bool(functions["active_heave_compensation"]),
+        "max_stroke_speed": record["parameters"]["max_stroke_speed"] or 0.0,
+    }
+
+
+def lift_system_from_state(state):
+    """System of the unit and parameters as currently entered in the session state (or any
+    mapping), or None for a unit outside the catalog or without a payload weight"""
+    # imported here: utils.catalog needs Streamlit, which the grid worker processes do not load
+    from utils.catalog import unit_rating
+
+    unit = state.get("selected_unit")
+    swl, stroke = unit_rating(unit[1] if isinstance(unit, tuple) else unit)
+    if not np.isfinite(swl) or param_value(state, "number_2_1") <= 0:
+        return None
+    record = {
+        "unit_parameters": [param_value(state, f"number_{i}_0") for i in range(1, 11)],
+        "payload_parameters": [param_value(state, f"number_{i}_1") for i in range(1, 11)],
+        "functions": {name: state.get(f"check_box_{name}", False) for name in ("constant_tension", "active_heave_compensation", "rod_lock")},
+        "parameters": {"rod_lock_depth": state.get("rod_lock_depth", 0.0), "max_stroke_speed": state.get("max_stroke_speed", 0.0)},
+    }
+    return lift_system(record, swl, stroke)
+
+
+def jonswap(omega, hs, tp, gamma=GAMMA):
+    """JONSWAP spectral density [m² s], shape (len(hs), len(omega)), scaled so 4 sqrt(m0) = Hs"""
+    wp = 2 * math.pi / tp
+    sigma = np.where(omega <= wp, 0.07, 0.09)
+    shape = omega ** -5.0 * np.exp(-1.25 * (wp / omega) ** 4) * gamma ** np.exp(-((omega - wp) ** 2) / (2 * sigma ** 2 * wp ** 2))
+    m0 = np.trapezoid(shape, omega)
+    return (np.asarray(hs, dtype=float)[:, None] / 4) ** 2 * (shape / m0)[None, :]
+
+
+def _sdof(omega, period, damping):
+    ratio = omega * period / (2 * math.pi)
+    return 1.0 / np.sqrt((1 - ratio ** 2) ** 2 + (2 * damping * ratio) ** 2)
+
+
+def crane_tip_rao(omega, heading, vessel=VESSEL):
+    """Crane tip heave per unit wave amplitude; heading in degrees (0 = head seas)"""
+    beta = math.radians(heading)
+    return (_sdof(omega, vessel["heave_period"], vessel["heave_damping"])
+            + abs(math.sin(beta)) * vessel["roll_lever"] * _sdof(omega, vessel["roll_period"], vessel["roll_damping"])
+            + abs(math.cos(beta)) * vessel["pitch_lever"] * _sdof(omega, vessel["pitch_period"], vessel["pitch_damping"]))
+
+
+def static_weight(system):
+    """Weight in water [N]"""
+    return (system["mass"] - RHO * system["volume"]) * G
+
+
+def stiffness(system, depth=None):
+    """(unit, wire, series) stiffness [N/m] at a depth (scalar or array)"""
+    depth = system["depth"] if depth is None else depth
+    unit = KAPPA * np.maximum(static_weight(system), 1.0) / system["gas_length"]
+    if system["constant_tension"]:
+        unit *= CT_SOFTENING
+    wire = WIRE_EA / (depth + CRANE_HEIGHT)
+    return unit, wire, 1.0 / (1.0 / unit + 1.0 / wire)
+
+
+def effective_mass(system, depth=None):
+    """Payload, added and effective wire mass [kg] at a depth (scalar or array)"""
+    depth = system["depth"] if depth is None else depth
+    return system["mass"] + system["added_mass"] + WIRE_MASS * (depth + CRANE_HEIGHT) / 3
+
+
+def natural_period(system, depth=None):
+    """Vertical natural period [s] of the payload on wire and unit; broadcasts over depth and
+    an array gas_length"""
+    return 2 * math.pi * np.sqrt(effective_mass(system, depth) / stiffness(system, depth)[2])
+
+
+def _ahc_residual(omega, crane_sigma, system):
+    """Fraction of the crane tip motion left after AHC, shape (n_hs, n_omega)"""
+    if not system["ahc"]:
+        return np.ones((len(crane_sigma), len(omega)))
+    # AHC cancels the motion while the required stroke speed is within the limit
+    required = np.maximum(2 * crane_sigma[:, None] * omega[None, :], 1e-9)
+    return 1.0 - AHC_EFFICIENCY * np.minimum(1.0, system["max_stroke_speed"] / required)
+
+
+def _most_probable_maximum(sigma, tz):
+    return sigma * np.sqrt(2 * np.log(max(DURATION / tz, 2.0)))
+
+
+def sea_state(system, hs, tp, heading):
+    """Wave spectrum, crane tip RAO and the fraction of the crane tip motion left after AHC for
+    the sea states hs (array) at one Tp and heading, each shaped (len(hs), len(OMEGA))"""
+    hs = np.atleast_1d(np.asarray(hs, dtype=float))
+    spectrum = jonswap(OMEGA, hs, tp)
+    rao = crane_tip_rao(OMEGA, heading)
+    crane_sigma = np.sqrt(np.trapezoid(rao ** 2 * spectrum, OMEGA, axis=1))
+    residual = _ahc_residual(OMEGA, crane_sigma, system)
+    return {"hs": hs, "tp": tp, "tz": tp / TP_TZ, "spectrum": spectrum, "rao": rao, "residual": residual}
+
+
+def crane_amplitude(state):
+    """Significant crane tip heave amplitude [m] after AHC, per sea state"""
+    return 2 * np.sqrt(np.trapezoid((state["residual"] * state["rao"]) ** 2 * state["spectrum"], OMEGA, axis=1))
+
+
+def depth_check(system, state):
+    """Wire tension and utilizations at depth.
+
+    The system values may be arrays (samples of the system, see utils.monte_carlo) when the
+    state holds a single sea state; results are then shaped like the samples.
+    """
+    unit_k, _, k = stiffness(system)
+    mass = np.asarray(effective_mass(system))[..., None]
+    k = np.asarray(k)[..., None]
+    damping = 2 * STRUCTURAL_DAMPING * np.sqrt(k * mass)
+    # |k D / (k + D)|² with D = -m w² + i c w, in real arithmetic
+    inertia = mass * OMEGA ** 2
+    friction = (damping * OMEGA) ** 2
+    transfer = k ** 2 * (inertia ** 2 + friction) / ((k - inertia) ** 2 + friction)
+    spectrum, residual, tz = state["spectrum"], state["residual"], state["tz"]
+    response = (residual * state["rao"]) ** 2 * spectrum
+    tension_sigma = np.sqrt((transfer * response) @ TRAPEZOID)
+    tension_max = _most_probable_maximum(tension_sigma, tz)
+    weight = static_weight(system)
+    slack = tension_max / np.maximum((1 - SLACK_MARGIN) * weight, 1.0)
+    overload = (weight + tension_max) / system["swl"]
+    # the unit strokes with its spring deflection and, with AHC, the motion it compensates
+    compensated = np.sqrt(np.trapezoid(((1 - residual) * state["rao"]) ** 2 * spectrum, OMEGA, axis=-1))
+    stroke = (tension_max / unit_k + _most_probable_maximum(compensated, tz)) / max(system["stroke"] / 2, 1e-6)
+    return {
+        "tension_max": weight + tension_max,
+        "slack": slack,
+        "overload": overload,
+        "stroke": stroke,
+        "utilization": np.maximum.reduce([slack, overload, stroke]),
+    }
+
+
+def evaluate_column(system, hs, tp, heading):
+    """Criteria of the sea states hs (array) at one Tp and heading.
+
+    Returns {"splash": utilization in the splash zone, "depth": utilization at depth, "valid":
+    sea state within the steepness limit}, each shaped like hs. A utilization above 1 fails a
+    criterion: slack slings, unit SWL or unit stroke.
+    """
+    state = sea_state(system, hs, tp, heading)
+    hs = state["hs"]
+
+    # splash zone: DNV simplified method with the compensated crane tip amplitude
+    loads = splash_zone_loads(system, hs, [tp], crane_amplitude(state))
+    index = np.arange(len(hs))
+    splash = loads["utilization"][index, 0, index]
+    valid = loads["valid"][index, 0, index]
+    return {"splash": splash, "depth": depth_check(system, state)["utilization"], "valid": valid}
@@ -0,0 +1,118 @@
+"""Closed-loop time-domain simulation of a lift with the external function runtime.
+
+The crane tip heaves in an irregular sea state while the payload is lowered, and the compiled
+configuration (utils.external_function) sets the unit force between the crane wire and the
+payload. The runtime sees the simulated stroke, stroke velocity, tension (its force through the
+load cell lag TENSION_LAG) and crane tip heave velocity, as it would on a unit:
+
+    crane tip   sum of JONSWAP components through the crane tip RAO of utils.lift_model, with
+                fixed random phases so every simulation of a study sees the same waves
+    payload     (m + A33) a_p = F - W, W the weight in water, rigid wire
+    stroke      s'' = a_c - a_p, end stops at 0 and the unit stroke
+    depth       lowering at DEFAULT_LOWERING_SPEED from the surface
+
+The simulation starts at the static equilibrium stroke of the gas spring. It is a screening
+model for utils.sensitivity and utils.tuning, not a replacement for the OrcaFlex analysis.
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from utils.external_function import ExternalFunction, KAPPA, OUTPUT_INDEX
+from utils.lift_model import OMEGA, crane_tip_rao, jonswap
+from utils.splash_zone import DEFAULT_COEFFICIENTS, DEFAULT_LOWERING_SPEED, G, RHO
+
+DT = 0.01                        # s
+DURATION = 60.0                  # s
+SEA_STATE = (2.0, 8.0, 0.0)      # Hs [m], Tp [s], heading [deg]
+WAVE_SEED = 1
+TENSION_LAG = 0.1                # s, load cell and filter time constant of the measured tension
+METRICS = {
+    "F_fb_peak": "Peak active force |F_fb| [kN]",
+    "stroke_utilization": "Max stroke utilization",
+    "payload_velocity": "RMS payload heave velocity [m/s]",
+    "tension_max": "Max tension [kN]",
+    "tension_min": "Min tension [kN]",
+}
+
+
+@lru_cache(maxsize=8)
+def crane_tip_motion(hs, tp, heading, duration=DURATION, dt=DT):
+    """(velocity, acceleration) lists of the crane tip heave, one value per time step"""
+    t = np.arange(0.0, duration, dt)[:, None]
+    spectrum = jonswap(OMEGA, [hs], tp)[0]
+    amplitude = np.sqrt(2 * spectrum * np.gradient(OMEGA)) * crane_tip_rao(OMEGA, heading)
+    phase = np.random.default_rng(WAVE_SEED).uniform(0, 2 * math.pi, len(OMEGA))
+    velocity = -(amplitude * OMEGA * np.sin(OMEGA * t + phase)).sum(axis=1)
+    acceleration = -(amplitude * OMEGA ** 2 * np.cos(OMEGA * t + phase)).sum(axis=1)
+    return velocity.tolist(), acceleration.tolist()
+
+
+def equilibrium_stroke(record, weight):
+    """Stroke [m] where the gas spring carries the weight [kN]"""
+    unit = record["unit_parameters"]
+    s_eq, f_precharge = unit[0], unit[1] * G
+    gas_length = unit[5] / unit[4] if unit[4] > 0 else 0.0
+    if gas_length <= 0 or f_precharge <= 0 or weight <= 0:
+        return s_eq
+    return s_eq + gas_length * (1 - (f_precharge / weight) ** (1 / KAPPA))
+
+
+def simulate(record, stroke, sea_state=SEA_STATE, duration=DURATION, dt=DT):
+    """METRICS of one lift; record as from utils.config_binary, stroke the unit stroke [m]"""
+    payload = record["payload_parameters"]
+    mass = (payload[1] + payload[2]) * 1000.0
+    area, volume = payload[4], payload[5]
+    added_mass = RHO * DEFAULT_COEFFICIENTS["added_mass"] * math.pi / 4 * area ** 1.5
+    weight = (mass - RHO * volume) * G / 1000.0              # kN
+    inertia = (mass + added_mass) / 1000.0                   # t, so force [kN] / inertia = m/s²
+    velocity, acceleration = crane_tip_motion(*sea_state, duration, dt)
+    # the external MRU signal is inverted relative to the onboard heave velocity
+    heave_sign = -1.0 if record["parameters"]["motion_reference"] == "External" else 1.0
+    lag = min(dt / TENSION_LAG, 1.0)
+
+    runtime = ExternalFunction(record)
+    step = runtime.step
+    out = runtime.out
+    f_fb = OUTPUT_INDEX["F_fb"]
+
+    s0 = min(max(equilibrium_stroke(record, weight), 0.0), stroke)
+    s, v = s0, 0.0
+    force = tension = weight
+    s_min = s_max = s0
+    force_min = force_max = force
+    peak = 0.0
+    squares = 0.0
+    for i in range(len(velocity)):
+        t = i * dt
+        force = step(t, dt, s, v, tension, heave_sign * velocity[i], DEFAULT_LOWERING_SPEED * t)
+        tension += lag * (force - tension)
+        v += (acceleration[i] - (force - weight) / inertia) * dt
+        s += v * dt
+        if s < 0.0:
+            s, v = 0.0, max(v, 0.0)
+        elif s > stroke:
+            s, v = stroke, min(v, 0.0)
+        if s < s_min:
+            s_min = s
+        elif s > s_max:
+            s_max = s
+        if force < force_min:
+            force_min = force
+        elif force > force_max:
+            force_max = force
+        if abs(out[f_fb]) > peak:
+            peak = abs(out[f_fb])
+        payload_velocity = velocity[i] - v
+        squares += payload_velocity * payload_velocity
+
+    extension = (s_max - s0) / (stroke - s0) if stroke > s0 else 1.0
+    retraction = (s0 - s_min) / s0 if s0 > 0 else 1.0
+    return {
+        "F_fb_peak": peak,
+        "stroke_utilization": max(extension, retraction),
+        "payload_velocity": math.sqrt(squares / len(velocity)),
+        "tension_max": force_max,
+        "tension_min": force_min,
+    }
@@ -0,0 +1,208 @@
+"""Monte Carlo propagation of parameter uncertainty through the lift and splash zone models.
+
+Uncertain parameters (payload weight, sling weight, gas volume) are drawn in batches and pushed
+through utils.splash_zone and utils.lift_model as arrays, one sample per element. Nothing is kept
+per sample: every batch is folded into streaming statistics, so memory does not grow with the
+number of samples:
+
+    RunningStats    count, mean, variance (Welford / Chan's merge of batch moments), min, max
+    P2Quantiles     P² quantile estimators (Jain & Chlamtac), five markers per quantile
+
+The P² markers are updated once per batch: marker positions move by the number of batch values
+below them and each marker is moved to its desired position with the P² parabolic formula, which
+holds for steps of more than one position.
+
+    study = run_study(system, unit_area, parameters, hs=2.0, tp=8.0, heading=0.0, samples=10**6)
+    study["F_total"]["P90"]
+"""
+import math
+
+import numpy as np
+
+from utils.lift_model import crane_amplitude, depth_check, natural_period, sea_state
+from utils.splash_zone import splash_zone_loads
+
+BATCH_SIZE = 4096
+QUANTILES = (0.1, 0.5, 0.9)
+DISTRIBUTIONS = ("Fixed", "Normal", "Uniform", "Lognormal")
+PARAMETERS = {
+    # name: (label, unit)
+    "payload_weight": ("Payload weight in air", "Te"),
+    "sling_weight": ("Weight of slings", "Te"),
+    "gas_volume": ("Unit gas volume", "m³"),
+}
+OUTPUTS = {
+    "F_hyd": "Splash zone hydrodynamic force [kN]",
+    "F_total": "Splash zone total force [kN]",
+    "splash": "Splash zone slack sling utilization",
+    "natural_period": "Natural period at depth [s]",
+    "tension_max": "Max wire tension at depth [kN]",
+    "depth": "Utilization at depth",
+}
+
+
+def draw(rng, nominal, distribution, spread, size):
+    """Samples of a parameter; spread is the coefficient of variation (Normal, Lognormal) or the
+    relative half width (Uniform). Negative draws are clipped to zero."""
+    if distribution == "Fixed" or spread <= 0 or nominal <= 0:
+        return np.full(size, float(nominal))
+    if distribution == "Normal":
+        values = rng.normal(nominal, spread * nominal, size)
+    elif distribution == "Uniform":
+        values = rng.uniform(nominal * (1 - spread), nominal * (1 + spread), size)
+    elif distribution == "Lognormal":
+        sigma = math.sqrt(math.log(1 + spread ** 2))
+        values = rng.lognormal(math.log(nominal) - sigma ** 2 / 2, sigma, size)
+    else:
+        raise ValueError(f"Unknown distribution '{distribution}'")
+    return np.maximum(values, 0.0)
+
+
+class RunningStats:
+    """Mean, variance, min and max of every output column, merged batch by batch"""
+
+    def __init__(self, n_outputs):
+        self.count = 0
+        self.mean = np.zeros(n_outputs)
+        self.m2 = np.zeros(n_outputs)
+        self.minimum = np.full(n_outputs, np.inf)
+        self.maximum = np.full(n_outputs, -np.inf)
+
+    def update(self, batch):
+        """Add a batch shaped (n_samples, n_outputs)"""
+        mean = batch.mean(axis=0)
+        self._merge(len(batch), mean, ((batch - mean) ** 2).sum(axis=0), batch.min(axis=0), batch.max(axis=0))
+
+    def merge(self, other):
+        """Combine with the statistics of another (disjoint) set of samples"""
+        self._merge(other.count, other.mean, other.m2, other.minimum, other.maximum)
+
+    def _merge(self, count, mean, m2, minimum, maximum):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.minimum = np.minimum(self.minimum, minimum)
+        self.maximum = np.maximum(self.maximum, maximum)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.zeros_like(self.m2)
+
+
+class P2Quantiles:
+    """P² estimates of the quantiles probs of every output column"""
+
+    def __init__(self, n_outputs, probs=QUANTILES):
+        probs = np.asarray(probs, dtype=float)
+        self.probs = probs
+        # desired marker positions per sample: min, p/2, p, (1+p)/2, max
+        self.increments = np.stack([np.zeros_like(probs), probs / 2, probs, (1 + probs) / 2, np.ones_like(probs)], axis=-1)
+        self.n_outputs = n_outputs
+        self.heights = None          # (n_outputs, n_probs, 5)
+        self.positions = None
+        self.desired = None
+
+    def update(self, batch):
+        """Add a batch shaped (n_samples, n_outputs)"""
+        size = len(batch)
+        if self.heights is None:
+            # the first batch places the markers at its own quantiles
+            if size < 5:
+                raise ValueError("The first batch needs at least 5 samples")
+            self.heights = np.moveaxis(np.quantile(batch, self.increments, axis=0), -1, 0)
+            self.positions = np.broadcast_to(1 + self.increments * (size - 1), self.heights.shape).copy()
+            self.desired = self.positions.copy()
+            return
+
+        heights, positions = self.heights, self.positions
+        heights[..., 0] = np.minimum(heights[..., 0], batch.min(axis=0)[:, None])
+        heights[..., 4] = np.maximum(heights[..., 4], batch.max(axis=0)[:, None])
+        ordered = np.sort(batch, axis=0)
+        for column in range(self.n_outputs):
+            below = np.searchsorted(ordered[:, column], heights[column, :, 1:4], side="left")
+            positions[column, :, 1:4] += below
+        positions[..., 4] += size
+        self.desired += size * self.increments
+
+        for i in (1, 2, 3):
+            n_lo, n, n_hi = positions[..., i - 1], positions[..., i], positions[..., i + 1]
+            q_lo, q, q_hi = heights[..., i - 1], heights[..., i], heights[..., i + 1]
+            step = np.clip(np.trunc(self.desired[..., i] - n), n_lo - n + 1, n_hi - n - 1)
+            step = np.where(np.abs(self.desired[..., i] - n) >= 1, step, 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                parabolic = q + step / (n_hi - n_lo) * ((n - n_lo + step) * (q_hi - q) / (n_hi - n)
+                                                        + (n_hi - n - step) * (q - q_lo) / (n - n_lo))
+                linear = q + step * np.where(step > 0, (q_hi - q) / (n_hi - n), (q - q_lo) / (n - n_lo))
+            moved = np.where((q_lo < parabolic) & (parabolic < q_hi), parabolic, linear)
+            heights[..., i] = np.where(step != 0, moved, q)
+            positions[..., i] = n + step
+
+    def quantiles(self):
+        """Estimates shaped (n_outputs, n_probs)"""
+        return self.heights[..., 2].copy()
+
+
+def evaluate_samples(system, unit_area, payload_weight, sling_weight, gas_volume, hs, tp, heading):
+    """Outputs (OUTPUTS) of the system for arrays of parameter samples, in one sea state"""
+    mass = (payload_weight + sling_weight) * 1000.0
+    gas_length = gas_volume / unit_area if unit_area > 0 else np.full(mass.shape, system["gas_length"])
+    samples = {**system, "mass": mass, "gas_length": gas_length}
+    state = sea_state(system, [hs], tp, heading)
+    loads = splash_zone_loads({"mass": mass, "area": system["area"], "volume": system["volume"]},
+                              [hs], [tp], crane_amplitude(state))
+    at_depth = depth_check(samples, state)
+    return {
+        "F_hyd": loads["F_hyd"].reshape(-1),
+        "F_total": loads["F_total"].reshape(-1),
+        "splash": loads["utilization"].reshape(-1),
+        "natural_period": natural_period(samples),
+        "tension_max": at_depth["tension_max"] / 1000.0,
+        "depth": at_depth["utilization"],
+    }
+
+
+def run_study(system, unit_area, parameters, hs, tp, heading, samples, seed=None, batch_size=BATCH_SIZE, progress=None):
+    """Statistics of OUTPUTS over `samples` draws.
+
+    system      lift system (utils.lift_model.lift_system) with the nominal values
+    unit_area   unit cross-sectional area [m²], turns the gas volume into the gas column length
+    parameters  {name: (nominal, distribution, spread)} for the names in PARAMETERS
+    progress    optional callback(fraction), called after every batch
+
+    Returns {output: {"nominal", "mean", "std", "min", "max", "P10", "P50", "P90"}}.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(OUTPUTS)
+    stats = RunningStats(len(names))
+    quantiles = P2Quantiles(len(names))
+    nominal = evaluate_samples(system, unit_area, *(np.array([parameters[name][0]], dtype=float) for name in PARAMETERS), hs, tp, heading)
+
+    done = 0
+    while done < samples:
+        # the last batch is never smaller than the first, so the quantiles always start from a full batch
+        size = samples - done if samples - done < 2 * batch_size else batch_size
+        draws = [draw(rng, *parameters[name], size) for name in PARAMETERS]
+        outputs = evaluate_samples(system, unit_area, *draws, hs, tp, heading)
+        batch = np.column_stack([outputs[name] for name in names])
+        stats.update(batch)
+        quantiles.update(batch)
+        done += size
+        if progress is not None:
+            progress(done / samples)
+
+    estimates = quantiles.quantiles()
+    return {
+        name: {
+            "nominal": float(nominal[name][0]),
+            "mean": float(stats.mean[column]),
+            "std": float(stats.std[column]),
+            "min": float(stats.minimum[column]),
+            "max": float(stats.maximum[column]),
+            **{f"P{round(p * 100)}": float(estimates[column, k]) for k, p in enumerate(quantiles.probs)},
+        }
+        for column, name in enumerate(names)
+    }
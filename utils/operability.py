@@ -0,0 +1,165 @@
+"""Operability (allowable sea state) grids of a configured lift.
+
+Every (Tp, heading) column of the Hs x Tp x heading grid is evaluated with
+utils.lift_model.evaluate_column. Columns are computed in the run's thread first, and only the
+columns still missing after INLINE_SECONDS go to a process pool: spawning and importing the
+workers takes longer than a typical grid. The grid is saved to a .npz file after every few
+columns, keyed by the lift system and the grid axes, so an interrupted run resumes with the
+columns still missing and a finished grid is loaded without recomputation:
+
+    run = OperabilityRun(system, hs, tp, headings)      # starts in a background thread
+    run.progress, run.status, run.result()
+
+    SAFELINK_OPERABILITY_DIR        grid files (default operability)
+    SAFELINK_OPERABILITY_WORKERS    worker processes (default: CPU count - 1)
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from utils.catalog import unit_rating
+from utils.config_binary import record_from_config
+from utils.lift_model import evaluate_column, lift_system
+
+MODEL_VERSION = 2
+DIRECTORY = os.environ.get("SAFELINK_OPERABILITY_DIR", "operability")
+WORKERS = int(os.environ.get("SAFELINK_OPERABILITY_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+SAVE_SECONDS = 1.0
+INLINE_SECONDS = 2.0             # columns computed in the thread before the process pool is started
+CRITERIA = ("splash", "depth")
+DEFAULT_HS = tuple(float(v) for v in np.round(np.arange(0.5, 5.01, 0.25), 2))
+DEFAULT_TP = tuple(float(v) for v in np.arange(4.0, 18.01, 1.0))
+DEFAULT_HEADINGS = tuple(float(v) for v in np.arange(0.0, 180.1, 15.0))
+
+
+def config_system(config):
+    """Lift system (utils.lift_model) of a configuration, rated with its catalog unit"""
+    record = record_from_config(config)
+    swl, stroke = unit_rating(record["unit_id"])
+    return lift_system(record, swl, stroke)
+
+
+def grid_key(system, hs, tp, headings):
+    """Cache key of a system and grid"""
+    text = json.dumps([MODEL_VERSION, system, list(hs), list(tp), list(headings)], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def grid_path(key, directory=DIRECTORY):
+    return os.path.join(directory, f"{key}.npz")
+
+
+def _empty(hs, tp, headings):
+    shape = (len(hs), len(tp), len(headings))
+    grid = {name: np.full(shape, np.nan) for name in CRITERIA}
+    grid["valid"] = np.zeros(shape, dtype=bool)
+    grid["done"] = np.zeros(shape[1:], dtype=bool)
+    grid.update(hs=np.asarray(hs, dtype=float), tp=np.asarray(tp, dtype=float), headings=np.asarray(headings, dtype=float))
+    return grid
+
+
+def load_grid(path):
+    """Grid arrays of a saved (possibly partial) grid, or None"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def save_grid(path, grid):
+    """Atomic write, so a reader or an interrupted run never sees a half-written file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp.npz"
+    np.savez(tmp, **grid)
+    os.replace(tmp, path)
+
+
+def allowable_table(grid, criterion=None):
+    """Highest Hs per Tp (rows) and heading (columns) meeting the criteria; NaN where even the
+    lowest Hs fails or the column is not computed yet"""
+    utilization = np.fmax(grid["splash"], grid["depth"]) if criterion is None else grid[criterion]
+    ok = (utilization <= 1.0) & grid["valid"]
+    passing = np.cumprod(ok, axis=0).astype(bool)
+    count = passing.sum(axis=0)
+    table = np.where(count > 0, grid["hs"][np.maximum(count - 1, 0)], np.nan)
+    table[~grid["done"]] = np.nan
+    return pd.DataFrame(table, index=pd.Index(grid["tp"], name="Tp [s]"), columns=[f"{h:g}°" for h in grid["headings"]])
+
+
+class OperabilityRun:
+    """Computation of one grid in a background thread (held in st.cache_resource)"""
+
+    def __init__(self, system, hs, tp, headings, directory=DIRECTORY, workers=WORKERS):
+        self.system = system
+        self.key = grid_key(system, hs, tp, headings)
+        self.path = grid_path(self.key, directory)
+        self.grid = load_grid(self.path) or _empty(hs, tp, headings)
+        self.workers = workers
+        self.status = "running"
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"safelink-operability-{self.key}")
+        self._thread.start()
+
+    @property
+    def progress(self):
+        return float(self.grid["done"].mean())
+
+    def running(self):
+        return self._thread.is_alive()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def result(self):
+        return self.grid
+
+    def _store(self, i, j, column):
+        grid = self.grid
+        for name in CRITERIA:
+            grid[name][:, i, j] = column[name]
+        grid["valid"][:, i, j] = column["valid"]
+        grid["done"][i, j] = True
+
+    def _run(self):
+        grid = self.grid
+        missing = [(i, j) for i, j in zip(*np.nonzero(~grid["done"]))]
+        if not missing:
+            self.status = "done"
+            return
+        try:
+            started = saved = time.monotonic()
+            while missing and not self._cancel.is_set() and (self.workers <= 1 or time.monotonic() - started < INLINE_SECONDS):
+                i, j = missing.pop(0)
+                self._store(i, j, evaluate_column(self.system, grid["hs"], float(grid["tp"][i]), float(grid["headings"][j])))
+                if time.monotonic() - saved > SAVE_SECONDS:
+                    save_grid(self.path, grid)
+                    saved = time.monotonic()
+            if missing and not self._cancel.is_set():
+                # spawn, so the workers do not inherit the server's threads and locks
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(self.workers, mp_context=context) as pool:
+                    futures = {
+                        pool.submit(evaluate_column, self.system, grid["hs"], float(grid["tp"][i]), float(grid["headings"][j])): (i, j)
+                        for i, j in missing
+                    }
+                    for future in as_completed(futures):
+                        self._store(*futures[future], future.result())
+                        if self._cancel.is_set():
+                            pool.shutdown(cancel_futures=True)
+                            break
+                        if time.monotonic() - saved > SAVE_SECONDS:
+                            save_grid(self.path, grid)
+                            saved = time.monotonic()
+            save_grid(self.path, grid)
+            self.status = "cancelled" if self._cancel.is_set() else "done"
+        except Exception as e:
+            self.status = "failed"
+            self.error = f"{type(e).__name__}: {e}"
@@ -0,0 +1,208 @@
+"""Lightweight rerun instrumentation.
+
+Named timing spans and per-session memory samples are recorded into process-wide rolling
+histograms (a bounded window of recent values for percentiles plus cumulative Prometheus
+buckets). Recording a span costs two perf_counter calls, a lock and a deque append, so it is
+meant to stay enabled in production; set SAFELINK_PROFILING=0 to turn it off.
+
+The metrics are shown on the admin page (with a download of the Prometheus text) and written
+in Prometheus text format to one file per server process, metrics/safelink-<pid>.prom, with a
+process label on every series. The directory is not served by Streamlit; point the node
+exporter's textfile collector (or another local scraper) at it. Set SAFELINK_METRICS_DIR to
+change it.
+"""
+import atexit
+import bisect
+import os
+import pickle
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+ENABLED = os.environ.get("SAFELINK_PROFILING", "1") != "0"
+WINDOW = 2048
+METRICS_DIR = os.environ.get("SAFELINK_METRICS_DIR", "metrics")
+METRICS_FILE = os.path.join(METRICS_DIR, f"safelink-{os.getpid()}.prom")
+PROCESS_LABEL = f"{socket.gethostname()}-{os.getpid()}"
+METRICS_INTERVAL = 5.0          # seconds between writes of the Prometheus text file
+MEMORY_SAMPLE_EVERY = 20        # sample the session state size every N reruns of a session
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(2 ** k for k in range(10, 31, 2))  # 1 KiB .. 1 GiB
+
+
+class RollingHistogram:
+    """Recent values for percentiles plus cumulative bucket counts"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.window = deque(maxlen=WINDOW)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.window.append(value)
+        self.total += value
+        self.count += 1
+
+    def summary(self):
+        values = np.fromiter(self.window, dtype=float)
+        if values.size == 0:
+            return {"count": self.count}
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        return {"count": self.count, "mean": values.mean(), "p50": p50, "p90": p90, "p99": p99, "max": values.max()}
+
+
+_lock = threading.Lock()
+_spans = {}
+_memory = RollingHistogram(BYTES_BUCKETS)
+_last_write = 0.0
+
+
+def record(name, seconds):
+    """Record a duration for the named span"""
+    with _lock:
+        series = _spans.get(name)
+        if series is None:
+            series = _spans[name] = RollingHistogram(SECONDS_BUCKETS)
+        series.observe(seconds)
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as the named span"""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """Decorator version of span()"""
+    def decorator(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def session_state_bytes(state):
+    """Approximate size of a session state (pickled size of the picklable values)"""
+    size = 0
+    for key in list(state.keys()):
+        try:
+            size += len(pickle.dumps(state[key], protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            continue
+    return size
+
+
+def sample_session_memory(state):
+    """Record the session state size every MEMORY_SAMPLE_EVERY reruns of the session"""
+    if not ENABLED:
+        return
+    reruns = state.get("_profiling_reruns", 0) + 1
+    state["_profiling_reruns"] = reruns
+    if reruns % MEMORY_SAMPLE_EVERY == 1:
+        size = session_state_bytes(state)
+        with _lock:
+            _memory.observe(size)
+
+
+def process_rss_bytes():
+    """Resident set size of this process (Linux), or None"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def snapshot():
+    """Summaries of all spans and of the session memory samples"""
+    with _lock:
+        spans = {name: series.summary() for name, series in _spans.items()}
+        memory = _memory.summary()
+    return spans, memory
+
+
+def _histogram_lines(metric, labels, series):
+    labels = f'process="{PROCESS_LABEL}",{labels}'
+    lines = []
+    cumulative = 0
+    for bound, count in zip(series.buckets, series.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels}le="{bound:g}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{{labels}le="+Inf"}} {series.count}')
+    plain = f"{{{labels.rstrip(',')}}}" if labels else ""
+    lines.append(f"{metric}_sum{plain} {series.total:.6f}")
+    lines.append(f"{metric}_count{plain} {series.count}")
+    return lines
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format"""
+    lines = [
+        "# HELP safelink_span_seconds Duration of instrumented phases of a Streamlit rerun.",
+        "# TYPE safelink_span_seconds histogram",
+    ]
+    with _lock:
+        for name, series in sorted(_spans.items()):
+            lines.extend(_histogram_lines("safelink_span_seconds", f'span="{name}",', series))
+        lines.extend([
+            "# HELP safelink_session_state_bytes Sampled size of a session state.",
+            "# TYPE safelink_session_state_bytes histogram",
+        ])
+        lines.extend(_histogram_lines("safelink_session_state_bytes", "", _memory))
+    rss = process_rss_bytes()
+    if rss is not None:
+        lines.extend([
+            "# HELP safelink_process_resident_bytes Resident memory of the server process.",
+            "# TYPE safelink_process_resident_bytes gauge",
+            f'safelink_process_resident_bytes{{process="{PROCESS_LABEL}"}} {rss}',
+        ])
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(force=False):
+    """Write this process's Prometheus text file at most every METRICS_INTERVAL seconds"""
+    global _last_write
+    now = time.monotonic()
+    with _lock:
+        if not ENABLED or (not force and now - _last_write < METRICS_INTERVAL):
+            return
+        _last_write = now
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        # unique temp name, so concurrent writers never interleave; the collector skips non-.prom files
+        handle, tmp = tempfile.mkstemp(prefix=".safelink-", suffix=".tmp", dir=METRICS_DIR)
+        with os.fdopen(handle, "w") as file:
+            file.write(prometheus_text())
+        os.replace(tmp, METRICS_FILE)
+    except OSError:
+        pass
+
+
+@atexit.register
+def _remove_metrics_file():
+    """Drop this process's file on exit, so stale series do not outlive the process"""
+    try:
+        os.remove(METRICS_FILE)
+    except OSError:
+        pass
@@ -0,0 +1,112 @@
+"""Unit recommendation over a sorted, columnar catalog index.
+
+Each indexed column (SWL, stroke, design water depth) is kept as a sorted copy plus the row
+order, so a lower bound such as "SWL >= 120 Te" is a binary search followed by a slice of row
+ids (a range scan). The most selective range is scanned first and the remaining conditions
+are checked column-wise on that candidate set only.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.capabilities import CAPABILITY_BITS, CATEGORY_MASKS
+
+INDEXED_COLUMNS = ("swl", "stroke", "design_water_depth")
+
+
+class CatalogIndex:
+    """Sorted column indexes over the catalog arrays of utils.catalog.unit_arrays"""
+
+    def __init__(self, arrays, capability_masks=None, cache_size=256):
+        self.arrays = arrays
+        self.size = len(arrays["swl"])
+        self.order = {}
+        self.sorted = {}
+        for column in INDEXED_COLUMNS:
+            order = np.argsort(arrays[column], kind="stable")
+            self.order[column] = order
+            self.sorted[column] = arrays[column][order]
+
+        # feature availability as one capability bit mask per unit (utils.capabilities)
+        if capability_masks is None:
+            capability_masks = [CATEGORY_MASKS.get(str(category), 0) for category in arrays["category"]]
+        self.capabilities = np.asarray(capability_masks, dtype=np.uint8)
+
+        # one index serves every session's script thread
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def range_scan(self, column, low=-np.inf, high=np.inf):
+        """Row ids with low <= column <= high"""
+        values = self.sorted[column]
+        start = np.searchsorted(values, low, side="left")
+        stop = np.searchsorted(values, high, side="right")
+        return self.order[column][start:stop]
+
+    def candidates(self, bounds):
+        """Row ids satisfying every (low, high) bound in `bounds` {column: (low, high)}"""
+        if not bounds:
+            return np.arange(self.size)
+        counts = {}
+        for column, (low, high) in bounds.items():
+            values = self.sorted[column]
+            counts[column] = np.searchsorted(values, high, side="right") - np.searchsorted(values, low, side="left")
+        first = min(counts, key=counts.get)
+        rows = self.range_scan(first, *bounds[first])
+        for column, (low, high) in bounds.items():
+            if column != first and rows.size:
+                values = self.arrays[column][rows]
+                rows = rows[(values >= low) & (values <= high)]
+        return rows
+
+    def recommend(self, payload_weight, sling_weight=0.0, lifting_height=None, rod_lock_depth=None,
+                  min_stroke=0.0, features=(), max_utilization=1.0, limit=10):
+        """Ranked units for a payload, best first.
+
+        Units must carry payload + sling within `max_utilization` of SWL, offer every required
+        feature, have at least `min_stroke`, fit the lifting height and be rated for the rod lock depth.
+        The ranking prefers the highest SWL utilization (the smallest adequate unit), then the longer stroke.
+        """
+        key = (round(payload_weight, 3), round(sling_weight, 3), lifting_height, rod_lock_depth,
+               round(min_stroke, 3), tuple(sorted(features)), max_utilization, limit)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        load = payload_weight + sling_weight
+        bounds = {"swl": (load / max_utilization, np.inf)}
+        if min_stroke > 0:
+            bounds["stroke"] = (min_stroke, np.inf)
+        if rod_lock_depth is not None:
+            bounds["design_water_depth"] = (rod_lock_depth, np.inf)
+        rows = self.candidates(bounds)
+
+        if features:
+            required = sum(CAPABILITY_BITS[feature] for feature in features)
+            rows = rows[(self.capabilities[rows] & required) == required]
+        if lifting_height is not None and rows.size:
+            rows = rows[self.arrays["height"][rows] + self.arrays["stroke"][rows] <= lifting_height]
+
+        utilization = load / self.arrays["swl"][rows]
+        ranking = np.lexsort((-self.arrays["stroke"][rows], -utilization))[:limit]
+        result = [
+            {
+                "unit_type": str(self.arrays["unit_type"][row]),
+                "unit_id": str(self.arrays["unit_id"][row]),
+                "category": str(self.arrays["category"][row]),
+                "swl": float(self.arrays["swl"][row]),
+                "stroke": float(self.arrays["stroke"][row]),
+                "design_water_depth": float(self.arrays["design_water_depth"][row]),
+                "utilization": float(util),
+            }
+            for row, util in zip(rows[ranking], utilization[ranking])
+        ]
+
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
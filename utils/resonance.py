@@ -0,0 +1,64 @@
+"""Natural heave period of the lift over depth, and its margin to the wave periods.
+
+The payload hangs on the crane wire and the unit in series (utils.lift_model). With depth the
+wire gets softer and heavier, so the natural period grows, and a lift that is clear of the waves
+near the surface can pass through resonance on its way down. Periods are evaluated in one pass
+over a dense depth grid and, for the catalog, over every unit by broadcasting the unit columns
+(n_units, 1) against the depths (1, n_depth):
+
+    periods = candidate_periods(system, catalog_arrays())      # (n_units, n_depth)
+    margin = resonance_margin(periods, wave_band(tp))          # < 0 inside the wave band
+
+A catalog unit's gas column is its gas volume over the piston area that carries the SWL at the
+design pressure.
+"""
+import math
+
+import numpy as np
+
+from utils.lift_model import OMEGA, jonswap, natural_period
+from utils.splash_zone import G
+
+DEPTHS = np.linspace(0.0, 3000.0, 3001)      # m
+BAND_LEVEL = 0.5                             # wave band: spectral density above half the peak
+
+
+def wave_band(tp, level=BAND_LEVEL):
+    """(shortest, longest) wave period [s] carrying energy in the sea states with peak periods tp"""
+    tp = np.atleast_1d(np.asarray(tp, dtype=float))
+    periods = 2 * math.pi / OMEGA
+    energetic = np.zeros(OMEGA.shape, dtype=bool)
+    for peak in tp:
+        spectrum = jonswap(OMEGA, [1.0], peak)[0]
+        energetic |= spectrum >= level * spectrum.max()
+    return float(periods[energetic].min()), float(periods[energetic].max())
+
+
+def period_curve(system, depths=DEPTHS):
+    """Natural period [s] of the configured system at every depth"""
+    return natural_period(system, np.asarray(depths, dtype=float))
+
+
+def catalog_gas_lengths(arrays):
+    """Gas column length [m] of every catalog unit (see module docstring)"""
+    area = arrays["swl"] * 1000.0 * G / (arrays["design_pressure"] * 1e5)
+    return arrays["gas_volume"] / area
+
+
+def candidate_periods(system, arrays, depths=DEPTHS):
+    """Natural period [s] of the payload on every catalog unit, shape (n_units, n_depth)"""
+    candidates = {**system, "gas_length": catalog_gas_lengths(arrays)[:, None]}
+    return natural_period(candidates, np.asarray(depths, dtype=float)[None, :])
+
+
+def resonance_margin(periods, band):
+    """Relative distance of the natural periods to the wave band, negative inside the band"""
+    low, high = band
+    return np.maximum((low - periods) / low, (periods - high) / high)
+
+
+def resonant_ranges(depths, margin):
+    """[(from, to)] depth ranges [m] where the natural period is inside the wave band"""
+    inside = np.concatenate([[False], np.asarray(margin) < 0, [False]])
+    edges = np.flatnonzero(np.diff(inside.astype(np.int8)))
+    return [(float(depths[start]), float(depths[end - 1])) for start, end in zip(edges[::2], edges[1::2])]
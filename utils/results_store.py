@@ -0,0 +1,254 @@
+"""Local columnar store for simulation results, keyed by configuration hash.
+
+Layout (Parquet, hive partitioned):
+    <root>/cases/category=<category>/<config_hash>.parquet           one row per exported configuration
+    <root>/series/category=<category>/config_hash=<hash>/*.parquet   wide time series, one column per channel
+    <root>/stats/<channel>/<hash>.npz, <root>/summary/<channel>.parquet   post-processed (utils.statistics)
+
+Queries are two-staged: the small cases table is filtered first (predicate pushdown on
+unit/payload/function parameters), then only the matching series partitions are opened and
+only the requested channel columns are read.
+"""
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.channels import channel_id
+from utils.config_model import config_hash
+
+DEFAULT_ROOT = os.environ.get("SAFELINK_RESULTS_STORE", "results_store")
+LOCK_TIMEOUT = 60.0              # seconds to wait for a file lock
+
+STRING_PARAMETERS = {"rod_orientation", "rod_lock_operation", "rod_lock_mode", "motion_reference"}
+FUNCTION_PARAMETERS = [
+    "rod_orientation", "rod_lock_depth", "rod_lock_operation", "rod_lock_mode", "lock_hold_time", "lock_speed",
+    "quick_start_time", "quick_acceleration_limit", "tension_start_time", "tension_tolerance",
+    "heave_start_time", "max_stroke_speed", "motion_reference",
+]
+
+
+def _case_schema():
+    fields = [
+        ("config_hash", pa.string()),
+        ("ingested_at", pa.timestamp("s", tz="UTC")),
+        ("Unit.unit_type", pa.string()),
+        ("Unit.unit_id", pa.string()),
+    ]
+    for key in ("quick_lifting", "constant_tension", "active_heave_compensation", "rod_lock"):
+        fields.append((f"Special_Functions.{key}", pa.bool_()))
+    for key in FUNCTION_PARAMETERS:
+        fields.append((f"Function_Parameters.{key}", pa.string() if key in STRING_PARAMETERS else pa.float64()))
+    fields.append(("Safety_Parameters.max_force_limit", pa.float64()))
+    for section in ("Unit_Parameters", "Payload_Parameters"):
+        for i in range(1, 11):
+            fields.append((f"{section}.parameter_{i}", pa.float64()))
+    fields.append(("Results.customized", pa.bool_()))
+    for key in ("body_results", "rod_results", "payload_results"):
+        fields.append((f"Results.{key}", pa.string()))
+    return pa.schema(fields)
+
+
+CASE_SCHEMA = _case_schema()
+# category is carried by the partition directory, config_hash by the file name / partition
+PARTITIONING = ds.partitioning(pa.schema([("category", pa.string())]), flavor="hive")
+SERIES_PARTITIONING = ds.partitioning(
+    pa.schema([("category", pa.string()), ("config_hash", pa.string())]), flavor="hive"
+)
+
+
+def case_row(config, digest):
+    """Convert an external function configuration to a typed row of the cases table"""
+    row = {"config_hash": digest, "ingested_at": datetime.now(timezone.utc)}
+    for field in CASE_SCHEMA:
+        section, _, key = field.name.partition(".")
+        if not key or not config.has_option(section, key):
+            continue
+        value = config[section][key]
+        if pa.types.is_boolean(field.type):
+            row[field.name] = value == "True"
+        elif pa.types.is_floating(field.type):
+            row[field.name] = float(value)
+        else:
+            row[field.name] = value
+    return row
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """Exclusive lock on <path>.lock across processes, for read-modify-write of shared files"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a+b") as handle:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if os.name == "nt":
+                    import msvcrt
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for the lock on {path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class ResultsStore:
+    """Partitioned Parquet store of result time series per exported configuration"""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.cases_dir = os.path.join(root, "cases")
+        self.series_dir = os.path.join(root, "series")
+
+    def ingest(self, config, data, channels=None, time_column="time"):
+        """Store the time series in `data` (DataFrame or dict of arrays) for one configuration.
+
+        Only the requested channels are kept; columns may be named by channel name ('F_fb')
+        or by result label ('Force (F_fb)'). Returns the configuration hash.
+        """
+        digest = config_hash(config)
+        category = config["Unit"]["category"]
+
+        columns = {channel_id(str(name)): name for name in data.keys()}
+        if time_column not in columns:
+            raise ValueError(f"Results are missing the '{time_column}' column")
+        wanted = [c for c in (channels or columns) if c in columns and c != time_column]
+        if not wanted:
+            raise ValueError("None of the selected result channels are present in the data")
+
+        series = pa.table({
+            time_column: pa.array(data[columns[time_column]], type=pa.float64()),
+            **{name: pa.array(data[columns[name]], type=pa.float64()) for name in wanted},
+        })
+
+        # Replace any previous results of the same configuration
+        partition = os.path.join(self.series_dir, f"category={category}", f"config_hash={digest}")
+        os.makedirs(partition, exist_ok=True)
+        for old in os.listdir(partition):
+            os.remove(os.path.join(partition, old))
+        pq.write_table(series, os.path.join(partition, "part-0.parquet"), row_group_size=65536)
+
+        case_dir = os.path.join(self.cases_dir, f"category={category}")
+        os.makedirs(case_dir, exist_ok=True)
+        case = pa.Table.from_pylist([case_row(config, digest)], schema=CASE_SCHEMA)
+        pq.write_table(case, os.path.join(case_dir, f"{digest}.parquet"))
+        return digest
+
+    def _dataset(self, path, partitioning, schema=None):
+        if not os.path.isdir(path):
+            return None
+        return ds.dataset(path, format="parquet", partitioning=partitioning, schema=schema)
+
+    def cases(self, columns=None, filter=None):
+        """Return the cases table (pyarrow) filtered with a pyarrow.dataset expression"""
+        dataset = self._dataset(self.cases_dir, PARTITIONING, CASE_SCHEMA.append(pa.field("category", pa.string())))
+        if dataset is None:
+            return pa.table({"config_hash": pa.array([], pa.string())})
+        return dataset.to_table(columns=columns, filter=filter)
+
+    def scan(self, channels, case_filter=None, time_range=None, time_column="time"):
+        """Read only the given channel columns of the cases matching `case_filter`.
+
+        Returns a pyarrow Table with category, config_hash, time and the channel columns.
+        Missing channels are skipped for cases that did not store them.
+        """
+        hashes = self.cases(columns=["config_hash"], filter=case_filter)["config_hash"]
+        series = self._dataset(self.series_dir, SERIES_PARTITIONING)
+        if series is None or len(hashes) == 0:
+            return pa.table({"config_hash": pa.array([], pa.string())})
+
+        # the config_hash filter only touches partition keys, so unmatched files are never opened
+        fragments = list(series.get_fragments(filter=ds.field("config_hash").isin(hashes)))
+        if not fragments:
+            return pa.table({"config_hash": pa.array([], pa.string())})
+        # cases may store different channels, so unify the footers of the matched files only
+        schema = pa.unify_schemas([f.physical_schema for f in fragments] + [SERIES_PARTITIONING.schema])
+        series = ds.dataset([f.path for f in fragments], schema=schema, format="parquet",
+                            partitioning=SERIES_PARTITIONING, partition_base_dir=self.series_dir)
+
+        columns = ["category", "config_hash", time_column] + [c for c in channels if c in schema.names]
+        expression = None
+        if time_range is not None:
+            expression = (ds.field(time_column) >= time_range[0]) & (ds.field(time_column) <= time_range[1])
+        return series.to_table(columns=columns, filter=expression)
+
+    def series_files(self, case_filter=None):
+        """Return {config_hash: parquet file} of the time series of the matching cases"""
+        hashes = self.cases(columns=["config_hash"], filter=case_filter)["config_hash"]
+        series = self._dataset(self.series_dir, SERIES_PARTITIONING)
+        if series is None or len(hashes) == 0:
+            return {}
+        return {
+            os.path.basename(os.path.dirname(f.path)).partition("=")[2]: f.path
+            for f in series.get_fragments(filter=ds.field("config_hash").isin(hashes))
+        }
+
+    def stored_channels(self, digest, time_column="time"):
+        """Channel names stored for one configuration"""
+        path = self.series_files(hash_filter(digest)).get(digest)
+        if path is None:
+            return []
+        return [name for name in pq.read_schema(path).names if name != time_column]
+
+    def extremes(self, channel, case_filter=None, how="max"):
+        """Per-case extreme value of a channel, e.g. max F_fb over IAHC cases with payload > 50 Te"""
+        table = self.scan([channel], case_filter=case_filter)
+        if channel not in table.column_names:
+            return pa.table({"config_hash": pa.array([], pa.string()), f"{channel}_{how}": pa.array([], pa.float64())})
+        return table.group_by("config_hash").aggregate([(channel, how)])
+
+    def delete(self, digest):
+        """Remove a stored configuration, its time series, cached statistics and summary rows"""
+        summary_dir = os.path.join(self.root, "summary")
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                if name in (f"{digest}.parquet", f"{digest}.npz") or os.path.basename(root) == f"config_hash={digest}":
+                    os.remove(os.path.join(root, name))
+        if os.path.isdir(summary_dir):
+            for name in os.listdir(summary_dir):
+                if name.endswith(".parquet"):
+                    self._drop_summary_row(os.path.join(summary_dir, name), digest)
+
+    @staticmethod
+    def _drop_summary_row(path, digest):
+        with file_lock(path):
+            table = pq.read_table(path)
+            keep = pc.not_equal(table["config_hash"], digest)
+            if pc.all(keep).as_py():
+                return
+            pq.write_table(table.filter(keep), path + ".tmp")
+            os.replace(path + ".tmp", path)
+
+
+def payload_filter(category=None, min_payload=None):
+    """Convenience filter on unit category and payload weight in air [Te]"""
+    expression = pc.scalar(True)
+    if category:
+        expression &= ds.field("category") == category
+    if min_payload is not None:
+        expression &= ds.field("Payload_Parameters.parameter_2") > min_payload
+    return expression
+
+
+def hash_filter(*digests):
+    """Filter on one or more configuration hashes"""
+    return ds.field("config_hash").isin(list(digests))
@@ -0,0 +1,302 @@
+"""Global sensitivity of the lift metrics to the configuration parameters.
+
+Every sample is a closed-loop simulation (utils.lift_simulation) of the configuration with some
+of its parameters changed. Each factor varies uniformly within +- spread of its configured value;
+samples are evaluated in chunks in a process pool. Two methods:
+
+    Sobol   Saltelli sampling: matrices A and B from one scrambled Sobol sequence and the d
+            matrices A_B^i (A with column i from B), N (d + 2) runs. First-order indices
+            (Saltelli 2010) and total indices (Jansen), with bootstrap confidence intervals.
+    Morris  r one-at-a-time trajectories on a 4-level grid, r (d + 1) runs. Elementary effects
+            per factor: mu* (mean absolute effect, the importance), mu and sigma (interactions
+            and non-linearity). A cheap screening before a Sobol study.
+
+Elementary effects are in metric units per full factor range (2 spread times the value), so
+they compare across factors. Studies are saved as JSON per unit, keyed by the configuration,
+the factors, the method and the sample size, so a repeated study is loaded without simulating:
+
+    study = run_study(record, stroke, ["max_stroke_speed", "gas_volume"], "sobol", 256)
+    sensitivity_table(study, "payload_velocity")
+
+The export page runs studies as "sensitivity_study" jobs (utils.jobs); the job worker
+simulates in a process pool of its own.
+
+    SAFELINK_SENSITIVITY_DIR        study files (default sensitivity)
+    SAFELINK_SENSITIVITY_WORKERS    worker processes (default: CPU count - 1)
+"""
+import copy
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm, qmc
+
+from utils.config_binary import FUNCTION_FIELDS
+from utils.lift_simulation import METRICS, SEA_STATE, simulate
+
+MODEL_VERSION = 1
+DIRECTORY = os.environ.get("SAFELINK_SENSITIVITY_DIR", "sensitivity")
+WORKERS = int(os.environ.get("SAFELINK_SENSITIVITY_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+CHUNK_SIZE = 32                  # simulations per pool task
+METHODS = {"morris": "Morris screening", "sobol": "Sobol indices"}
+MORRIS_LEVELS = 4
+BOOTSTRAP = 200
+CONFIDENCE = 0.95
+FACTORS = {
+    # name: (label, record section, index or key)
+    "equilibrium_stroke": ("Unit: equilibrium stroke position [m]", "unit_parameters", 0),
+    "force_parameter": ("Unit: force at equilibrium [Te]", "unit_parameters", 1),
+    "damping": ("Unit: damping force at 1 m/s [Te]", "unit_parameters", 3),
+    "unit_area": ("Unit: cross-sectional area [m²]", "unit_parameters", 4),
+    "gas_volume": ("Unit: gas volume [m³]", "unit_parameters", 5),
+    "lifting_height": ("Payload: available lifting height [m]", "payload_parameters", 0),
+    "payload_weight": ("Payload: weight in air [Te]", "payload_parameters", 1),
+    "sling_weight": ("Payload: weight of slings [Te]", "payload_parameters", 2),
+    "payload_area": ("Payload: cross-sectional area [m²]", "payload_parameters", 4),
+    "payload_volume": ("Payload: volume [m³]", "payload_parameters", 5),
+    "max_force_limit": ("Safety: max force limit [Te]", "parameters", "max_force_limit"),
+    "quick_start_time": ("Quick lifting: start time [s]", "parameters", "quick_start_time"),
+    "quick_acceleration_limit": ("Quick lifting: max acceleration [m/s²]", "parameters", "quick_acceleration_limit"),
+    "tension_start_time": ("Constant tension: start time [s]", "parameters", "tension_start_time"),
+    "tension_tolerance": ("Constant tension: tolerance [Te]", "parameters", "tension_tolerance"),
+    "rod_lock_depth": ("Rod lock: lock/unlock depth [m]", "parameters", "rod_lock_depth"),
+    "lock_hold_time": ("Rod lock: hold time [s]", "parameters", "lock_hold_time"),
+    "lock_speed": ("Rod lock: lock speed [m/s]", "parameters", "lock_speed"),
+    "heave_start_time": ("AHC: start time [s]", "parameters", "heave_start_time"),
+    "max_stroke_speed": ("AHC: max stroke speed [m/s]", "parameters", "max_stroke_speed"),
+}
+
+
+def factor_value(record, name):
+    _, section, key = FACTORS[name]
+    return record[section][key]
+
+
+def available_factors(record):
+    """Factors the simulation of the record depends on: parameters with a non-zero value, and the
+    special function parameters only when their function is enabled"""
+    disabled = set()
+    for function, fields in FUNCTION_FIELDS.items():
+        if not record["functions"].get(function):
+            disabled.update(fields)
+    return [name for name in FACTORS if name not in disabled and (factor_value(record, name) or 0.0) > 0]
+
+
+def factor_bounds(record, names, spread):
+    """(low, high) of every factor, +- spread (fraction) around its configured value"""
+    return np.array([[factor_value(record, name) * (1 - spread), factor_value(record, name) * (1 + spread)] for name in names])
+
+
+def apply_factors(record, names, values):
+    """Copy of the record with the factors set to values"""
+    changed = copy.deepcopy(record)
+    for name, value in zip(names, values):
+        _, section, key = FACTORS[name]
+        changed[section][key] = float(value)
+    return changed
+
+
+def evaluate_rows(record, stroke, names, rows, sea_state=SEA_STATE):
+    """METRICS of the record with every row of factor values, shape (len(rows), len(METRICS))"""
+    return [list(simulate(apply_factors(record, names, row), stroke, sea_state).values()) for row in rows]
+
+
+def evaluate(record, stroke, names, rows, sea_state=SEA_STATE, workers=WORKERS, progress=None):
+    """evaluate_rows in chunks of CHUNK_SIZE, in a process pool when workers > 0"""
+    rows = np.asarray(rows, dtype=float)
+    outputs = np.full((len(rows), len(METRICS)), np.nan)
+    chunks = [slice(start, start + CHUNK_SIZE) for start in range(0, len(rows), CHUNK_SIZE)]
+    if workers <= 0:
+        for n, chunk in enumerate(chunks):
+            outputs[chunk] = evaluate_rows(record, stroke, names, rows[chunk], sea_state)
+            if progress is not None:
+                progress((n + 1) / len(chunks))
+        return outputs
+    # spawn, so the workers do not inherit the server's threads and locks
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = {pool.submit(evaluate_rows, record, stroke, names, rows[chunk], sea_state): chunk for chunk in chunks}
+        for n, future in enumerate(as_completed(futures)):
+            outputs[futures[future]] = future.result()
+            if progress is not None:
+                progress((n + 1) / len(chunks))
+    finally:
+        # a failed chunk or a cancelled progress callback drops the chunks not started yet
+        pool.shutdown(cancel_futures=True)
+    return outputs
+
+
+def saltelli_sample(d, samples, seed=None):
+    """Unit-cube rows [A; B; A_B^1; ...; A_B^d], samples rounded up to a power of two"""
+    base = qmc.Sobol(2 * d, scramble=True, seed=seed).random_base2(max(math.ceil(math.log2(samples)), 1))
+    a, b = base[:, :d], base[:, d:]
+    ab = np.repeat(a[None, :, :], d, axis=0)
+    ab[np.arange(d), :, np.arange(d)] = b.T
+    return np.concatenate([a, b, ab.reshape(-1, d)])
+
+
+def sobol_indices(outputs, d, bootstrap=BOOTSTRAP, seed=None):
+    """First-order (S1) and total (ST) indices, shape (d, n_metrics), and their confidence
+    half widths, from the outputs of a saltelli_sample"""
+    n = len(outputs) // (d + 2)
+    f_a, f_b = outputs[:n], outputs[n:2 * n]
+    f_ab = outputs[2 * n:].reshape(d, n, -1)
+
+    def indices(a, b, ab):
+        variance = np.var(np.concatenate([a, b], axis=-2), axis=-2)
+        variance = np.where(variance > 0, variance, np.nan)
+        first = np.mean(b * (ab - a), axis=-2) / variance
+        total = 0.5 * np.mean((a - ab) ** 2, axis=-2) / variance
+        return first, total
+
+    first, total = indices(f_a, f_b, f_ab)
+    resample = np.random.default_rng(seed).integers(0, n, (bootstrap, n))
+    first_b, total_b = indices(f_a[resample], f_b[resample], f_ab[:, resample])
+    z = _z_score(CONFIDENCE)
+    return {"S1": first, "ST": total, "S1_conf": z * np.nanstd(first_b, axis=1), "ST_conf": z * np.nanstd(total_b, axis=1)}
+
+
+def morris_sample(d, trajectories, levels=MORRIS_LEVELS, seed=None):
+    """Unit-cube rows of r trajectories, each d + 1 points moving one factor at a time by
+    delta = levels / (2 (levels - 1)), and the signed step of every move, shape (r, d, d)"""
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    grid = np.arange(levels) / (levels - 1)
+    points = np.empty((trajectories, d + 1, d))
+    steps = np.zeros((trajectories, d, d))
+    for r in range(trajectories):
+        x = rng.choice(grid, d)
+        points[r, 0] = x
+        for k, factor in enumerate(rng.permutation(d)):
+            step = delta if x[factor] + delta <= 1 + 1e-12 else -delta
+            x = x.copy()
+            x[factor] += step
+            points[r, k + 1] = x
+            steps[r, k, factor] = step
+    return points.reshape(-1, d), steps
+
+
+def morris_effects(outputs, steps, bootstrap=BOOTSTRAP, seed=None):
+    """mu*, mu and sigma of the elementary effects, shape (d, n_metrics), and the confidence
+    half width of mu*"""
+    r, d, _ = steps.shape
+    outputs = outputs.reshape(r, d + 1, -1)
+    change = np.diff(outputs, axis=1)                            # (r, d, n_metrics), one move per row
+    step = steps.sum(axis=2)                                     # signed step of each move
+    factor = np.abs(steps).argmax(axis=2)                        # factor moved in each move
+    effects = np.empty_like(change)
+    effects[np.arange(r)[:, None], factor] = change / step[..., None]
+    resample = np.random.default_rng(seed).integers(0, r, (bootstrap, r))
+    z = _z_score(CONFIDENCE)
+    return {
+        "mu_star": np.abs(effects).mean(axis=0),
+        "mu": effects.mean(axis=0),
+        "sigma": effects.std(axis=0, ddof=1) if r > 1 else np.zeros(effects.shape[1:]),
+        "mu_star_conf": z * np.abs(effects[resample]).mean(axis=1).std(axis=0),
+    }
+
+
+def _z_score(confidence):
+    return float(norm.ppf(0.5 + confidence / 2))
+
+
+def study_key(record, stroke, names, method, samples, spread, sea_state, seed):
+    """Cache key of a study"""
+    text = json.dumps([MODEL_VERSION, record, stroke, list(names), method, samples, spread, list(sea_state), seed], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def study_path(unit_id, key, directory=DIRECTORY):
+    return os.path.join(directory, re.sub(r"[^\w.-]", "_", str(unit_id)), f"{key}.json")
+
+
+def load_study(path):
+    """A saved study, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_study(path, study):
+    """Atomic write, so a reader never sees a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(study, file)
+    os.replace(tmp, path)
+
+
+def run_study(record, stroke, names, method, samples, spread=0.2, sea_state=SEA_STATE, seed=0,
+              workers=WORKERS, progress=None, directory=DIRECTORY):
+    """Sensitivity of METRICS to the factors names, loaded from the study file when it exists.
+
+    record      configuration record (utils.config_binary), the factors' nominal values
+    stroke      unit stroke [m]
+    method      "sobol" (samples = N, rounded up to a power of two) or "morris" (samples = r)
+    progress    optional callback(fraction)
+
+    Returns a JSON-serializable dict: factors, metrics, runs and per index a nested list
+    [factor][metric].
+    """
+    names = list(names)
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'")
+    path = study_path(record["unit_id"], study_key(record, stroke, names, method, samples, spread, sea_state, seed), directory)
+    study = load_study(path)
+    if study is not None:
+        if progress is not None:
+            progress(1.0)
+        return study
+
+    d = len(names)
+    bounds = factor_bounds(record, names, spread)
+    if method == "sobol":
+        unit_rows = saltelli_sample(d, samples, seed)
+    else:
+        unit_rows, steps = morris_sample(d, samples, seed=seed)
+    rows = bounds[:, 0] + unit_rows * (bounds[:, 1] - bounds[:, 0])
+    outputs = evaluate(record, stroke, names, rows, sea_state, workers, progress)
+    if method == "sobol":
+        indices = sobol_indices(outputs, d, seed=seed)
+    else:
+        # effects per full factor range: the unit-cube steps already are fractions of the range
+        indices = morris_effects(outputs, steps, seed=seed)
+
+    study = {
+        "method": method,
+        "factors": names,
+        "metrics": list(METRICS),
+        "runs": len(rows),
+        "spread": spread,
+        "nominal": simulate(record, stroke, sea_state),
+        **{name: np.where(np.isfinite(values), values, None).tolist() for name, values in indices.items()},
+    }
+    save_study(path, study)
+    return study
+
+
+def study_job(params, job):
+    """Job function: run_study with the params (its arguments)"""
+    runs = params.pop("runs", None)
+    run_study(**{**params, "sea_state": tuple(params["sea_state"])},
+              progress=lambda fraction: job.progress(fraction, f"{fraction * runs:,.0f} / {runs:,} simulations" if runs else ""))
+    job.progress(1.0, "Study saved", force=True)
+    return None
+
+
+def sensitivity_table(study, metric):
+    """Indices of one metric per factor, most influential first"""
+    column = study["metrics"].index(metric)
+    columns = ["S1", "S1_conf", "ST", "ST_conf"] if study["method"] == "sobol" else ["mu_star", "mu_star_conf", "mu", "sigma"]
+    table = pd.DataFrame(
+        {name: [np.nan if row[column] is None else row[column] for row in study[name]] for name in columns},
+        index=pd.Index([FACTORS[name][0] for name in study["factors"]], name="Factor"),
+    )
+    return table.sort_values(columns[2] if study["method"] == "sobol" else columns[0], ascending=False)
@@ -0,0 +1,222 @@
+"""Optional external store of the configuration held in st.session_state.
+
+With a store configured, every logged-in browser session gets an id in the URL (?sid=...), kept
+there on every rerun. A session that is new to this server process is restored from the store
+after login, and at the end of the rerun the configuration keys that changed are written back in
+one batch. Any server process can therefore pick up any session, and a restart or rolling deploy
+does not lose configurations.
+
+A session id belongs to the user it was created for (OWNER_KEY, refreshed with every write).
+Another user opening the same URL gets a new, empty session instead of the owner's configuration,
+and logging out detaches the browser from its session.
+
+Only the configuration model is stored (the keys set in main.initialize_session_state and
+page_unit.session_defaults). Login state is not; see utils.auth for the session tokens.
+
+    SAFELINK_SESSION_STORE      backend URL, e.g. sqlite:///var/lib/safelink/sessions.db
+                                (unset: session state stays in-process only)
+    SAFELINK_SESSION_TTL_DAYS   sessions untouched for longer are purged (default 30)
+
+Backends implement load(session_id), write(session_id, changed, removed) and delete(session_id);
+register new ones in BACKENDS under their URL scheme.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+SESSION_PARAM = "sid"
+SNAPSHOT_KEY = "_session_store_snapshot"
+OWNER_KEY = "_owner"             # stored with the configuration keys, never restored into the state
+STORE_URL = os.environ.get("SAFELINK_SESSION_STORE", "")
+TTL_DAYS = float(os.environ.get("SAFELINK_SESSION_TTL_DAYS", "30"))
+
+PERSISTED_KEYS = (
+    # unit and results selection
+    "selected_unit", "selected_unit_type", "customized_results", "results_manually_cleared",
+    "selected_body_results", "selected_rod_results", "selected_payload_results", "selected_results",
+    # special functions
+    "check_box_quicklifting", "check_box_constant_tension", "check_box_active_heave_compensation", "check_box_rod_lock",
+    "tension_start_time", "tension_tolerance", "quick_start_time", "quick_acceleration_limit",
+    "heave_start_time", "max_stroke_speed", "motion_reference",
+    # rod functions
+    "rod_lock_depth", "rod_lock_operation", "rod_lock_mode", "lock_hold_time", "lock_speed", "rod_orientation",
+    "rod_up_max_extension", "rod_up_safety_factor", "rod_down_max_extension", "rod_down_compensation",
+    "compensation_factor", "combined_lock_tension", "safety_interlocks", "rod_position_monitoring",
+    "monitoring_frequency",
+    # safety, unit and payload parameters
+    "max_force_limit",
+    *(f"{prefix}number_{i}_{j}" for prefix in ("", "saved_") for j in (0, 1) for i in range(1, 11)),
+)
+
+
+def _to_json(value):
+    # tuples (e.g. the selected unit) are tagged so they come back as tuples
+    if isinstance(value, tuple):
+        return {"__tuple__": [_to_json(v) for v in value]}
+    if isinstance(value, list):
+        return [_to_json(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    return value
+
+
+def _from_json(value):
+    if isinstance(value, dict):
+        if set(value) == {"__tuple__"}:
+            return tuple(_from_json(v) for v in value["__tuple__"])
+        return {k: _from_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_from_json(v) for v in value]
+    return value
+
+
+def encode(value):
+    return json.dumps(_to_json(value), separators=(",", ":"), sort_keys=True)
+
+
+def decode(text):
+    return _from_json(json.loads(text))
+
+
+class SQLiteBackend:
+    """One row per (session, key) holding the JSON encoded value"""
+
+    def __init__(self, path, ttl_days=TTL_DAYS):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS session_state (
+                    session_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, key)
+                ) WITHOUT ROWID
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS session_state_updated ON session_state (updated_at)")
+            if ttl_days:
+                # whole sessions only, so a restored session never misses the keys that did not change
+                connection.execute("""
+                    DELETE FROM session_state WHERE session_id IN (
+                        SELECT session_id FROM session_state GROUP BY session_id HAVING MAX(updated_at) < ?
+                    )
+                """, (time.time() - ttl_days * 86400,))
+
+    def _connection(self):
+        # Streamlit runs every session in its own script thread, so connections are per thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def load(self, session_id):
+        rows = self._connection().execute(
+            "SELECT key, value FROM session_state WHERE session_id = ?", (session_id,)
+        ).fetchall()
+        return dict(rows)
+
+    def write(self, session_id, changed, removed=()):
+        """Upsert the changed keys and delete the removed ones in one transaction"""
+        now = time.time()
+        with self._connection() as connection:
+            if changed:
+                connection.executemany(
+                    "INSERT INTO session_state (session_id, key, value, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (session_id, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                    [(session_id, key, value, now) for key, value in changed.items()],
+                )
+            if removed:
+                connection.executemany(
+                    "DELETE FROM session_state WHERE session_id = ? AND key = ?",
+                    [(session_id, key) for key in removed],
+                )
+
+    def delete(self, session_id):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+
+
+BACKENDS = {"sqlite": SQLiteBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend(url=STORE_URL):
+    """Backend configured by SAFELINK_SESSION_STORE, or None when disabled"""
+    global _backend
+    if not url:
+        return None
+    with _backend_lock:
+        if _backend is None:
+            scheme, _, location = url.partition("://")
+            if scheme not in BACKENDS:
+                raise ValueError(f"Unknown session store '{scheme}', expected one of {', '.join(BACKENDS)}")
+            _backend = BACKENDS[scheme](location)
+    return _backend
+
+
+def restore_session(state, query_params, username):
+    """Attach the browser session of the logged-in user to its stored configuration (once per
+    server process), and keep the session id in the URL on every rerun"""
+    backend = get_backend()
+    if backend is None:
+        return
+    if SNAPSHOT_KEY in state:
+        if query_params.get(SESSION_PARAM) != state["_session_id"]:
+            # page navigation drops the query string; keep the id in the URL for the next visit
+            query_params[SESSION_PARAM] = state["_session_id"]
+        return
+    if not username:
+        return
+    session_id = query_params.get(SESSION_PARAM)
+    stored = backend.load(session_id) if session_id else {}
+    owner = stored.pop(OWNER_KEY, None)
+    if not session_id or (owner is not None and decode(owner) != username):
+        # no session yet, or a URL shared by another user: start a new one
+        session_id, stored = uuid.uuid4().hex, {}
+    backend.write(session_id, {OWNER_KEY: encode(username)})
+    query_params[SESSION_PARAM] = session_id
+    for key, value in stored.items():
+        if key in PERSISTED_KEYS and key not in state:
+            state[key] = decode(value)
+    state["_session_id"] = session_id
+    state["_session_owner"] = username
+    state[SNAPSHOT_KEY] = stored
+
+
+def detach_session(state, query_params):
+    """Forget the stored session of this browser (logout); the stored configuration is kept"""
+    for key in (SNAPSHOT_KEY, "_session_id", "_session_owner"):
+        state.pop(key, None)
+    query_params.pop(SESSION_PARAM, None)
+
+
+def persist_session(state):
+    """Write the configuration keys that changed during this rerun in one batch"""
+    backend = get_backend()
+    if backend is None or SNAPSHOT_KEY not in state:
+        return
+    snapshot = state[SNAPSHOT_KEY]
+    current = {}
+    for key in PERSISTED_KEYS:
+        if key in state:
+            try:
+                current[key] = encode(state[key])
+            except (TypeError, ValueError):
+                continue
+    changed = {key: value for key, value in current.items() if snapshot.get(key) != value}
+    removed = [key for key in snapshot if key not in current]
+    if changed or removed:
+        # the owner row is refreshed with every write, so it is not purged before the configuration
+        backend.write(state["_session_id"], {**changed, OWNER_KEY: encode(state["_session_owner"])}, removed)
+        state[SNAPSHOT_KEY] = current
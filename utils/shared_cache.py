@@ -0,0 +1,233 @@
+"""Cache tier shared by all Streamlit server processes on a host.
+
+Entries are plain files under one root directory (on /dev/shm when available, so they live in
+memory): NumPy arrays as .npy files that are memory-mapped read-only on every hit, resized images
+and markdown as plain files. Processes mapping or reading the same entry share the same physical
+pages, so the catalog and the assets are held once per host instead of once per process.
+
+Writes go to a temporary name and are moved in place with os.replace / os.rename, so readers
+never see a partial entry. The total size is bounded: after each write the least recently used
+entries (by modification time, refreshed on every hit) are removed until the cache fits. Removing
+an entry another process still has mapped is safe; its mapping stays valid until released.
+
+    SAFELINK_SHARED_CACHE       cache directory (default /dev/shm/safelink_cache)
+    SAFELINK_SHARED_CACHE_MB    size bound in MiB (default 256)
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+
+_default_parent = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+DEFAULT_ROOT = os.environ.get("SAFELINK_SHARED_CACHE", os.path.join(_default_parent, "safelink_cache"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("SAFELINK_SHARED_CACHE_MB", "256")) * 2 ** 20)
+MAX_IMAGE_WIDTH = 1460          # widest image st.image sends without resizing it first
+
+
+def file_key(path):
+    """Cache key of a source file, changes when the file is modified"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _entry_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+class SharedCache:
+    """Size-bounded file cache with zero-copy (memory-mapped) reads of NumPy arrays"""
+
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _path(self, namespace, key, suffix=""):
+        digest = hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, namespace, digest + suffix)
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _tmp_path(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return f"{path}.{uuid.uuid4().hex}.tmp"
+
+    # -- arrays -------------------------------------------------------------------------------
+
+    def get_arrays(self, namespace, key):
+        """Dict of read-only memory-mapped arrays, or None on a miss"""
+        path = self._path(namespace, key)
+        try:
+            with open(os.path.join(path, "index.json")) as file:
+                names = json.load(file)
+            arrays = {name: np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r") for i, name in enumerate(names)}
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        return arrays
+
+    def put_arrays(self, namespace, key, arrays):
+        """Store a dict of arrays (numeric or fixed width string dtypes)"""
+        path = self._path(namespace, key)
+        tmp = self._tmp_path(path)
+        os.makedirs(tmp)
+        for i, value in enumerate(arrays.values()):
+            np.save(os.path.join(tmp, f"{i}.npy"), np.asarray(value), allow_pickle=False)
+        with open(os.path.join(tmp, "index.json"), "w") as file:
+            json.dump(list(arrays), file)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def arrays(self, namespace, key, build):
+        """Cached arrays for `key`, built with build() and stored on a miss"""
+        arrays = self.get_arrays(namespace, key)
+        if arrays is None:
+            built = build()
+            self.put_arrays(namespace, key, built)
+            # an entry larger than the whole cache is evicted right away
+            arrays = self.get_arrays(namespace, key) or built
+        return arrays
+
+    # -- files ---------------------------------------------------------------------------------
+
+    def get_file(self, namespace, key, suffix=""):
+        """Path of a cached file, or None on a miss"""
+        path = self._path(namespace, key, suffix)
+        if not os.path.isfile(path):
+            return None
+        self._touch(path)
+        return path
+
+    def put_file(self, namespace, key, data, suffix=""):
+        """Store bytes as a file and return its path"""
+        path = self._path(namespace, key, suffix)
+        tmp = self._tmp_path(path)
+        with open(tmp, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def file(self, namespace, key, build, suffix=""):
+        """Path of the cached file for `key`, built with build() -> bytes on a miss.
+
+        Returns None if the file does not fit in the cache.
+        """
+        path = self.get_file(namespace, key, suffix)
+        if path is None:
+            self.put_file(namespace, key, build(), suffix)
+            path = self.get_file(namespace, key, suffix)
+        return path
+
+    def text(self, namespace, key, build):
+        """Cached text for `key`, built with build() -> str on a miss"""
+        path = self.get_file(namespace, key, ".txt")
+        if path is not None:
+            try:
+                with open(path, encoding="utf-8") as file:
+                    return file.read()
+            except OSError:
+                pass
+        text = build()
+        self.put_file(namespace, key, text.encode("utf-8"), ".txt")
+        return text
+
+    # -- eviction -----------------------------------------------------------------------------
+
+    def entries(self):
+        """[(mtime, size, path)] of all complete entries"""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for namespace in os.listdir(self.root):
+            directory = os.path.join(self.root, namespace)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), _entry_size(path), path))
+                except OSError:
+                    continue
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+_cache = None
+
+
+def shared_cache():
+    """Process-wide SharedCache at the configured root"""
+    global _cache
+    if _cache is None:
+        _cache = SharedCache()
+    return _cache
+
+
+def cached_image(path, max_width=MAX_IMAGE_WIDTH):
+    """Path of a copy of the image downscaled to at most max_width pixels, for st.image.
+
+    The copy is encoded the way st.image would send it (PNG with transparency, JPEG otherwise),
+    so Streamlit serves the cached bytes as they are instead of decoding and re-encoding the
+    original on every rerun.
+    """
+    def build():
+        from PIL import Image
+        with Image.open(path) as image:
+            alpha = image.mode in ("RGBA", "LA", "P")
+            image = image.convert("RGBA" if alpha else "RGB")
+            if image.width > max_width:
+                image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+            buffer = io.BytesIO()
+            if alpha:
+                image.save(buffer, format="PNG", optimize=True)
+            else:
+                image.save(buffer, format="JPEG", quality=90)
+            return buffer.getvalue()
+    cached = shared_cache().file("images", f"{file_key(path)}:{max_width}", build, suffix=".img")
+    return cached or path
+
+
+def cached_markdown(path):
+    """Content of a markdown file, read once per host"""
+    def build():
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+    return shared_cache().text("markdown", file_key(path), build)
@@ -0,0 +1,110 @@
+"""Splash zone loads on a lifted payload, DNV-RP-H103 simplified method.
+
+All forces are evaluated in one pass over a grid of sea states and crane tip motions: the
+significant wave height, peak period and crane tip amplitude axes are broadcast against each
+other, so every result has the shape (n_hs, n_tp, n_crane).
+
+    loads = splash_zone_loads(payload_geometry(...), hs, tp, crane_amplitude)
+    loads["F_hyd"], loads["slack"], ...
+
+The payload is described by its mass in air (payload plus slings), its submerged volume and its
+horizontal projected area; its height for the wave kinematics is volume / area. Conventions:
+    zeta_a      design wave amplitude 0.9 Hs
+    Tz          zero up-crossing period Tp / 1.286 (JONSWAP, gamma 3.3)
+    v_w, a_w    vertical water particle velocity / acceleration at the centroid,
+                zeta_a (2 pi / Tz)^n exp(-4 pi^2 d / (Tz^2 g))
+    v_ct, a_ct  crane tip velocity / acceleration of a harmonic motion at Tz
+    v_s, v_r    lowering speed plus sqrt(v_ct^2 + v_w^2) (slamming and drag velocity)
+Forces [kN]:
+    F_slam      0.5 rho C_s A_p v_s^2
+    F_drag      0.5 rho C_D A_p v_r^2
+    F_mass      sqrt(((M + A33) a_ct)^2 + ((rho V + A33) a_w)^2)
+    F_buoyancy  rho g A_p sqrt(zeta_a^2 + eta_ct^2)  (varying buoyancy)
+    F_hyd       sqrt((F_drag + F_slam)^2 + (F_mass - F_buoyancy)^2)
+    F_static    M g - rho V g
+    slack       F_hyd > 0.9 F_static (slack sling criterion)
+Sea states steeper than the RP's limit Tz >= 8.9 sqrt(Hs / g) are flagged in `valid`.
+The payload mass and volume may also be arrays (samples, see utils.monte_carlo) broadcasting
+against the grid.
+"""
+import math
+
+import numpy as np
+
+G = 9.81
+RHO = 1025.0                     # sea water [kg/m³]
+TP_TZ = 1.286                    # Tp / Tz of a JONSWAP spectrum, gamma 3.3
+SLACK_FACTOR = 0.9
+DEFAULT_COEFFICIENTS = {
+    "slamming": 5.0,             # C_s
+    "drag": 2.5,                 # C_D, flat plate-like payload in heave
+    "added_mass": 0.58,          # C_A of a square flat plate, A33 = rho C_A pi/4 A_p^1.5
+}
+DEFAULT_LOWERING_SPEED = 0.5     # m/s
+
+
+def payload_geometry(payload_weight, sling_weight, area, volume):
+    """Payload of the configuration: weights [Te], projected area [m²], volume [m³]"""
+    return {
+        "mass": (payload_weight + sling_weight) * 1000.0,
+        "area": float(area),
+        "volume": float(volume),
+    }
+
+
+def splash_zone_loads(payload, hs, tp, crane_amplitude, lowering_speed=DEFAULT_LOWERING_SPEED,
+                      coefficients=None, rho=RHO):
+    """Splash zone forces [kN] and checks over the grid hs x tp x crane_amplitude"""
+    coefficients = {**DEFAULT_COEFFICIENTS, **(coefficients or {})}
+    hs, tp, eta_ct = np.ix_(np.atleast_1d(np.asarray(hs, dtype=float)),
+                            np.atleast_1d(np.asarray(tp, dtype=float)),
+                            np.atleast_1d(np.asarray(crane_amplitude, dtype=float)))
+    mass, area, volume = payload["mass"], payload["area"], payload["volume"]
+    depth = 0.5 * volume / area if area > 0 else 0.0
+    added_mass = rho * coefficients["added_mass"] * math.pi / 4 * area ** 1.5
+
+    tz = tp / TP_TZ
+    omega = 2 * math.pi / tz
+    zeta_a = 0.9 * hs
+    decay = np.exp(-4 * math.pi ** 2 * depth / (tz ** 2 * G))
+    v_w = zeta_a * omega * decay
+    a_w = zeta_a * omega ** 2 * decay
+    v_ct = eta_ct * omega
+    a_ct = eta_ct * omega ** 2
+    v_r = lowering_speed + np.sqrt(v_ct ** 2 + v_w ** 2)
+
+    f_slam = 0.5 * rho * coefficients["slamming"] * area * v_r ** 2 / 1000.0
+    f_drag = 0.5 * rho * coefficients["drag"] * area * v_r ** 2 / 1000.0
+    f_mass = np.sqrt(((mass + added_mass) * a_ct) ** 2 + ((rho * volume + added_mass) * a_w) ** 2) / 1000.0
+    f_buoyancy = rho * G * area * np.sqrt(zeta_a ** 2 + eta_ct ** 2) / 1000.0
+    f_hyd = np.sqrt((f_drag + f_slam) ** 2 + (f_mass - f_buoyancy) ** 2)
+    f_static = (mass - rho * volume) * G / 1000.0
+    f_static_air = mass * G / 1000.0
+
+    shape = np.broadcast_shapes(hs.shape, tp.shape, eta_ct.shape, np.shape(f_hyd))
+    limit = SLACK_FACTOR * f_static
+    return {
+        "v_w": np.broadcast_to(v_w, shape),
+        "a_w": np.broadcast_to(a_w, shape),
+        "v_r": np.broadcast_to(v_r, shape),
+        "F_slam": np.broadcast_to(f_slam, shape),
+        "F_drag": np.broadcast_to(f_drag, shape),
+        "F_mass": np.broadcast_to(f_mass, shape),
+        "F_buoyancy": np.broadcast_to(f_buoyancy, shape),
+        "F_hyd": f_hyd,
+        "F_static": f_static,
+        "F_total": f_static_air + f_hyd,
+        "utilization": np.where(limit > 0, f_hyd / np.where(limit > 0, limit, 1.0), np.inf),
+        "slack": f_hyd > limit,
+        "valid": np.broadcast_to(tz >= 8.9 * np.sqrt(hs / G), shape),
+    }
+
+
+def allowable_hs(loads, hs):
+    """Highest Hs per (Tp, crane amplitude) without slack slings (NaN when even the lowest fails)"""
+    hs = np.asarray(hs, dtype=float)
+    ok = ~loads["slack"] & loads["valid"]
+    # Hs ordered ascending: allowable up to the first failing sea state
+    passing = np.cumprod(ok, axis=0).astype(bool)
+    count = passing.sum(axis=0)
+    return np.where(count > 0, hs[np.maximum(count - 1, 0)], np.nan)
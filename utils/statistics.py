@@ -0,0 +1,439 @@
+"""Vectorized post-processing of stored result channels.
+
+Cases are processed in groups as 2D arrays (cases x samples) and streamed chunk by chunk from
+the results store, so a time series is never fully loaded. Every accumulator keeps its state
+between chunks:
+
+- moments: min / max / mean / RMS / std (NaN padded rows for cases that ended early)
+- local maxima above the mean -> exceedance curve and Weibull fit of the peaks, from a uniform
+  reservoir sample of PEAK_RESERVOIR peaks per case
+- block maxima -> Gumbel fit (method of moments from running Welford sums, vectorized over cases)
+- Welch PSD (Hann window, 50 % overlap) with the unfinished segment carried to the next chunk
+- rainflow counting (ASTM E1049 four-point method) with the residue carried to the next chunk;
+  closed cycles go into a histogram of CYCLE_BINS bins whose range doubles (merging bin pairs)
+  when a larger cycle arrives, re-binned to the output bins at the end
+
+Memory per case is bounded: only the residue stack grows, and only with the number of
+reversals that have not closed a cycle yet.
+
+Results are cached per (case, channel) as .npz files next to the results store, and the scalar
+statistics are merged into one summary table per channel (summary/<channel>.parquet) so that
+comparisons of many cases never touch the raw time series.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from scipy import signal
+from scipy import stats as scipy_stats
+
+from utils.results_store import ResultsStore, file_lock
+
+EULER_GAMMA = 0.5772156649015329
+EXCEEDANCE_PROBABILITIES = np.array([0.5, 0.1, 0.01, 0.001])
+SCALAR_STATISTICS = [
+    "min", "max", "mean", "rms", "std", "n_samples", "gumbel_loc", "gumbel_scale", "gumbel_mpm",
+    "weibull_shape", "weibull_scale", "peak_p50", "peak_p10", "peak_p01", "peak_p001", "n_cycles",
+]
+PEAK_RESERVOIR = 8192            # peaks kept per case for the exceedance levels and the Weibull fit
+CYCLE_BINS = 1024                # internal rainflow histogram bins per case
+
+
+class StreamingChannelStats:
+    """Chunked statistics of one channel over many cases at once"""
+
+    def __init__(self, n_cases, dt, nperseg=1024, block_size=None, rainflow_bins=32):
+        self.n_cases = n_cases
+        self.dt = dt
+        self.nperseg = nperseg
+        self.step = nperseg // 2
+        self.block_size = block_size or int(round(600.0 / dt))  # 10 minute block maxima by default
+        self.rainflow_bins = rainflow_bins
+
+        self.count = np.zeros(n_cases)
+        self.total = np.zeros(n_cases)
+        self.total_sq = np.zeros(n_cases)
+        self.minimum = np.full(n_cases, np.inf)
+        self.maximum = np.full(n_cases, -np.inf)
+
+        self.block_count = np.zeros(n_cases)
+        self.block_mean = np.zeros(n_cases)    # Welford running mean and M2 of the block maxima
+        self.block_m2 = np.zeros(n_cases)
+        self.current_block = np.full(n_cases, -np.inf)
+        self.block_fill = 0
+
+        self.window = signal.get_window("hann", nperseg)
+        self.psd_sum = np.zeros((n_cases, nperseg // 2 + 1))
+        self.psd_segments = np.zeros(n_cases)
+        self.tail = np.empty((n_cases, 0))
+
+        self.last = np.full(n_cases, np.nan)   # last sample, for reversal detection across chunks
+        self.direction = np.zeros(n_cases)      # +1 rising, -1 falling
+        self.reversals = [[] for _ in range(n_cases)]  # rainflow residue per case
+        self.cycle_counts = np.zeros((n_cases, CYCLE_BINS))
+        self.cycle_top = np.zeros(n_cases)               # upper edge of the internal histogram
+        self.cycle_max = np.zeros(n_cases)               # largest cycle range
+        self.peaks = np.empty((n_cases, PEAK_RESERVOIR))  # reservoir sample of the local maxima
+        self.peaks_seen = np.zeros(n_cases, dtype=np.int64)
+        self.rng = np.random.default_rng(0)
+
+    # --- moments and block maxima -------------------------------------------------
+    def _update_moments(self, x):
+        finite = np.isfinite(x)
+        self.count += finite.sum(axis=1)
+        values = np.where(finite, x, 0.0)
+        self.total += values.sum(axis=1)
+        self.total_sq += (values * values).sum(axis=1)
+        self.minimum = np.fmin(self.minimum, np.nanmin(np.where(finite, x, np.inf), axis=1))
+        self.maximum = np.fmax(self.maximum, np.nanmax(np.where(finite, x, -np.inf), axis=1))
+
+    def _update_blocks(self, x):
+        start = 0
+        while start < x.shape[1]:
+            take = min(self.block_size - self.block_fill, x.shape[1] - start)
+            part = np.where(np.isfinite(x[:, start:start + take]), x[:, start:start + take], -np.inf)
+            self.current_block = np.maximum(self.current_block, part.max(axis=1))
+            self.block_fill += take
+            start += take
+            if self.block_fill == self.block_size:
+                self._close_block()
+
+    def _close_block(self):
+        closed = np.isfinite(self.current_block)
+        self.block_count += closed
+        delta = np.where(closed, self.current_block - self.block_mean, 0.0)
+        self.block_mean += delta / np.maximum(self.block_count, 1)
+        self.block_m2 += delta * np.where(closed, self.current_block - self.block_mean, 0.0)
+        self.current_block[:] = -np.inf
+        self.block_fill = 0
+
+    # --- Welch PSD ------------------------------------------------------------------
+    def _update_psd(self, x):
+        buffer = np.concatenate([self.tail, x], axis=1)
+        n_frames = (buffer.shape[1] - self.nperseg) // self.step + 1 if buffer.shape[1] >= self.nperseg else 0
+        if n_frames > 0:
+            frames = np.lib.stride_tricks.sliding_window_view(buffer, self.nperseg, axis=1)[:, ::self.step][:, :n_frames]
+            valid = np.isfinite(frames).all(axis=2)
+            frames = np.where(valid[..., None], frames, 0.0)
+            frames = (frames - frames.mean(axis=2, keepdims=True)) * self.window
+            spectrum = np.abs(np.fft.rfft(frames, axis=2)) ** 2
+            self.psd_sum += (spectrum * valid[..., None]).sum(axis=1)
+            self.psd_segments += valid.sum(axis=1)
+            self.tail = buffer[:, n_frames * self.step:]
+        else:
+            self.tail = buffer
+
+    # --- reversals and rainflow -----------------------------------------------------
+    def _update_reversals(self, x):
+        for i in range(self.n_cases):
+            row = x[i][np.isfinite(x[i])]
+            if row.size == 0:
+                continue
+            if np.isfinite(self.last[i]):
+                row = np.concatenate([[self.last[i]], row])
+            slope = np.sign(np.diff(row))
+            nonzero = np.flatnonzero(slope)
+            if nonzero.size == 0:
+                self.last[i] = row[-1]
+                continue
+            slope = slope[nonzero]
+            turning = nonzero[np.flatnonzero(slope[1:] != slope[:-1]) + 1]
+            if self.direction[i] != 0 and slope[0] != self.direction[i]:
+                turning = np.concatenate([[nonzero[0]], turning])
+            if not self.reversals[i]:
+                self.reversals[i].append(row[0])
+            points = row[turning]
+            self._add_peaks(i, points[np.sign(np.diff(row))[turning] < 0])
+            self._rainflow(i, points)
+            self.direction[i] = slope[-1]
+            self.last[i] = row[-1]
+
+    def _add_peaks(self, i, peaks):
+        """Reservoir sampling (algorithm R), vectorized over the new peaks in order"""
+        seen = self.peaks_seen[i]
+        fill = min(max(PEAK_RESERVOIR - seen, 0), len(peaks))
+        self.peaks[i, seen:seen + fill] = peaks[:fill]
+        rest = peaks[fill:]
+        if rest.size:
+            # the t-th peak (1-based) replaces a uniform slot of [0, t) when it falls in the reservoir
+            slots = (self.rng.random(rest.size) * (seen + fill + 1 + np.arange(rest.size))).astype(np.int64)
+            keep = slots < PEAK_RESERVOIR
+            self.peaks[i, slots[keep]] = rest[keep]
+        self.peaks_seen[i] = seen + len(peaks)
+
+    def _add_cycle(self, i, cycle_range, count, counts=None, top=None):
+        """Add a cycle to the histogram of case i (or to the given counts / top), growing its range"""
+        counts = self.cycle_counts[i] if counts is None else counts
+        top = self.cycle_top[i] if top is None else top
+        if cycle_range > top:
+            if top == 0.0:
+                top = cycle_range
+            while cycle_range > top:
+                # double the range: bins 2k and 2k+1 become bin k
+                counts[:CYCLE_BINS // 2] = counts.reshape(-1, 2).sum(axis=1)
+                counts[CYCLE_BINS // 2:] = 0.0
+                top *= 2
+        if top > 0.0:
+            counts[min(int(cycle_range / top * CYCLE_BINS), CYCLE_BINS - 1)] += count
+        else:
+            counts[0] += count
+        self.cycle_max[i] = max(self.cycle_max[i], cycle_range)
+        return top
+
+    def _rainflow(self, i, points):
+        stack = self.reversals[i]
+        for point in points:
+            stack.append(point)
+            while len(stack) >= 3:
+                x_range = abs(stack[-1] - stack[-2])
+                y_range = abs(stack[-2] - stack[-3])
+                if x_range < y_range:
+                    break
+                if len(stack) == 3:
+                    self.cycle_top[i] = self._add_cycle(i, y_range, 0.5)
+                    del stack[0]
+                else:
+                    self.cycle_top[i] = self._add_cycle(i, y_range, 1.0)
+                    del stack[-3:-1]
+
+    # --- public interface -----------------------------------------------------------
+    def update(self, chunk):
+        """Feed the next chunk, shape (n_cases, n_samples); NaN marks samples past the end of a case"""
+        x = np.asarray(chunk, dtype=float)
+        self._update_moments(x)
+        self._update_blocks(x)
+        self._update_psd(x)
+        self._update_reversals(x)
+
+    def result(self):
+        """Finalize and return a list with one statistics dict per case"""
+        if self.block_fill:
+            self._close_block()
+        mean = self.total / np.maximum(self.count, 1)
+        rms = np.sqrt(self.total_sq / np.maximum(self.count, 1))
+        std = np.sqrt(np.maximum(rms ** 2 - mean ** 2, 0.0))
+        frequency = np.fft.rfftfreq(self.nperseg, self.dt)
+        scale = self.dt / (self.window ** 2).sum()
+
+        results = []
+        for i in range(self.n_cases):
+            # residue of the rainflow stack counts as half cycles
+            residue = self.reversals[i] + ([self.last[i]] if np.isfinite(self.last[i]) else [])
+            counts, top = self.cycle_counts[i].copy(), self.cycle_top[i]
+            for a, b in zip(residue[:-1], residue[1:]):
+                if b != a:
+                    top = self._add_cycle(i, abs(b - a), 0.5, counts, top)
+            peaks = self.peaks[i, :min(self.peaks_seen[i], PEAK_RESERVOIR)]
+            peaks = peaks[peaks > mean[i]]
+            n_blocks = self.block_count[i]
+
+            psd = self.psd_sum[i] * scale / max(self.psd_segments[i], 1)
+            psd[1:-1] *= 2.0  # one-sided density
+            if n_blocks > 1:
+                gumbel_scale = np.sqrt(self.block_m2[i] / (n_blocks - 1)) * np.sqrt(6) / np.pi
+                gumbel_loc = self.block_mean[i] - EULER_GAMMA * gumbel_scale
+            else:
+                gumbel_scale = gumbel_loc = np.nan
+            weibull_shape, weibull_scale = _weibull_fit(peaks - mean[i])
+            levels = np.quantile(peaks, 1.0 - EXCEEDANCE_PROBABILITIES) if peaks.size else np.full(4, np.nan)
+            hist, edges = _rainflow_histogram(counts, top, self.cycle_max[i], self.rainflow_bins)
+
+            results.append({
+                "min": self.minimum[i], "max": self.maximum[i], "mean": mean[i], "rms": rms[i], "std": std[i],
+                "n_samples": self.count[i],
+                "gumbel_loc": gumbel_loc, "gumbel_scale": gumbel_scale,
+                "gumbel_mpm": gumbel_loc,  # the most probable block maximum is the Gumbel mode
+                "weibull_shape": weibull_shape, "weibull_scale": weibull_scale,
+                "peak_p50": levels[0], "peak_p10": levels[1], "peak_p01": levels[2], "peak_p001": levels[3],
+                "n_cycles": counts.sum(),
+                "psd_frequency": frequency, "psd": psd,
+                "rainflow_counts": hist, "rainflow_edges": edges,
+            })
+        return results
+
+
+def _weibull_fit(excess):
+    excess = excess[excess > 0]
+    if excess.size < 10:
+        return np.nan, np.nan
+    shape, _, scale = scipy_stats.weibull_min.fit(excess, floc=0.0)
+    return shape, scale
+
+
+def _rainflow_histogram(counts, top, largest, bins):
+    """Re-bin the internal cycle histogram over [0, top] to `bins` bins over [0, largest range]"""
+    if counts.sum() == 0:
+        return np.zeros(bins), np.linspace(0.0, 1.0, bins + 1)
+    edges = np.linspace(0.0, max(largest, 1e-12), bins + 1)
+    centers = (np.arange(len(counts)) + 0.5) * top / len(counts)
+    hist, _ = np.histogram(np.minimum(centers, edges[-1]), bins=edges, weights=counts)
+    return hist, edges
+
+
+def _case_chunks(paths, channel, chunk_size, time_column="time"):
+    """Yield (dt, chunk) with one row per file; files that end early are padded with NaN"""
+    readers = [pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=[time_column, channel]) for path in paths]
+    dt = None
+    while True:
+        rows, alive = [], False
+        for reader in readers:
+            batch = next(reader, None)
+            if batch is None:
+                rows.append(np.empty(0))
+                continue
+            alive = True
+            if dt is None and batch.num_rows > 1:
+                time = batch.column(0).to_numpy()
+                dt = float(time[1] - time[0])
+            rows.append(batch.column(1).to_numpy(zero_copy_only=False))
+        if not alive:
+            return
+        width = max(len(row) for row in rows)
+        chunk = np.full((len(rows), width), np.nan)
+        for i, row in enumerate(rows):
+            chunk[i, :len(row)] = row
+        yield dt, chunk
+
+
+def _process_group(paths, channel, chunk_size, nperseg):
+    accumulator = None
+    for dt, chunk in _case_chunks(paths, channel, chunk_size):
+        if accumulator is None:
+            accumulator = StreamingChannelStats(len(paths), dt or 1.0, nperseg=nperseg)
+        accumulator.update(chunk)
+    return accumulator.result() if accumulator else [None] * len(paths)
+
+
+def _cache_path(store, digest, channel):
+    return os.path.join(store.root, "stats", channel, f"{digest}.npz")
+
+
+def load_cached(store, digest, channel):
+    """Return the cached statistics of one (case, channel) or None"""
+    path = _cache_path(store, digest, channel)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {key: (data[key].item() if data[key].ndim == 0 else data[key]) for key in data.files}
+
+
+def compute_statistics(channel, case_filter=None, store=None, group_size=256, chunk_size=65536,
+                       nperseg=1024, workers=None, refresh=False):
+    """Compute (or load from cache) the statistics of `channel` for all matching cases.
+
+    Returns {config_hash: statistics dict}. Uncached cases are processed in groups of
+    `group_size` cases, the groups in parallel when `workers` > 1.
+    """
+    store = store or ResultsStore()
+    files = store.series_files(case_filter)
+    results, todo = {}, []
+    for digest, path in files.items():
+        cached = None if refresh else load_cached(store, digest, channel)
+        if cached is not None and os.path.getmtime(_cache_path(store, digest, channel)) >= os.path.getmtime(path):
+            results[digest] = cached
+        elif channel in pq.read_schema(path).names:
+            todo.append((digest, path))
+
+    groups = [todo[i:i + group_size] for i in range(0, len(todo), group_size)]
+    jobs = [([path for _, path in group], channel, chunk_size, nperseg) for group in groups]
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(_process_group, *zip(*jobs)))
+    else:
+        outputs = [_process_group(*job) for job in jobs]
+
+    updated = {}
+    for group, output in zip(groups, outputs):
+        for (digest, _), statistics in zip(group, output):
+            if statistics is None:
+                continue
+            path = _cache_path(store, digest, channel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savez(path, **statistics)
+            results[digest] = statistics
+            updated[digest] = statistics
+    if results:
+        _update_summary(store, channel, updated, results)
+    return results
+
+
+def _summary_path(store, channel):
+    return os.path.join(store.root, "summary", f"{channel}.parquet")
+
+
+def _update_summary(store, channel, computed, cached=None):
+    """Merge freshly computed scalar statistics into the per-channel summary table.
+
+    Cases in `cached` that are missing from the table (a summary write lost to a crash, or a
+    table deleted by hand) are added as well. The read-modify-write holds the summary lock, so
+    concurrent post-processing runs do not drop each other's rows.
+    """
+    path = _summary_path(store, channel)
+    with file_lock(path):
+        previous = pq.read_table(path) if os.path.exists(path) else None
+        known = set(previous["config_hash"].to_pylist()) if previous is not None else set()
+        computed = {**{d: s for d, s in (cached or {}).items() if d not in known}, **computed}
+        if not computed:
+            return
+        rows = pa.table({
+            "config_hash": list(computed),
+            **{key: [float(s[key]) for s in computed.values()] for key in SCALAR_STATISTICS},
+        })
+        if previous is not None:
+            keep = pc.invert(pc.is_in(previous["config_hash"], value_set=rows["config_hash"]))
+            rows = pa.concat_tables([previous.filter(keep), rows])
+        pq.write_table(rows, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+
+def summary_channels(store=None):
+    """Channels that have a precomputed summary table"""
+    store = store or ResultsStore()
+    folder = os.path.join(store.root, "summary")
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name[:-len(".parquet")] for name in os.listdir(folder) if name.endswith(".parquet"))
+
+
+def load_summary(channels, hashes=None, statistics=None, store=None):
+    """Precomputed scalar statistics as one wide DataFrame indexed by config_hash.
+
+    Columns are named '<channel> <statistic>'. No time series are read.
+    """
+    store = store or ResultsStore()
+    statistics = statistics or SCALAR_STATISTICS
+    frames = []
+    for channel in channels:
+        path = _summary_path(store, channel)
+        if not os.path.exists(path):
+            continue
+        row_filter = ds.field("config_hash").isin(list(hashes)) if hashes is not None else None
+        table = pq.read_table(path, columns=["config_hash"] + statistics, filters=row_filter)
+        frame = table.to_pandas().set_index("config_hash")
+        frames.append(frame.rename(columns=lambda key: f"{channel} {key}"))
+    if not frames:
+        return pd.DataFrame(index=pd.Index(list(hashes or []), name="config_hash"))
+    return pd.concat(frames, axis=1)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Post-process stored Safelink result channels")
+    parser.add_argument("channels", nargs="+", help="channel names, e.g. F_fb S_m")
+    parser.add_argument("--store", default=None, help="results store directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--refresh", action="store_true", help="ignore cached statistics")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store) if args.store else ResultsStore()
+    for name in args.channels:
+        computed = compute_statistics(name, store=store, workers=args.workers, refresh=args.refresh)
+        table = pd.DataFrame({digest: {key: s[key] for key in SCALAR_STATISTICS} for digest, s in computed.items()}).T
+        print(f"\n{name} ({len(table)} cases)")
+        print(table.to_string())
@@ -0,0 +1,238 @@
+"""Response surfaces of the stored result statistics, per unit type, for instant predictions.
+
+Every configuration with stored and post-processed results (utils.results_store and the summary
+tables of utils.statistics) is one training case: its unit, payload, special function and safety
+parameters are the inputs, its scalar statistics ("F_fb max", "S_m std", ...) the targets. One
+model per unit type (the family) predicts all targets of a new parameter set with a band:
+
+    terms       1, z_i and z_i z_j of the inputs that vary within the family, z standardized
+                with the mean and std of the cases the model was built from
+    fit         Bayesian ridge regression, no penalty on the intercept: A = X'X + ridge D,
+                coefficients A^-1 X'y, residual variance over the effective degrees of freedom
+                n - tr(A^-1 X'X)
+    band        +- LEVEL sigma sqrt(1 + x' A^-1 x), NaN with too few cases to estimate sigma
+
+A model keeps only X'X, X'y, y'y and n per target, so new cases are added without revisiting
+the trained ones. It is rebuilt from all cases when a trained case was deleted, a new case varies
+an input the model does not have or a new target appears. Results stored again for the same
+configuration are only picked up by a rebuild. Models are saved per unit type as
+<results store>/surrogates/<unit type>.npz and updated by the "train_surrogates" job (queued when
+results are stored), or from the command line:
+
+    python -m utils.surrogate [--store results_store] [--rebuild]
+"""
+import os
+import re
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+
+from utils.results_store import CASE_SCHEMA, ResultsStore
+from utils.statistics import load_summary, summary_channels
+
+RIDGE = 1e-3
+LEVEL = 1.96                     # band half width in predictive standard deviations (95 %)
+TARGET_STATISTICS = ["max", "min", "std", "gumbel_mpm"]
+# numeric case columns; parameters of disabled special functions are not exported and count as 0
+FEATURES = [
+    field.name for field in CASE_SCHEMA
+    if pa.types.is_floating(field.type) or (pa.types.is_boolean(field.type) and field.name.startswith("Special_Functions."))
+]
+
+
+def quadratic_terms(z):
+    """Design matrix [1, z, z_i z_j (i <= j)] of standardized inputs shaped (n, k)"""
+    upper = np.triu_indices(z.shape[1])
+    return np.concatenate([np.ones((len(z), 1)), z, z[:, upper[0]] * z[:, upper[1]]], axis=1)
+
+
+def feature_matrix(frame):
+    """FEATURES of a cases DataFrame as floats, missing values as 0"""
+    return frame.reindex(columns=FEATURES).astype(float).fillna(0.0).to_numpy()
+
+
+class ResponseSurface:
+    """Quadratic response surface of every target of one unit type"""
+
+    def __init__(self, family, inputs, center, scale, low, high, targets, ridge=RIDGE):
+        self.family = family
+        self.inputs = list(inputs)
+        self.center = np.asarray(center, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        # range of every feature over the training cases, for the extrapolation check
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.targets = list(targets)
+        self.ridge = ridge
+        k = len(self.inputs)
+        p = 1 + k + k * (k + 1) // 2
+        self._columns = np.array([FEATURES.index(name) for name in self.inputs], dtype=int)
+        self.xtx = np.zeros((len(self.targets), p, p))
+        self.xty = np.zeros((len(self.targets), p))
+        self.yty = np.zeros(len(self.targets))
+        self.count = np.zeros(len(self.targets), dtype=int)
+        self.hashes = []
+        self._solve()
+
+    @classmethod
+    def build(cls, family, frame, targets, ridge=RIDGE):
+        """Empty model with the inputs and standardization of the cases in frame"""
+        x = feature_matrix(frame)
+        varying = x.std(axis=0) > 0
+        return cls(family, [name for name, keep in zip(FEATURES, varying) if keep],
+                   x[:, varying].mean(axis=0), x[:, varying].std(axis=0), x.min(axis=0), x.max(axis=0), targets, ridge)
+
+    def design(self, x):
+        """Design matrix of feature rows shaped (n, len(FEATURES))"""
+        return quadratic_terms((x[:, self._columns] - self.center) / self.scale)
+
+    def covers(self, frame):
+        """True when the model can take the cases in frame without a rebuild"""
+        x = feature_matrix(frame)
+        fixed = np.setdiff1d(np.arange(len(FEATURES)), self._columns)
+        return bool(np.all(x[:, fixed] == self.low[fixed]))
+
+    def update(self, frame):
+        """Add the cases in frame (index config_hash, FEATURES and target columns)"""
+        x = self.design(feature_matrix(frame))
+        for t, target in enumerate(self.targets):
+            if target not in frame.columns:
+                continue
+            y = frame[target].to_numpy(dtype=float)
+            known = np.isfinite(y)
+            xt, yt = x[known], y[known]
+            self.xtx[t] += xt.T @ xt
+            self.xty[t] += xt.T @ yt
+            self.yty[t] += yt @ yt
+            self.count[t] += int(known.sum())
+        features = feature_matrix(frame)
+        self.low = np.minimum(self.low, features.min(axis=0))
+        self.high = np.maximum(self.high, features.max(axis=0))
+        self.hashes.extend(frame.index)
+        self._solve()
+
+    def _solve(self):
+        p = self.xtx.shape[1]
+        penalty = self.ridge * np.diag(np.r_[0.0, np.ones(p - 1)])
+        self.coefficients = np.zeros((len(self.targets), p))
+        self.a_inverse = np.zeros((len(self.targets), p, p))
+        self.sigma2 = np.full(len(self.targets), np.nan)
+        for t in range(len(self.targets)):
+            if self.count[t] == 0:
+                self.coefficients[t] = np.nan
+                continue
+            a_inverse = np.linalg.pinv(self.xtx[t] + penalty)
+            beta = a_inverse @ self.xty[t]
+            residual = self.yty[t] - 2 * beta @ self.xty[t] + beta @ self.xtx[t] @ beta
+            dof = self.count[t] - np.trace(a_inverse @ self.xtx[t])
+            self.coefficients[t] = beta
+            self.a_inverse[t] = a_inverse
+            self.sigma2[t] = max(residual, 0.0) / dof if dof >= 1 else np.nan
+
+    def predict(self, features):
+        """(prediction, band half width) of every target for a {feature: value} mapping"""
+        x = np.array([[float(features.get(name) or 0.0) for name in FEATURES]])
+        terms = self.design(x)[0]
+        mean = self.coefficients @ terms
+        variance = self.sigma2 * (1 + np.einsum("p,tpq,q->t", terms, self.a_inverse, terms))
+        return mean, LEVEL * np.sqrt(variance)
+
+    def extrapolated(self, features):
+        """Features outside the range of the training cases"""
+        x = np.array([float(features.get(name) or 0.0) for name in FEATURES])
+        tolerance = 1e-9 * np.maximum(np.abs(self.high), 1.0)
+        return [name for name, value, low, high, tol in zip(FEATURES, x, self.low, self.high, tolerance)
+                if value < low - tol or value > high + tol]
+
+    def save(self, path):
+        """Atomic write, so the unit page never loads a half-written model"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, tmp = tempfile.mkstemp(prefix=".surrogate-", suffix=".tmp.npz", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.savez(file, family=self.family, inputs=np.array(self.inputs, dtype=str), center=self.center,
+                         scale=self.scale, low=self.low, high=self.high, targets=np.array(self.targets, dtype=str),
+                         ridge=self.ridge, xtx=self.xtx, xty=self.xty, yty=self.yty, count=self.count,
+                         hashes=np.array(self.hashes, dtype=str))
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """A saved model, or None"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            model = cls(str(data["family"]), data["inputs"].tolist(), data["center"], data["scale"], data["low"],
+                        data["high"], data["targets"].tolist(), float(data["ridge"]))
+            model.xtx, model.xty, model.yty, model.count = data["xtx"], data["xty"], data["yty"], data["count"]
+            model.hashes = data["hashes"].tolist()
+        model._solve()
+        return model
+
+
+def model_path(family, store=None):
+    store = store or ResultsStore()
+    name = re.sub(r"[^\w.-]", "_", family)
+    return os.path.join(store.root, "surrogates", f"{name}.npz")
+
+
+def training_cases(store=None):
+    """Cases with their target statistics, indexed by config_hash, and the target columns"""
+    store = store or ResultsStore()
+    cases = store.cases(columns=["config_hash", "Unit.unit_type"] + FEATURES).to_pandas().set_index("config_hash")
+    summary = load_summary(summary_channels(store), statistics=TARGET_STATISTICS, store=store)
+    targets = [column for column in summary.columns if summary[column].notna().any()]
+    return cases.join(summary[targets], how="inner"), targets
+
+
+def train(store=None, rebuild=False, progress=None):
+    """Add the new cases to the model of every unit type, rebuilding where needed (module
+    docstring). Returns {unit type: number of cases}."""
+    store = store or ResultsStore()
+    data, targets = training_cases(store)
+    families = sorted(data["Unit.unit_type"].dropna().unique())
+    trained = {}
+    for n, family in enumerate(families):
+        frame = data[data["Unit.unit_type"] == family]
+        path = model_path(family, store)
+        model = None if rebuild else ResponseSurface.load(path)
+        if model is not None:
+            new = frame[~frame.index.isin(model.hashes)]
+            deleted = not set(model.hashes) <= set(frame.index)
+            if deleted or set(targets) - set(model.targets) or not model.covers(new):
+                model = None
+        if model is None:
+            model = ResponseSurface.build(family, frame, targets)
+            new = frame
+        if len(new):
+            model.update(new)
+            model.save(path)
+        trained[family] = len(model.hashes)
+        if progress is not None:
+            progress((n + 1) / len(families), f"{family}: {len(model.hashes)} cases")
+    return trained
+
+
+def train_job(params, job):
+    """Job function: update the models of all unit types"""
+    store = ResultsStore(params["store"]) if params.get("store") else ResultsStore()
+    trained = train(store, rebuild=params.get("rebuild", False), progress=job.progress)
+    job.progress(1.0, f"{sum(trained.values())} cases of {len(trained)} unit types", force=True)
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the surrogate models on the stored Safelink results")
+    parser.add_argument("--store", default=None, help="results store directory")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the models from all cases")
+    args = parser.parse_args()
+
+    trained = train(ResultsStore(args.store) if args.store else ResultsStore(), rebuild=args.rebuild)
+    for family, cases in trained.items():
+        print(f"{family}: {cases} cases")
@@ -0,0 +1,236 @@
+"""Live telemetry of a Safelink unit: ingestion into ring buffers, and replay of recordings.
+
+A TelemetryService runs its own asyncio event loop in a daemon thread and appends the samples
+of one source to a RingBuffer, a fixed-size array per channel. Readers (the live page, in the
+script threads) ask for the samples after the position they read last and copy only that
+slice, so neither side waits on the other for longer than one array copy.
+
+Sources:
+    udp://0.0.0.0:5005      datagrams of newline-separated JSON objects
+    tcp://0.0.0.0:5006      a stream of newline-separated JSON objects (any number of clients)
+    replay://path.csv       a recording (CSV with a time column) replayed in real time, looped;
+                            replay://path.csv?speed=5 replays it 5x faster
+    synthetic://            generated heave motion at 100 Hz, for demonstrations
+
+A sample is {"time": seconds, "S_m": ..., "F_IAHC_total_m": ..., ...}; missing channels are
+NaN and samples without a time get the receive time.
+"""
+import asyncio
+import json
+import math
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+CHANNELS = [
+    "S_m", "vS_m", "acc_S_m", "h_rod_m", "v_rod_m", "F_IAHC_total_m",
+    "h_external_MRU", "v_external_MRU", "acc_external_MRU", "depth",
+]
+CAPACITY = 100 * 600             # 10 minutes at 100 Hz
+TICK_SECONDS = 0.05              # replay and synthetic sources append in blocks of this length
+SYNTHETIC_RATE = 100.0           # Hz
+
+
+class RingBuffer:
+    """Fixed-size sample buffer: row 0 is the time, then one row per channel"""
+
+    def __init__(self, channels=CHANNELS, capacity=CAPACITY):
+        self.channels = list(channels)
+        self.columns = ["time"] + self.channels
+        self.capacity = capacity
+        self.data = np.full((len(self.columns), capacity), np.nan)
+        self.count = 0           # samples written since the start; positions count from 0
+        self._lock = threading.Lock()
+
+    def append(self, block):
+        """Append samples, an array (n, 1 + channels) in the order of `columns`"""
+        block = np.asarray(block, dtype=float)
+        n = len(block)
+        with self._lock:
+            if n > self.capacity:
+                self.count += n - self.capacity
+                block = block[-self.capacity:]
+                n = self.capacity
+            start = self.count % self.capacity
+            first = min(n, self.capacity - start)
+            self.data[:, start:start + first] = block[:first].T
+            self.data[:, :n - first] = block[first:].T
+            self.count += n
+
+    def since(self, position):
+        """(new position, samples (1 + channels, k)) written after `position`; samples that
+        were already overwritten are skipped"""
+        with self._lock:
+            count = self.count
+            position = max(position, count - self.capacity)
+            indices = np.arange(position, count) % self.capacity
+            return count, self.data[:, indices]
+
+
+def parse_samples(text, columns):
+    """Samples of newline-separated JSON objects as an array (n, columns); bad lines are skipped"""
+    rows = []
+    now = time.time()
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            sample = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(sample, dict):
+            continue
+        try:
+            row = [math.nan if sample.get(column) is None else float(sample[column]) for column in columns]
+        except (TypeError, ValueError):
+            continue
+        if row[0] != row[0]:
+            row[0] = now
+        rows.append(row)
+    return np.array(rows, dtype=float).reshape(-1, len(columns))
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, service):
+        self.service = service
+
+    def datagram_received(self, data, addr):
+        self.service.ingest(parse_samples(data.decode("utf-8", "replace"), self.service.buffer.columns))
+
+
+class TelemetryService:
+    """Ingestion of one telemetry source (held in st.cache_resource)"""
+
+    def __init__(self, source, channels=CHANNELS, capacity=CAPACITY, owner=None):
+        self.source = source
+        self.owner = owner       # user that started the source, who may stop it besides the admin
+        self.buffer = RingBuffer(channels, capacity)
+        self.status = "starting"
+        self.error = None
+        self.received = 0
+        self.started_at = time.time()
+        self.followed_at = self.started_at  # last time a session read the buffer
+        self._loop = asyncio.new_event_loop()
+        self._stop = None
+        self._thread = threading.Thread(target=self._run, daemon=True, name="safelink-telemetry")
+        self._thread.start()
+
+    def ingest(self, block):
+        if len(block):
+            self.buffer.append(block)
+            self.received += len(block)
+
+    def running(self):
+        return self._thread.is_alive()
+
+    def stop(self, timeout=2):
+        if self._stop is not None and self.running():
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join(timeout)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._stop = asyncio.Event()
+        url = urlparse(self.source)
+        try:
+            if url.scheme == "udp":
+                await self._udp(url.hostname or "0.0.0.0", url.port)
+            elif url.scheme == "tcp":
+                await self._tcp(url.hostname or "0.0.0.0", url.port)
+            elif url.scheme == "replay":
+                speed = float(parse_qs(url.query).get("speed", ["1"])[0])
+                await self._replay(url.netloc + url.path, speed)
+            elif url.scheme == "synthetic":
+                await self._synthetic()
+            else:
+                raise ValueError(f"Unknown telemetry source '{self.source}'")
+            self.status = "stopped"
+        except Exception as e:
+            self.status = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+
+    async def _udp(self, host, port):
+        transport, _ = await self._loop.create_datagram_endpoint(lambda: _DatagramProtocol(self), local_addr=(host, port))
+        self.status = f"listening on UDP {host}:{port}"
+        try:
+            await self._stop.wait()
+        finally:
+            transport.close()
+
+    async def _tcp(self, host, port):
+        async def handle(reader, writer):
+            try:
+                while not reader.at_eof():
+                    line = await reader.readline()
+                    self.ingest(parse_samples(line.decode("utf-8", "replace"), self.buffer.columns))
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        self.status = f"listening on TCP {host}:{port}"
+        async with server:
+            await self._stop.wait()
+
+    async def _play(self, times, values):
+        """Append samples (times relative to the start) in blocks as they become due"""
+        started = self._loop.time()
+        wall_start = time.time()
+        position = 0
+        while position < len(times) and not self._stop.is_set():
+            due = self._loop.time() - started
+            end = int(np.searchsorted(times, due, side="right"))
+            if end > position:
+                block = np.column_stack([wall_start + times[position:end], values[position:end]])
+                self.ingest(block)
+                position = end
+            try:
+                await asyncio.wait_for(self._stop.wait(), TICK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _replay(self, path, speed):
+        recording = pd.read_csv(path)
+        if "time" not in recording:
+            raise ValueError("The recording has no time column")
+        times = (recording["time"].to_numpy(dtype=float) - float(recording["time"].iloc[0])) / speed
+        values = recording.reindex(columns=self.buffer.channels).to_numpy(dtype=float)
+        self.status = f"replaying {path} ({len(recording)} samples, {speed:g}x)"
+        while not self._stop.is_set():
+            await self._play(times, values)
+
+    async def _synthetic(self):
+        self.status = f"synthetic heave at {SYNTHETIC_RATE:g} Hz"
+        block_seconds = 60.0
+        times = np.arange(0.0, block_seconds, 1.0 / SYNTHETIC_RATE)
+        rng = np.random.default_rng()
+        while not self._stop.is_set():
+            await self._play(times, synthetic_samples(times, rng, self.buffer.channels))
+
+
+def synthetic_samples(t, rng, channels=CHANNELS):
+    """Heave motion of a 9 s swell with the unit compensating it, shape (len(t), channels)"""
+    omega = 2 * math.pi / 9.0
+    heave = 1.5 * np.sin(omega * t)
+    stroke = 1.5 - 0.8 * heave / 1.5 + 0.01 * rng.standard_normal(len(t))
+    signals = {
+        "S_m": stroke,
+        "vS_m": -0.8 * omega * np.cos(omega * t),
+        "acc_S_m": 0.8 * omega ** 2 * np.sin(omega * t),
+        "h_rod_m": stroke - 1.5,
+        "v_rod_m": -0.8 * omega * np.cos(omega * t),
+        "F_IAHC_total_m": 510.0 + 25.0 * np.sin(omega * t + 0.6) + 3.0 * rng.standard_normal(len(t)),
+        "h_external_MRU": heave,
+        "v_external_MRU": 1.5 * omega * np.cos(omega * t),
+        "acc_external_MRU": -1.5 * omega ** 2 * np.sin(omega * t),
+        "depth": np.full(len(t), 30.0),
+    }
+    return np.column_stack([signals.get(name, np.full(len(t), np.nan)) for name in channels])
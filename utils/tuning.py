@@ -0,0 +1,254 @@
+"""Automatic tuning of the special function settings with the closed-loop lift simulation.
+
+The settings of the enabled special functions (TUNABLE, bounded by the input limits of the unit
+page) are optimised with CMA-ES against utils.lift_simulation:
+
+    objective   RMS payload heave velocity [m/s]
+    limits      max stroke utilization <= STROKE_LIMIT, peak |F_fb| <= FORCE_LIMIT times the max
+                force limit (the active force saturates there), min tension >= 0 (no slack)
+    penalty     PENALTY per unit of relative limit violation, so infeasible settings always
+                rank below feasible ones
+
+CMA-ES (Hansen's (mu/mu_w, lambda) with rank-one and rank-mu updates) runs in coordinates
+normalised to the bounds, starting from the current settings. Candidates are rounded to DECIMALS
+and those outside the bounds are evaluated at the nearest bound with a quadratic penalty. Every
+generation is simulated in a process pool; repeated candidates come from the run's evaluation
+cache. The search stops after MAX_GENERATIONS, when the step size falls below TOL_X or when the
+best objective improved less than TOL_F over PATIENCE generations. Results are saved as JSON per
+unit and configuration, so tuning the same configuration again returns at once:
+
+    result = tune(record, stroke)
+    result["best"]        # {setting: value}
+
+The unit page runs tune as a "tune_settings" job (utils.jobs) and reads the result file when the
+job is done.
+
+    SAFELINK_TUNING_DIR     result files (default tuning)
+"""
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.lift_simulation import METRICS, SEA_STATE
+from utils.sensitivity import WORKERS, evaluate_rows
+from utils.splash_zone import G
+
+MODEL_VERSION = 1
+DIRECTORY = os.environ.get("SAFELINK_TUNING_DIR", "tuning")
+TUNABLE = {
+    # setting: (special function, lower bound, upper bound)
+    "quick_acceleration_limit": ("quick_lifting", 0.1, 2.0),
+    "tension_tolerance": ("constant_tension", 1.0, 20.0),
+    "lock_hold_time": ("rod_lock", 1.0, 30.0),
+    "lock_speed": ("rod_lock", 0.1, 2.0),
+    "heave_start_time": ("active_heave_compensation", 0.0, 60.0),
+    "max_stroke_speed": ("active_heave_compensation", 0.5, 5.0),
+}
+STROKE_LIMIT = 0.9
+FORCE_LIMIT = 0.9
+PENALTY = 10.0                   # m/s per unit of relative violation
+BOUND_PENALTY = 1.0              # m/s per squared normalised distance outside the bounds
+SIGMA0 = 0.3                     # initial step size, fraction of the bounds
+MAX_GENERATIONS = 40
+TOL_X = 1e-3
+TOL_F = 1e-4                     # m/s
+PATIENCE = 8
+DECIMALS = 3                     # settings are rounded before they are simulated and applied
+
+
+def tunable_settings(record):
+    """Settings of the enabled special functions"""
+    return [name for name, (function, _, _) in TUNABLE.items() if record["functions"].get(function)]
+
+
+def objective(metrics, record):
+    """(penalised objective, feasible) of the METRICS of one simulation"""
+    force_limit = (record["parameters"]["max_force_limit"] or 0.0) * G
+    violations = [
+        metrics["stroke_utilization"] / STROKE_LIMIT - 1,
+        metrics["F_fb_peak"] / (FORCE_LIMIT * force_limit) - 1 if force_limit > 0 else 0.0,
+        -metrics["tension_min"] / max(metrics["tension_max"], 1e-6),
+    ]
+    excess = sum(max(violation, 0.0) for violation in violations)
+    return metrics["payload_velocity"] + PENALTY * excess, excess == 0
+
+
+class CMAES:
+    """Ask/tell CMA-ES in the unit cube [0, 1]^n"""
+
+    def __init__(self, mean, sigma=SIGMA0, seed=None):
+        n = len(mean)
+        self.n = n
+        self.mean = np.clip(np.asarray(mean, dtype=float), 0.0, 1.0)
+        self.sigma = sigma
+        self.rng = np.random.default_rng(seed)
+        self.population = 4 + int(3 * math.log(n))
+        self.mu = self.population // 2
+        weights = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        self.mu_eff = 1.0 / (self.weights ** 2).sum()
+        self.c_sigma = (self.mu_eff + 2) / (n + self.mu_eff + 5)
+        self.d_sigma = 1 + 2 * max(0.0, math.sqrt((self.mu_eff - 1) / (n + 1)) - 1) + self.c_sigma
+        self.c_c = (4 + self.mu_eff / n) / (n + 4 + 2 * self.mu_eff / n)
+        self.c_1 = 2 / ((n + 1.3) ** 2 + self.mu_eff)
+        self.c_mu = min(1 - self.c_1, 2 * (self.mu_eff - 2 + 1 / self.mu_eff) / ((n + 2) ** 2 + self.mu_eff))
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+        self.p_sigma = np.zeros(n)
+        self.p_c = np.zeros(n)
+        self.C = np.eye(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.generation = 0
+
+    def ask(self):
+        """Candidates of the next generation, shape (population, n), not clipped to the bounds"""
+        z = self.rng.standard_normal((self.population, self.n))
+        return self.mean + self.sigma * (z * self.D) @ self.B.T
+
+    def tell(self, candidates, fitness):
+        """Update the distribution with the fitness (lower is better) of the asked candidates"""
+        n = self.n
+        order = np.argsort(fitness)[:self.mu]
+        selected = candidates[order]
+        old_mean = self.mean
+        self.mean = self.weights @ selected
+        step = (self.mean - old_mean) / self.sigma
+        inverse_sqrt = self.B @ np.diag(1 / self.D) @ self.B.T
+        self.p_sigma = (1 - self.c_sigma) * self.p_sigma + math.sqrt(self.c_sigma * (2 - self.c_sigma) * self.mu_eff) * inverse_sqrt @ step
+        self.generation += 1
+        norm = np.linalg.norm(self.p_sigma) / math.sqrt(1 - (1 - self.c_sigma) ** (2 * self.generation))
+        h_sigma = float(norm < (1.4 + 2 / (n + 1)) * self.chi_n)
+        self.p_c = (1 - self.c_c) * self.p_c + h_sigma * math.sqrt(self.c_c * (2 - self.c_c) * self.mu_eff) * step
+        deviations = (selected - old_mean) / self.sigma
+        self.C = ((1 - self.c_1 - self.c_mu) * self.C
+                  + self.c_1 * (np.outer(self.p_c, self.p_c) + (1 - h_sigma) * self.c_c * (2 - self.c_c) * self.C)
+                  + self.c_mu * (deviations.T * self.weights) @ deviations)
+        self.sigma *= math.exp((self.c_sigma / self.d_sigma) * (np.linalg.norm(self.p_sigma) / self.chi_n - 1))
+        self.C = (self.C + self.C.T) / 2
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+    @property
+    def step_size(self):
+        """Largest standard deviation of the search distribution"""
+        return self.sigma * self.D.max()
+
+
+def tuning_key(record, stroke, names, sea_state, seed):
+    """Cache key of a tuning run"""
+    text = json.dumps([MODEL_VERSION, record, stroke, list(names), list(sea_state), seed], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def tuning_path(unit_id, key, directory=DIRECTORY):
+    return os.path.join(directory, re.sub(r"[^\w.-]", "_", str(unit_id)), f"{key}.json")
+
+
+def load_result(path):
+    """A saved tuning result, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def tune(record, stroke, names=None, sea_state=SEA_STATE, seed=0, workers=WORKERS, progress=None, directory=DIRECTORY):
+    """Optimised settings of the record (module docstring), loaded from the result file when it
+    exists. progress is an optional callback(fraction, message), called after every generation.
+
+    Returns {"names", "initial", "best" ({setting: value}), "initial_metrics", "best_metrics",
+    "initial_objective", "best_objective", "feasible", "evaluations", "generations", "stopped",
+    "history" (best objective per generation)}.
+    """
+    names = list(tunable_settings(record) if names is None else names)
+    path = tuning_path(record["unit_id"], tuning_key(record, stroke, names, sea_state, seed), directory)
+    saved = load_result(path)
+    if saved is not None:
+        return saved
+
+    low = np.array([TUNABLE[name][1] for name in names])
+    high = np.array([TUNABLE[name][2] for name in names])
+    initial = np.array([record["parameters"][name] or low[i] for i, name in enumerate(names)], dtype=float)
+    cache = {}
+
+    def run(rows, pool):
+        """Penalised objective and METRICS of settings rows, simulating only the uncached ones"""
+        keys = [tuple(row) for row in rows]
+        todo = list(dict.fromkeys(key for key in keys if key not in cache))
+        if todo:
+            if pool is None:
+                outputs = evaluate_rows(record, stroke, names, todo, sea_state)
+            else:
+                outputs = list(pool.map(evaluate_rows, *zip(*[(record, stroke, names, [key], sea_state) for key in todo])))
+                outputs = [output[0] for output in outputs]
+            for key, output in zip(todo, outputs):
+                metrics = dict(zip(METRICS, output))
+                cache[key] = (*objective(metrics, record), metrics)
+        return [cache[key] for key in keys]
+
+    # spawn, so the workers do not inherit the server's threads and locks
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) if workers > 0 and names else None
+    try:
+        start_fitness, start_feasible, start_metrics = run([initial], None)[0]
+        best = (start_fitness, initial, start_feasible, start_metrics)
+        history = [start_fitness]
+        stopped = "no settings to tune" if not names else f"{MAX_GENERATIONS} generations"
+        strategy = CMAES((initial - low) / (high - low), seed=seed) if names else None
+        while strategy is not None and strategy.generation < MAX_GENERATIONS:
+            candidates = strategy.ask()
+            inside = np.clip(candidates, 0.0, 1.0)
+            settings = np.round(low + inside * (high - low), DECIMALS)
+            results = run(settings, pool)
+            outside = ((candidates - inside) ** 2).sum(axis=1)
+            fitness = np.array([result[0] for result in results]) + BOUND_PENALTY * outside
+            strategy.tell(candidates, fitness)
+            index = int(np.argmin([result[0] for result in results]))
+            if results[index][0] < best[0]:
+                best = (results[index][0], settings[index], results[index][1], results[index][2])
+            history.append(best[0])
+            if progress is not None:
+                progress(strategy.generation / MAX_GENERATIONS, f"Generation {strategy.generation}: best {best[0]:.4f} m/s")
+            if strategy.step_size < TOL_X:
+                stopped = "converged"
+                break
+            if len(history) > PATIENCE and history[-PATIENCE - 1] - best[0] < TOL_F:
+                stopped = f"no improvement in {PATIENCE} generations"
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    result = {
+        "names": names,
+        "initial": dict(zip(names, initial.tolist())),
+        "best": dict(zip(names, best[1].tolist())),
+        "initial_metrics": start_metrics,
+        "best_metrics": best[3],
+        "initial_objective": start_fitness,
+        "best_objective": best[0],
+        "feasible": bool(best[2]),
+        "evaluations": len(cache),
+        "generations": strategy.generation if strategy is not None else 0,
+        "stopped": stopped,
+        "history": history,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(result, file)
+    os.replace(f"{path}.tmp", path)
+    if progress is not None:
+        progress(1.0, stopped)
+    return result
+
+
+def tune_job(params, job):
+    """Job function: tune with the params (its arguments)"""
+    result = tune(**{**params, "sea_state": tuple(params["sea_state"])}, progress=job.progress)
+    job.progress(1.0, f"{result['evaluations']} simulations, {result['stopped']}", force=True)
+    return None